@@ -1,27 +1,49 @@
 """
 https://docs.langchain.com/oss/python/langchain/supervisor
+
+Agents are declared in `registry` and compiled on first use, so importing
+this module reads no configuration and builds no model. The graphs are also
+available as module attributes (`agent.supervisor_agent`...), compiled on
+first access. Run the demo with `python agent.py [query]`.
 """
 
 
-from langgraph.prebuilt import create_react_agent
-from langchain_core.tools import tool
+import argparse
+import asyncio
+import os
 
+from agent_factory import AgentRegistry
 from tools.financial_tools import compound_interest_calculator
-from tools.real_estate_tools import real_estate_profitability_calculator
+from tools.real_estate_tools import (
+    real_estate_profitability_calculator,
+    real_estate_sensitivity_analysis,
+)
+from tools.task_tool import ConcurrencyLimiter, MAX_CONCURRENT_SUBAGENTS, subagent_tool
 
+from streaming import AgentStream, StreamPrinter
 from utils import pretty_print_messages
 
-from dotenv import load_dotenv
-import os
+REQUIRED_ENV_VARS = (
+    "OPENAI_API_KEY",
+    "LANGCHAIN_API_KEY",
+    "LANGSMITH_TRACING",
+    "LANGSMITH_ENDPOINT",
+    "LANGSMITH_PROJECT",
+)
+
 
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.environ['OPENAI_API_KEY']
-LANGCHAIN_API_KEY = os.environ['LANGCHAIN_API_KEY']
-LANGSMITH_API_KEY = os.environ['LANGCHAIN_API_KEY']
-LANGSMITH_TRACING = os.environ['LANGSMITH_TRACING']
-LANGSMITH_ENDPOINT = os.environ['LANGSMITH_ENDPOINT']
-LANGSMITH_PROJECT = os.environ['LANGSMITH_PROJECT']
+def load_environment() -> dict[str, str]:
+    """Load the .env file and check that the required variables are set."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    missing = [name for name in REQUIRED_ENV_VARS if not os.environ.get(name)]
+    if missing:
+        raise RuntimeError(f"Missing environment variables: {', '.join(missing)}")
+    return {name: os.environ[name] for name in REQUIRED_ENV_VARS}
+
+
+registry = AgentRegistry()
 
 
 FINANCIAL_SYSTEM_PROMPT = """
@@ -43,11 +65,10 @@ Guidelines:
 
 """
 
-financial_agent = create_react_agent(
-    model = "openai:gpt-4o-mini",
-    tools = [compound_interest_calculator],
-    prompt = FINANCIAL_SYSTEM_PROMPT,
-    name = "financial_agent",
+registry.register(
+    "financial_agent",
+    prompt=FINANCIAL_SYSTEM_PROMPT,
+    tools=[compound_interest_calculator],
 )
 
 REAL_ESTATE_SYSTEM_PROMPT = """
@@ -56,6 +77,7 @@ You are REA, an expert real estate investment analyst specialized in Spanish pro
 Your role:
 - Analyze and explain property investment profitability in Spain.
 - Use the `real_estate_profitability_calculator` tool whenever users mention purchase price, rent, mortgage, or yields.
+- Use the `real_estate_sensitivity_analysis` tool to compare several scenarios at once (e.g. different rates, terms, prices, rents or LTVs) in a single call instead of calling the calculator once per scenario.
 - If details are missing (e.g. rate, salary, region), ask for them before calculating.
 
 Guidelines:
@@ -78,25 +100,31 @@ Example queries:
 If computation is required, use the tool, then summarize findings clearly.
 """
 
-real_estate_agent = create_react_agent(
-    model = "openai:gpt-4o-mini",
-    tools = [real_estate_profitability_calculator],
-    prompt = REAL_ESTATE_SYSTEM_PROMPT,
-    name = "real_estate_agent",
+registry.register(
+    "real_estate_agent",
+    prompt=REAL_ESTATE_SYSTEM_PROMPT,
+    tools=[real_estate_profitability_calculator, real_estate_sensitivity_analysis],
 )
 
-# Wrap sub-agents as tools
-@tool
-def run_financial_task(request: str) -> str:
-    """Route a financial question to the financial sub-agent and return its final answer."""
-    result = financial_agent.invoke({"messages": [{"role": "user", "content": request}]})
-    return result["messages"][-1].content  # o .text según el driver/model
+# Wrap sub-agents as tools. With astream/ainvoke, the sub-agents called in the
+# same supervisor turn run concurrently, at most MAX_CONCURRENT_SUBAGENTS at once
+subagent_limiter = ConcurrencyLimiter(MAX_CONCURRENT_SUBAGENTS)
+
+run_financial_task = subagent_tool(
+    lambda: registry.get("financial_agent"),
+    name="run_financial_task",
+    description="Route a financial question to the financial sub-agent and return its final answer.",
+    limiter=subagent_limiter,
+    agent_name="financial_agent",
+)
 
-@tool
-def run_real_estate_analysis(request: str) -> str:
-    """Route a real-estate question to the real-estate sub-agent and return its final answer."""
-    result = real_estate_agent.invoke({"messages": [{"role": "user", "content": request}]})
-    return result["messages"][-1].content
+run_real_estate_analysis = subagent_tool(
+    lambda: registry.get("real_estate_agent"),
+    name="run_real_estate_analysis",
+    description="Route a real-estate question to the real-estate sub-agent and return its final answer.",
+    limiter=subagent_limiter,
+    agent_name="real_estate_agent",
+)
 
 
 SUPERVISOR_SYSTEM_PROMPT = """
@@ -110,6 +138,7 @@ Your job:
 - When the query involves properties, housing, or rent → delegate to the Real Estate Agent.
 - When it involves investments, returns, interest, or savings → delegate to the Financial Agent.
 - If it involves both (e.g., “investing in property vs bonds”), send the relevant parts to each agent and summarize the combined insights.
+- Call independent agents in the same turn (several tool calls in one response): they run in parallel.
 
 Guidelines:
 1. Route tasks to the appropriate subagent(s).
@@ -118,13 +147,20 @@ Guidelines:
 4. Be concise, analytical, and neutral — do not provide investment advice.
 """
 
-supervisor_agent = create_react_agent(
-    model="openai:gpt-4o-mini",
-    tools=[run_financial_task, run_real_estate_analysis],
+registry.register(
+    "supervisor_agent",
     prompt=SUPERVISOR_SYSTEM_PROMPT,
-    name="supervisor_agent",
+    tools=[run_financial_task, run_real_estate_analysis],
 )
 
+
+def __getattr__(name: str):
+    # financial_agent, real_estate_agent and supervisor_agent, compiled on first access
+    if name in registry:
+        return registry.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 query1 = ("Can you tell me how much money will I get if I start with an initial balance of 2000 euros"
         "and invest 350 euros monthly for 8 years at an interest rate of 7.5%?")
 
@@ -134,9 +170,26 @@ query2 = ("Please compute the gross rental yield of a property in Madrid bought
           "fixed rate at 2.5%.")
 
 
-for step in supervisor_agent.stream(
-    {"messages": [{"role": "user", "content": query2}]}
-):
-    for update in step.values():
-        for message in update.get("messages", []):
-            message.pretty_print()
\ No newline at end of file
+async def run_supervisor(query: str):
+    """Run the supervisor asynchronously, so that its sub-agents can run in parallel,
+    printing the tokens and tool calls of every agent as they are produced."""
+    stream = AgentStream(
+        registry.get("supervisor_agent"), {"messages": [{"role": "user", "content": query}]}
+    )
+    printer = StreamPrinter()
+    async for event in stream:
+        printer(event)
+    print(f"\n\nTime to first token: {stream.time_to_first_token:.2f}s")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Ask the financial supervisor agent a question.")
+    parser.add_argument("query", nargs="?", default=query2, help="Question (default: a rental yield example)")
+    args = parser.parse_args(argv)
+
+    load_environment()
+    asyncio.run(run_supervisor(args.query))
+
+
+if __name__ == "__main__":
+    main()
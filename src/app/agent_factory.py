@@ -0,0 +1,116 @@
+"""
+Lazy construction and caching of agent graphs.
+
+Compiling a `create_react_agent` graph builds its chat model (which needs
+API keys) and its tool node, so nothing here happens at import time:
+
+- `build_agent` compiles a graph once per (model, tools, prompt, name,
+  state schema) and returns the cached graph afterwards,
+- `AgentRegistry` maps agent names to their specification and compiles each
+  agent on first use only.
+
+Processes and tests that never run an agent therefore never pay for it,
+and agents that share a configuration share one compiled graph.
+"""
+
+import threading
+from typing import Any, Callable, Optional, Sequence, Union
+
+from tools.lazy_client import LazyClient
+
+DEFAULT_MODEL = "openai:gpt-4o-mini"
+
+_agents: dict[tuple, Any] = {}
+_agents_lock = threading.Lock()
+
+
+def _identity_key(value) -> Union[str, int]:
+    # Model names are compared by value, model and tool objects by identity
+    # (the cached graph keeps them alive, so their ids are not reused)
+    return value if isinstance(value, str) else id(value)
+
+
+def build_agent(
+    model,
+    tools: Sequence,
+    prompt: str,
+    name: Optional[str] = None,
+    state_schema: Optional[type] = None,
+):
+    """
+    Compiled ReAct agent graph, built on the first call for its configuration.
+
+    Args:
+        model: Model name ("provider:model") or chat model instance
+        tools: Tools of the agent
+        prompt: System prompt
+        name: Name of the graph
+        state_schema: State schema (AgentState by default)
+    """
+    key = (
+        _identity_key(model),
+        tuple(_identity_key(tool_) for tool_ in tools),
+        prompt,
+        name,
+        state_schema,
+    )
+    with _agents_lock:
+        agent = _agents.get(key)
+        if agent is None:
+            from langgraph.prebuilt import create_react_agent
+
+            agent = _agents[key] = create_react_agent(
+                model, tools=list(tools), prompt=prompt, name=name, state_schema=state_schema
+            )
+        return agent
+
+
+def clear_agent_cache() -> None:
+    """Forget the compiled graphs (e.g. after changing credentials)."""
+    with _agents_lock:
+        _agents.clear()
+
+
+class AgentRegistry:
+    """
+    Named agents, compiled on first use.
+
+    Tools can be given as a list or as a function returning the list, for
+    tools that depend on other agents of the registry (e.g. sub-agent tools).
+
+    Example:
+        >>> registry = AgentRegistry()
+        >>> registry.register("financial_agent", FINANCIAL_PROMPT, [compound_interest_calculator])
+        >>> registry.get("financial_agent").invoke({"messages": [("user", question)]})
+    """
+
+    def __init__(self):
+        self._agents: dict[str, LazyClient] = {}
+
+    def register(
+        self,
+        name: str,
+        prompt: str,
+        tools: Union[Sequence, Callable[[], Sequence]],
+        model=DEFAULT_MODEL,
+        state_schema: Optional[type] = None,
+    ) -> None:
+        """Declare an agent; it is compiled by the first `get`."""
+        def provider():
+            agent_tools = tools() if callable(tools) else tools
+            return build_agent(model, agent_tools, prompt, name=name, state_schema=state_schema)
+
+        self._agents[name] = LazyClient(provider)
+
+    def get(self, name: str):
+        """Compiled graph of an agent; KeyError if it was not registered."""
+        return self._agents[name].get()
+
+    def is_compiled(self, name: str) -> bool:
+        return self._agents[name].initialized
+
+    def names(self) -> list[str]:
+        return list(self._agents)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._agents
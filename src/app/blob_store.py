@@ -0,0 +1,151 @@
+"""
+Content-addressed store for large virtual files.
+
+Files above `file_store.SPILL_THRESHOLD` characters are not kept in agent
+state: their content is compressed with zlib and written once to a local
+directory, under its SHA-256, and the state only keeps that digest. The
+same content written by several agents, or in several sessions, is stored
+once, and checkpoints stay small however much research was saved.
+
+Blobs are never modified and are laid out like git objects
+(`<root>/ab/cdef...`), under $BLOB_STORE_DIR or by default under
+src/infrastructure/db/blobs.
+
+Storage and retention:
+
+- Checkpoints only hold digests, so the blob root must be persistent
+  storage available to every process that restores them (set
+  $BLOB_STORE_DIR to a shared volume when checkpoints move between hosts).
+  Reading a file whose blob is gone raises `MissingBlobError`, which the
+  file tools report to the agent instead of failing the run.
+- Blobs are never evicted automatically, since any retained checkpoint may
+  refer to them. Run `BlobStore.collect_garbage` with the digests of the
+  checkpoints still kept (`FileMap.blob_digests`) to delete the others; a
+  grace period protects the blobs of runs not checkpointed yet.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, Union
+
+BLOB_STORE_DIR_ENV = "BLOB_STORE_DIR"
+DEFAULT_BLOB_DIR = Path(__file__).resolve().parents[1] / "infrastructure" / "db" / "blobs"
+COMPRESSION_LEVEL = 6
+# Unreferenced blobs younger than this are kept by garbage collection
+DEFAULT_GC_MIN_AGE = 24 * 3600
+
+
+class MissingBlobError(FileNotFoundError):
+    """A blob referenced by a file map is not in the store (cleared, or another host's store)."""
+
+
+class BlobRef(NamedTuple):
+    """Handle of a file whose content lives in the blob store."""
+    digest: str
+
+
+class BlobStore:
+    """
+    Directory of zlib-compressed blobs named by the SHA-256 of their content.
+
+    Args:
+        root: Directory of the blobs (created if needed)
+        level (int): zlib compression level
+
+    Example:
+        >>> store = BlobStore("/tmp/blobs")
+        >>> digest = store.put("long page content...")
+        >>> store.get(digest)
+        'long page content...'
+    """
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_BLOB_DIR, level: int = COMPRESSION_LEVEL):
+        self.root = Path(root)
+        self.level = level
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, content: str) -> str:
+        """Store `content` (once) and return its digest."""
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            # Refresh its age, so that garbage collection keeps a blob written again
+            os.utime(path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so that readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as tmp:
+                    tmp.write(zlib.compress(data, self.level))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Content of a blob; MissingBlobError if it is not in the store."""
+        try:
+            data = self._path(digest).read_bytes()
+        except FileNotFoundError:
+            raise MissingBlobError(f"Blob {digest} is missing from {self.root}") from None
+        return zlib.decompress(data).decode("utf-8")
+
+    def __contains__(self, digest: str) -> bool:
+        return self._path(digest).exists()
+
+    def size(self) -> int:
+        """Total bytes stored on disk."""
+        return sum(path.stat().st_size for path in self.root.glob("??/*"))
+
+    def collect_garbage(self, live: Iterable[str], min_age: float = DEFAULT_GC_MIN_AGE) -> int:
+        """
+        Delete the blobs not in `live` that were last written more than `min_age` seconds ago.
+
+        Args:
+            live: Digests still referenced, e.g. the `FileMap.blob_digests()` of every kept checkpoint
+            min_age (float): Grace period for blobs of runs that are not checkpointed yet
+
+        Returns:
+            Number of bytes freed
+        """
+        live = set(live)
+        cutoff = time.time() - min_age
+        freed = 0
+        for path in self.root.glob("??/*"):
+            if path.name.startswith(".tmp-") or path.parent.name + path.name in live:
+                continue
+            stat = path.stat()
+            if stat.st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                freed += stat.st_size
+        return freed
+
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Shared blob store, at $BLOB_STORE_DIR (or DEFAULT_BLOB_DIR) unless replaced."""
+    global _blob_store
+    with _blob_store_lock:
+        if _blob_store is None:
+            _blob_store = BlobStore(os.environ.get(BLOB_STORE_DIR_ENV) or DEFAULT_BLOB_DIR)
+        return _blob_store
+
+
+def set_blob_store(store: Optional[BlobStore]) -> None:
+    """Replace the shared blob store; None goes back to the default one."""
+    global _blob_store
+    with _blob_store_lock:
+        _blob_store = store
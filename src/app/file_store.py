@@ -0,0 +1,519 @@
+"""
+Persistent file map for the virtual filesystem in agent state.
+
+`FileMap` is an immutable mapping of path -> content implemented as a hash
+array mapped trie (HAMT). Updating it returns a new map that shares every
+untouched node with the previous one, so applying a change costs
+O(changed paths * log32(files)) instead of copying the whole filesystem, and
+older versions (e.g. the ones referenced by checkpoints) stay valid.
+
+Tools emit only the changed paths; `state.file_reducer` applies them with
+`FileMap.update`, where a None content deletes the path.
+
+Every file also carries a line-offset index, built when it is written and
+replaced with it on overwrite, so reading a page of lines slices the content
+directly instead of splitting the whole file, and a search can run one regex
+over the whole content and map match offsets back to line numbers.
+
+Files longer than SPILL_THRESHOLD characters are moved to the blob store when
+written (see `blob_store`): the map only keeps their digest, and their content
+is loaded (and its line index built) when they are read, through a small LRU
+cache. Checkpoints therefore only carry digests for them; see `blob_store`
+for where blobs must live and how unreferenced ones are collected.
+
+Spilled files also carry a trigram filter of their lowercased content, built
+when they are written, so that keyword searches (`FileMap.mentioning`) skip
+the files that cannot match without loading them from the blob store.
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from itertools import accumulate
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from blob_store import BlobRef, get_blob_store
+
+# Files longer than this (in characters) are kept in the blob store
+SPILL_THRESHOLD = 16 * 1024
+# Number of blobs kept decompressed in memory
+BLOB_CACHE_SIZE = 32
+# Bits of the trigram filter of a spilled file, and number of filters rebuilt
+# from the blob store (for maps restored from a checkpoint) kept in memory
+TRIGRAM_FILTER_BITS = 1 << 14
+TRIGRAM_CACHE_SIZE = 4096
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+_HASH_BITS = 64
+
+
+def _hash(path: str) -> int:
+    return hash(path) & ((1 << _HASH_BITS) - 1)
+
+
+def _index(bitmap: int, bit: int) -> int:
+    """Position of `bit` among the occupied slots of a node."""
+    return (bitmap & (bit - 1)).bit_count()
+
+
+def _line_starts(content: str) -> array:
+    """Offset where every line starts, plus the end of the content.
+
+    Lines are the ones of `str.splitlines`, so line i is
+    content[starts[i]:starts[i + 1]] with its line break.
+    """
+    return array("q", accumulate(map(len, content.splitlines(keepends=True)), initial=0))
+
+
+def _trigram_hashes(text: str) -> np.ndarray:
+    """Filter bit of every trigram of `text`.
+
+    The three code points (21 bits each) are packed in one integer and mixed
+    with the MurmurHash3 finalizer, so the bits are stable across processes.
+    """
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    h = codes[:-2] << np.uint64(42) | codes[1:-1] << np.uint64(21) | codes[2:]
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xFF51AFD7ED558CCD)
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xC4CEB9FE1A85EC53)
+    h ^= h >> np.uint64(33)
+    return h % np.uint64(TRIGRAM_FILTER_BITS)
+
+
+def _trigram_filter(content: str) -> np.ndarray:
+    """Bloom filter (one hash, packed bits) of the trigrams of the lowercased content."""
+    bits = np.zeros(TRIGRAM_FILTER_BITS, dtype=bool)
+    bits[_trigram_hashes(content.lower())] = True
+    return np.packbits(bits, bitorder="little")
+
+
+def _may_contain(trigrams: np.ndarray, keyword: str) -> bool:
+    """False if the lowercase `keyword` is certainly not in the filtered content."""
+    h = _trigram_hashes(keyword)
+    return bool(((trigrams[h >> np.uint64(3)] >> (h & np.uint64(7)).astype(np.uint8)) & 1).all())
+
+
+def _leaf(path: str, content: Union[str, BlobRef], spill: bool = True) -> tuple:
+    """(path, content, line_starts) leaf.
+
+    Large contents become (path, BlobRef, trigram_filter) leaves unless `spill`
+    is False; the filter is None for a BlobRef given as is, until
+    `_blob_trigrams` rebuilds it.
+    """
+    if spill and isinstance(content, str) and len(content) > SPILL_THRESHOLD:
+        return (path, BlobRef(get_blob_store().put(content)), _trigram_filter(content))
+    if isinstance(content, BlobRef):
+        return (path, content, None)
+    return (path, content, _line_starts(content))
+
+
+@lru_cache(maxsize=BLOB_CACHE_SIZE)
+def _load_blob(digest: str) -> tuple[str, array]:
+    content = get_blob_store().get(digest)
+    return content, _line_starts(content)
+
+
+@lru_cache(maxsize=TRIGRAM_CACHE_SIZE)
+def _blob_trigrams(digest: str) -> np.ndarray:
+    # Read past the content LRU, which a scan of many blobs would flush
+    return _trigram_filter(get_blob_store().get(digest))
+
+
+def _contents(leaf: tuple) -> tuple[str, array]:
+    """(content, line_starts) of a leaf, loading spilled files from the blob store."""
+    _, content, starts = leaf
+    if isinstance(content, BlobRef):
+        return _load_blob(content.digest)
+    return content, starts
+
+
+def _mentions(leaf: tuple, keywords: list[str]) -> bool:
+    """Whether a file may contain all the lowercase keywords (exact for files kept in state)."""
+    _, content, trigrams = leaf
+    if isinstance(content, BlobRef):
+        if trigrams is None:
+            trigrams = _blob_trigrams(content.digest)
+        return all(_may_contain(trigrams, keyword) for keyword in keywords)
+    text = content.lower()
+    return all(keyword in text for keyword in keywords)
+
+
+class _Node:
+    """Trie node: a bitmap of occupied slots and one entry per occupied slot.
+
+    Entries are (path, content, line_starts) leaves, sub-nodes or collision
+    buckets. Spilled files are (path, BlobRef, trigram_filter) leaves.
+    """
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: tuple):
+        self.bitmap = bitmap
+        self.entries = entries
+
+
+class _Collision:
+    """Leaves whose paths share the full hash."""
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, hash_: int, leaves: tuple):
+        self.hash = hash_
+        self.leaves = leaves
+
+
+_EMPTY_NODE = _Node(0, ())
+_MISSING = object()
+
+
+def _get(node, path: str, path_hash: int, shift: int):
+    """Leaf of `path`, or _MISSING."""
+    while True:
+        if isinstance(node, _Collision):
+            for leaf in node.leaves:
+                if leaf[0] == path:
+                    return leaf
+            return _MISSING
+        bit = 1 << ((path_hash >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return _MISSING
+        entry = node.entries[_index(node.bitmap, bit)]
+        if isinstance(entry, tuple):
+            return entry if entry[0] == path else _MISSING
+        node, shift = entry, shift + _BITS
+
+
+def _merge_leaves(leaf_a, hash_a: int, leaf_b, hash_b: int, shift: int):
+    """Smallest subtree holding two leaves with different paths."""
+    if shift >= _HASH_BITS:
+        return _Collision(hash_a, (leaf_a, leaf_b))
+    slot_a = (hash_a >> shift) & _MASK
+    slot_b = (hash_b >> shift) & _MASK
+    if slot_a == slot_b:
+        return _Node(1 << slot_a, (_merge_leaves(leaf_a, hash_a, leaf_b, hash_b, shift + _BITS),))
+    entries = (leaf_a, leaf_b) if slot_a < slot_b else (leaf_b, leaf_a)
+    return _Node((1 << slot_a) | (1 << slot_b), entries)
+
+
+def _set(node, path: str, path_hash: int, content: Union[str, BlobRef], shift: int, leaf=None):
+    """New subtree with `path` set; returns (subtree, whether the path was added).
+
+    `leaf` is an existing leaf of `path` to reuse instead of indexing `content` again.
+    """
+    if isinstance(node, _Collision):
+        leaves = tuple(other for other in node.leaves if other[0] != path)
+        return _Collision(node.hash, leaves + (leaf or _leaf(path, content),)), len(leaves) == len(node.leaves)
+
+    bit = 1 << ((path_hash >> shift) & _MASK)
+    index = _index(node.bitmap, bit)
+    if not node.bitmap & bit:
+        entries = node.entries[:index] + (leaf or _leaf(path, content),) + node.entries[index:]
+        return _Node(node.bitmap | bit, entries), True
+
+    entry = node.entries[index]
+    if not isinstance(entry, tuple):
+        child, added = _set(entry, path, path_hash, content, shift + _BITS, leaf)
+    elif entry[0] == path:
+        if entry[1] is content or (isinstance(content, BlobRef) and entry[1] == content):
+            return node, False
+        child, added = leaf or _leaf(path, content), False
+    else:
+        child = _merge_leaves(entry, _hash(entry[0]), leaf or _leaf(path, content), path_hash, shift + _BITS)
+        added = True
+    return _Node(node.bitmap, node.entries[:index] + (child,) + node.entries[index + 1:]), added
+
+
+def _delete(node, path: str, path_hash: int, shift: int):
+    """Subtree without `path`: a node, a single leaf to inline in the parent, or None."""
+    if isinstance(node, _Collision):
+        leaves = tuple(leaf for leaf in node.leaves if leaf[0] != path)
+        if len(leaves) == len(node.leaves):
+            return node
+        return leaves[0] if len(leaves) == 1 else _Collision(node.hash, leaves)
+
+    bit = 1 << ((path_hash >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node
+    index = _index(node.bitmap, bit)
+    entry = node.entries[index]
+    if isinstance(entry, tuple):
+        if entry[0] != path:
+            return node
+        child = None
+    else:
+        child = _delete(entry, path, path_hash, shift + _BITS)
+        if child is entry:
+            return node
+
+    if child is None:
+        entries = node.entries[:index] + node.entries[index + 1:]
+        bitmap = node.bitmap & ~bit
+    else:
+        entries = node.entries[:index] + (child,) + node.entries[index + 1:]
+        bitmap = node.bitmap
+    # Inline a lone leaf in the parent (the root always stays a node)
+    if shift and len(entries) == 1 and isinstance(entries[0], tuple):
+        return entries[0]
+    if shift and not entries:
+        return None
+    return _Node(bitmap, entries)
+
+
+def _iter_leaves(node) -> Iterator[tuple]:
+    if isinstance(node, _Collision):
+        yield from node.leaves
+        return
+    for entry in node.entries:
+        if isinstance(entry, tuple):
+            yield entry
+        else:
+            yield from _iter_leaves(entry)
+
+
+def _diff(old, new, delta: dict) -> None:
+    """Add to `delta` the changes from subtree `old` to subtree `new` (None if absent).
+
+    Subtrees shared by both versions are skipped without being visited.
+    """
+    if old is new:
+        return
+    if isinstance(old, _Node) and isinstance(new, _Node):
+        bits = old.bitmap | new.bitmap
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            _diff(
+                old.entries[_index(old.bitmap, bit)] if old.bitmap & bit else None,
+                new.entries[_index(new.bitmap, bit)] if new.bitmap & bit else None,
+                delta,
+            )
+        return
+
+    def leaves(subtree):
+        if subtree is None:
+            return {}
+        if isinstance(subtree, tuple):
+            return {subtree[0]: subtree[1]}
+        return {leaf[0]: leaf[1] for leaf in _iter_leaves(subtree)}
+
+    old_contents, new_contents = leaves(old), leaves(new)
+    for path, content in new_contents.items():
+        old_content = old_contents.get(path)
+        if old_content is not content and old_content != content:
+            delta[path] = content
+    for path in old_contents.keys() - new_contents.keys():
+        delta[path] = None
+
+
+class FileMap(Mapping):
+    """
+    Immutable, structurally shared mapping of file path -> content.
+
+    Example:
+        >>> files = FileMap({"notes.md": "draft"})
+        >>> newer = files.update({"notes.md": "final", "old.md": None})
+        >>> files["notes.md"], newer["notes.md"]
+        ('draft', 'final')
+    """
+    __slots__ = ("_root", "_size")
+
+    def __init__(
+        self,
+        files: Optional[Mapping[str, str]] = None,
+        blobs: Optional[Mapping[str, str]] = None,
+        spill: bool = True,
+    ):
+        """
+        Args:
+            files: Path -> content
+            blobs: Path -> digest of files already in the blob store
+            spill: Move large files to the blob store; False keeps them
+                inline, for a short-lived read-only view
+        """
+        root, size = _EMPTY_NODE, 0
+        contents = [(path, BlobRef(digest)) for path, digest in (blobs or {}).items()]
+        for path, content in [*(files or {}).items(), *contents]:
+            root, added = _set(root, path, _hash(path), content, 0, _leaf(path, content, spill))
+            size += added
+        self._root = root
+        self._size = size
+
+    @classmethod
+    def _from_root(cls, root, size: int) -> "FileMap":
+        new = cls.__new__(cls)
+        new._root = root
+        new._size = size
+        return new
+
+    def _leaf(self, path: str) -> tuple:
+        leaf = _get(self._root, path, _hash(path), 0)
+        if leaf is _MISSING:
+            raise KeyError(path)
+        return leaf
+
+    def __getitem__(self, path: str) -> str:
+        return _contents(self._leaf(path))[0]
+
+    def __contains__(self, path) -> bool:
+        return isinstance(path, str) and _get(self._root, path, _hash(path), 0) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        return (leaf[0] for leaf in _iter_leaves(self._root))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def items(self):
+        # Faster than the Mapping default, which looks every key up again
+        return [(leaf[0], _contents(leaf)[0]) for leaf in _iter_leaves(self._root)]
+
+    def _stored_items(self) -> list[tuple[str, Union[str, BlobRef]]]:
+        """(path, content or BlobRef) pairs, without loading spilled files."""
+        return [(path, content) for path, content, _ in _iter_leaves(self._root)]
+
+    def blob_digests(self) -> set[str]:
+        """Digests of the spilled files, the blobs this map needs (see `BlobStore.collect_garbage`)."""
+        return {content.digest for _, content, _ in _iter_leaves(self._root) if isinstance(content, BlobRef)}
+
+    def is_spilled(self, path: str) -> bool:
+        """Whether the content of `path` lives in the blob store."""
+        return isinstance(self._leaf(path)[1], BlobRef)
+
+    def line_count(self, path: str) -> int:
+        """Number of lines of a file, as `str.splitlines` counts them."""
+        return len(_contents(self._leaf(path))[1]) - 1
+
+    def read_lines(self, path: str, start: int, stop: int) -> list[str]:
+        """Lines start..stop-1 of a file (without line breaks), sliced via the line index."""
+        content, starts = _contents(self._leaf(path))
+        last = len(starts) - 1
+        start, stop = min(max(start, 0), last), min(max(stop, 0), last)
+        if start >= stop:
+            return []
+        return content[starts[start]:starts[stop]].splitlines()
+
+    def find(
+        self,
+        pattern: re.Pattern,
+        paths: Optional[Iterable[str]] = None,
+        lowercase: bool = False,
+    ) -> Iterator[tuple[str, int, str]]:
+        """(path, line number, line) of every line matching `pattern`, in path order.
+
+        Each file is scanned by a single `finditer` over its whole content;
+        the line index turns match offsets into line numbers. Compile the
+        pattern with re.MULTILINE for `^` and `$` to match at "\\n" line ends.
+
+        With `lowercase`, a lowercase pattern is matched against the
+        lowercased content, which is much faster than re.IGNORECASE.
+        """
+        for path in sorted(self if paths is None else paths):
+            content, starts = _contents(self._leaf(path))
+            text, regex = content, pattern
+            if lowercase:
+                text = content.lower()
+                if len(text) != len(content):  # offsets would not match the line index
+                    text, regex = content, re.compile(pattern.pattern, pattern.flags | re.IGNORECASE)
+            n_lines, last_line = len(starts) - 1, -1
+            for match in regex.finditer(text):
+                line = bisect_right(starts, match.start()) - 1
+                if line != last_line and line < n_lines:
+                    last_line = line
+                    lines = content[starts[line]:starts[line + 1]].splitlines()
+                    yield path, line, lines[0] if lines else ""
+
+    def mentioning(self, keywords: Iterable[str], paths: Optional[Iterable[str]] = None) -> list[str]:
+        """Sorted paths of the files that may contain every lowercase keyword.
+
+        Files kept in state are checked exactly. Spilled files are checked
+        against their trigram filter without being loaded, so a few of them may
+        not actually match (and keywords shorter than 3 characters do not
+        filter them): confirm with `find`.
+        """
+        keywords = list(keywords)
+        leaves = _iter_leaves(self._root) if paths is None else map(self._leaf, paths)
+        return sorted(leaf[0] for leaf in leaves if _mentions(leaf, keywords))
+
+    def select(self, patterns: Iterable[str]) -> "FileMap":
+        """Map of the files whose path equals or matches (glob) one of `patterns`."""
+        patterns = list(patterns)
+        root, size = _EMPTY_NODE, 0
+        for leaf in _iter_leaves(self._root):
+            if any(leaf[0] == pattern or fnmatchcase(leaf[0], pattern) for pattern in patterns):
+                root, added = _set(root, leaf[0], _hash(leaf[0]), leaf[1], 0, leaf)
+                size += added
+        return FileMap._from_root(root, size)
+
+    def diff(self, base: "FileMap") -> dict[str, Optional[Union[str, BlobRef]]]:
+        """
+        Delta from `base` to this map, such that `base.update(delta) == self`.
+
+        Changed and new paths map to their content (spilled files to their
+        BlobRef), removed paths to None. Only the subtrees that differ
+        between the two versions are visited, so diffing a map against the
+        version it was derived from costs in proportion to the changes.
+        """
+        delta = {}
+        _diff(base._root, self._root, delta)
+        return delta
+
+    def set(self, path: str, content: Union[str, BlobRef]) -> "FileMap":
+        """New map with `path` set to `content`."""
+        root, added = _set(self._root, path, _hash(path), content, 0)
+        return self if root is self._root else FileMap._from_root(root, self._size + added)
+
+    def delete(self, path: str) -> "FileMap":
+        """New map without `path` (unchanged if it does not exist)."""
+        path_hash = _hash(path)
+        if _get(self._root, path, path_hash, 0) is _MISSING:
+            return self
+        return FileMap._from_root(_delete(self._root, path, path_hash, 0), self._size - 1)
+
+    def update(self, changes: Union[Mapping[str, Optional[str]], None]) -> "FileMap":
+        """New map with a delta applied: path -> new content, or None to delete it."""
+        if not self._size and isinstance(changes, FileMap):
+            return changes
+        if isinstance(changes, FileMap):
+            # Leaves of a FileMap delta are reused as they are: spilled files are
+            # passed on by digest, with their filter, and nothing is indexed again
+            root, size = self._root, self._size
+            for leaf in _iter_leaves(changes._root):
+                root, added = _set(root, leaf[0], _hash(leaf[0]), leaf[1], 0, leaf)
+                size += added
+            return FileMap._from_root(root, size)
+        files = self
+        for path, content in (changes or {}).items():
+            files = files.delete(path) if content is None else files.set(path, content)
+        return files
+
+    def __repr__(self) -> str:
+        return f"FileMap({dict(self._stored_items())!r})"
+
+    # Serialization: checkpointers rebuild the map from its constructor
+    # arguments; spilled files are saved as their digest only
+    def _asdict(self) -> dict:
+        files, blobs = {}, {}
+        for path, content in self._stored_items():
+            if isinstance(content, BlobRef):
+                blobs[path] = content.digest
+            else:
+                files[path] = content
+        return {"files": files, "blobs": blobs}
+
+    def __reduce__(self):
+        return (FileMap, tuple(self._asdict().values()))
+
+
+def as_file_map(files: Optional[Mapping[str, str]], spill: bool = True) -> FileMap:
+    """`files` as a FileMap (state may still hold a plain dict, e.g. in tests).
+
+    Read-only callers pass `spill=False` so that searching a plain dict does
+    not write its large files to the blob store.
+    """
+    return files if isinstance(files, FileMap) else FileMap(files, spill=spill)
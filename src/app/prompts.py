@@ -70,19 +70,45 @@ Parameters:
 
 Important: This replaces the entire file content."""
 
+GREP_DESCRIPTION = """Search the files of the virtual filesystem with a regular expression.
+
+Returns every matching line as `path:line_number: line`, so you can jump to the right place with read_file(offset=...) instead of reading files page by page.
+
+Parameters:
+- pattern (required): Regular expression (Python syntax) to search for
+- path_glob (optional): Only search files whose path matches this glob, e.g. "*.md"
+- ignore_case (optional, default=False): Case-insensitive matching
+- max_results (optional, default=50): Maximum number of matching lines to return"""
+
+SEARCH_FILES_DESCRIPTION = """Find the files of the virtual filesystem that mention all the given keywords.
+
+Returns the best matching files first, with the number of matching lines and a few numbered snippets from each. Matching ignores case and also finds keywords inside longer words.
+
+Parameters:
+- query (required): Space-separated keywords, e.g. "euribor 2025 forecast"
+- max_files (optional, default=10): Maximum number of files to return"""
+
 FILE_USAGE_INSTRUCTIONS = """You have access to a virtual file system to help you retain and save context.
 
 ## Workflow Process
 1. **Orient**: Use ls() to see existing files before starting work
 2. **Save**: Use write_file() to store the user's request so that we can keep it for later 
 3. **Research**: Proceed with research. The search tool will write files.  
-4. **Read**: Once you are satisfied with the collected sources, read the files and use them to answer the user's question directly.
+4. **Read**: Once you are satisfied with the collected sources, read the files and use them to answer the user's question directly. Use search_files() or grep() to locate the relevant lines first, then read_file() around them.
 
 IMPORTANT: You must always use the file system and follow this workdflow process.
 """
 
 TASK_DESCRIPTION_PREFIX = """Delegate a task to a specialized sub-agent with isolated context. Available agents for delegation are:
 {other_agents}
+
+The sub-agent sees all the files unless `files` lists the ones it needs (paths or glob patterns such as "findings_*.md"); only the files it creates or changes are merged back.
+"""
+
+TASK_BATCH_DESCRIPTION_PREFIX = """Delegate several independent tasks at once; they run in parallel, each with a specialized sub-agent in its own isolated context. Available agents for delegation are:
+{other_agents}
+
+Each task has a `subagent_type`, a `description` and optionally `files` (paths or glob patterns of the files that sub-agent may see; all files by default). Returns the answer of every task, in order. Files changed by the tasks are merged in task order: if two tasks write the same file, the later task wins.
 """
 
 SUBAGENT_USAGE_INSTRUCTIONS = """You can delegate tasks to sub-agents.
@@ -92,11 +118,15 @@ Your role is to coordinate research by delegating specific research tasks to sub
 </Task>
 
 <Available Tools>
-1. **task(description, subagent_type)**: Delegate research tasks to specialized sub-agents
+1. **task(description, subagent_type, files)**: Delegate research tasks to specialized sub-agents
    - description: Clear, specific research question or task
    - subagent_type: Type of agent to use (e.g., "research-agent")
+   - files (optional): Paths or glob patterns of the existing files the sub-agent needs; when given, it sees no other file (default: all files)
+
+2. **task_batch(tasks)**: Delegate several independent tasks at once, each a {{subagent_type, description, files}} object
+   - Use it for the independent items of your TODO plan instead of dispatching them one turn at a time
 
-**PARALLEL RESEARCH**: When you identify multiple independent research directions, make multiple **task** tool calls in a single response to enable parallel execution. Use at most {max_concurrent_research_units} parallel agents per iteration.
+**PARALLEL RESEARCH**: When you identify multiple independent research directions, use **task_batch** (or make multiple **task** tool calls in a single response) to enable parallel execution. Use at most {max_concurrent_research_units} parallel agents per iteration.
 </Available Tools>
 
 <Hard Limits>
@@ -160,6 +190,7 @@ You can use any of the tools provided to you to find resources that can help ans
 <Available Tools>
 You have access to two main tools:
 1. **tavily_search**: For conducting web searches to gather information
+2. **tavily_search_many**: For running several independent searches at once (e.g. one per sub-topic) in a single tool call
 </Available Tools>
 
 <Instructions>
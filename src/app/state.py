@@ -1,8 +1,10 @@
-from typing import Annotated, Literal, Optional, NotRequired
+from typing import Annotated, Literal, Mapping, Optional, NotRequired
 from typing_extensions import TypedDict
 
 from langgraph.prebuilt.chat_agent_executor import AgentState
 
+from file_store import FileMap
+
 class Todo(TypedDict):
     """A structured task item for tracking progress through complex workflows.
 
@@ -16,35 +18,34 @@ class Todo(TypedDict):
 
 
 def file_reducer(left, right):
-    """Merge two file dictionaries, with right side taking precedence.
+    """Apply a file delta to the virtual file system.
 
-    Used as a reducer function for the files field in agent state,
-    allowing incremental updates to the virtual file system.
+    Used as a reducer function for the files field in agent state. Tools
+    return only the paths they changed; a None content deletes the path.
+    The files are kept in a persistent FileMap, so the cost of an update
+    depends on the size of the delta, not on the size of the file system.
 
     Args:
-        left: Left side dictionary (existing files)
-        right: Right side dictionary (new/updated files)
+        left: Existing files (FileMap, or a plain dict on first use)
+        right: Delta mapping changed paths to their new content or None
 
     Returns:
-        Merged dictionary with right values overriding left values
+        FileMap with the delta applied
     """
-    if left is None:
-        return right
-    elif right is None:
-        return left
-    else:
-        return {**left, **right}
+    if not isinstance(left, FileMap):
+        left = FileMap({path: content for path, content in (left or {}).items() if content is not None})
+    return left.update(right)
 
 class DeepAgentState(AgentState):
     """Extended agent state that includes task tracking and virtual file system.
 
     Inherits from LangGraph's AgentState and adds:
     - todos: List of Todo items for task planning and progress tracking
-    - files: Virtual file system stored as dict mapping filenames to content
+    - files: Virtual file system stored as a FileMap mapping filenames to content
     """
 
     todos: NotRequired[list[Todo]]
-    files: Annotated[NotRequired[dict[str, str]], file_reducer]
+    files: Annotated[NotRequired[Mapping[str, str]], file_reducer]
     # Research control fields
     research_search_budget: NotRequired[int]
     research_done: NotRequired[bool]
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Live streaming of agent runs, sub-agents included.
+
+`AgentStream` runs an agent with LangGraph's "messages" stream mode and
+`subgraphs=True`. Sub-agents wrapped with `tools.task_tool.subagent_tool`
+receive the caller's config, so their tokens and tool calls reach the
+caller while they are produced instead of after the whole nested run.
+Events are labelled with the agent that produced them (from the
+"agent_path" metadata set by `subagent_tool`), and the time to the first
+token is measured.
+
+Example:
+    >>> stream = AgentStream(supervisor_agent, {"messages": [("user", query)]})
+    >>> printer = StreamPrinter()
+    >>> for event in stream:
+    ...     printer(event)
+    >>> stream.time_to_first_token
+    1.8
+"""
+
+import sys
+import time
+from typing import Any, AsyncIterator, Iterator, Literal, NamedTuple, Optional, TextIO
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+
+class StreamEvent(NamedTuple):
+    """Token or tool event of a (sub-)agent run."""
+    agent: str                                          # agent that produced the event
+    depth: int                                          # 0 for the top-level agent, 1 for its sub-agents...
+    kind: Literal["token", "tool_call", "tool_result"]
+    content: str                                        # token text, tool name or tool output
+    namespace: tuple[str, ...]                          # LangGraph namespace of the event
+
+
+class AgentStream:
+    """
+    Iterable (sync or async) of the StreamEvents of one agent run.
+
+    Args:
+        agent: Compiled agent graph
+        inputs: Input state of the run
+        config: RunnableConfig passed to the run
+        name (str): Label of the top-level agent's events
+    """
+
+    def __init__(
+        self,
+        agent: Runnable,
+        inputs: dict,
+        config: Optional[RunnableConfig] = None,
+        name: str = "supervisor",
+    ):
+        self.agent = agent
+        self.inputs = inputs
+        self.config = config
+        self.name = name
+        self.started_at: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds from the start of the run to its first token, from any agent."""
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    def _stream_kwargs(self) -> dict:
+        return {"stream_mode": "messages", "subgraphs": True}
+
+    def _events(self, namespace: tuple[str, ...], chunk: tuple[Any, dict]) -> list[StreamEvent]:
+        message, metadata = chunk
+        path = tuple(metadata.get("agent_path", ()))
+        agent, depth = (path[-1] if path else self.name), len(path)
+
+        events = []
+        if isinstance(message, ToolMessage):
+            events.append(StreamEvent(agent, depth, "tool_result", message.text(), namespace))
+        elif isinstance(message, AIMessage):
+            text = message.text()
+            if text:
+                if self.first_token_at is None:
+                    self.first_token_at = time.perf_counter()
+                events.append(StreamEvent(agent, depth, "token", text, namespace))
+            # Chunks carry the tool name in their first tool call chunk
+            calls = getattr(message, "tool_call_chunks", None) or message.tool_calls
+            for call in calls:
+                if call.get("name"):
+                    events.append(StreamEvent(agent, depth, "tool_call", call["name"], namespace))
+        return events
+
+    def __iter__(self) -> Iterator[StreamEvent]:
+        self.started_at = time.perf_counter()
+        for namespace, chunk in self.agent.stream(self.inputs, self.config, **self._stream_kwargs()):
+            yield from self._events(namespace, chunk)
+
+    async def __aiter__(self) -> AsyncIterator[StreamEvent]:
+        self.started_at = time.perf_counter()
+        async for namespace, chunk in self.agent.astream(self.inputs, self.config, **self._stream_kwargs()):
+            for event in self._events(namespace, chunk):
+                yield event
+
+
+class StreamPrinter:
+    """
+    Print StreamEvents as they arrive.
+
+    Tokens are written inline under a header naming their agent; tool calls
+    and results go on their own lines. Sub-agent output is indented.
+    """
+
+    def __init__(self, out: Optional[TextIO] = None, max_result_chars: int = 300):
+        self.out = out or sys.stdout
+        self.max_result_chars = max_result_chars
+        self._speaker = None
+
+    def __call__(self, event: StreamEvent) -> None:
+        indent = "\t" * event.depth
+        if event.kind == "token":
+            if self._speaker != event.namespace:
+                self.out.write(f"\n{indent}[{event.agent}] ")
+                self._speaker = event.namespace
+            self.out.write(event.content)
+        else:
+            self._speaker = None
+            if event.kind == "tool_call":
+                self.out.write(f"\n{indent}[{event.agent}] -> {event.content}")
+            else:
+                result = event.content[:self.max_result_chars].replace("\n", " ")
+                self.out.write(f"\n{indent}[{event.agent}] <- {result}")
+        self.out.flush()
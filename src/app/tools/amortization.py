@@ -0,0 +1,213 @@
+"""
+Mortgage amortization schedules as NumPy arrays.
+
+Builds the monthly French-amortization schedule (constant payment, interest
+on the outstanding balance) for one loan or a whole batch of loans at once.
+Within each rate period the balance follows the closed-form annuity
+recursion, so the only Python loop is over rate reviews (one iteration for a
+fixed-rate loan, one per Euribor review date for a variable one).
+"""
+
+from typing import Optional
+
+import numpy as np
+import numpy_financial as npf
+
+# Schedule arrays indexed by month along the last axis
+SCHEDULE_KEYS = ("payment", "interest", "principal", "balance")
+
+
+def amortization_schedule(
+    principal,
+    annual_rate,
+    term_years,
+    rate_resets=None,
+    review_months: int = 12,
+    horizon_months: Optional[int] = None,
+) -> dict:
+    """
+    Monthly amortization schedule for one or many loans.
+
+    Args:
+        principal (float or array): Amount borrowed
+        annual_rate (float or array): Annual interest rate as a decimal (eg: 0.025).
+            Ignored when `rate_resets` is given.
+        term_years (int or array): Loan term in years
+        rate_resets (array, optional): Annual rates (decimal) in force from each
+            review date, shape (..., n_reviews). Review j starts at month
+            j * review_months; the last rate stays in force until maturity.
+            At every review the payment is recomputed over the remaining term,
+            as Spanish variable mortgages do on their Euribor review date.
+        review_months (int): Months between rate reviews (default: 12)
+        horizon_months (int, optional): Only build the first N months of the
+            schedule (default: the longest term)
+
+    Returns:
+        dict: NumPy arrays of shape (..., n_months) with the monthly
+        "payment", "interest", "principal" and "balance" (outstanding
+        balance after the payment). Months after maturity are zero.
+
+    Example:
+        >>> schedule = amortization_schedule(120000, 0.025, 25)
+        >>> yearly_totals(schedule)["interest"][0]  # first-year interest
+    """
+    if rate_resets is None:
+        # A fixed rate is a single review period covering the whole loan
+        rates = np.asarray(annual_rate, dtype=float)[..., None]
+    else:
+        rates = np.asarray(rate_resets, dtype=float)
+    if review_months <= 0:
+        raise ValueError("'review_months' must be positive.")
+
+    term_months = np.asarray(term_years, dtype=int) * 12
+    shape = np.broadcast_shapes(np.shape(principal), np.shape(term_months), rates.shape[:-1])
+    balance = np.broadcast_to(np.asarray(principal, dtype=float), shape)
+    term_months = np.broadcast_to(term_months, shape)
+    rates = np.broadcast_to(rates, shape + rates.shape[-1:])
+
+    n_months = int(term_months.max(initial=0))
+    if horizon_months is not None:
+        n_months = min(n_months, horizon_months)
+    if rate_resets is None:
+        review_months = max(n_months, 1)
+
+    schedule = {key: np.zeros(shape + (n_months,)) for key in SCHEDULE_KEYS}
+
+    for start in range(0, n_months, review_months):
+        stop = min(start + review_months, n_months)
+        period = min(start // review_months, rates.shape[-1] - 1)
+        monthly_rate = rates[..., period] / 12
+
+        # Payment that amortizes the outstanding balance over the remaining term
+        remaining = term_months - start
+        active = remaining > 0
+        payment = np.where(
+            active,
+            np.abs(npf.pmt(monthly_rate, np.maximum(remaining, 1), balance)),
+            0.0,
+        )
+
+        # Closed-form balance after k payments within the period:
+        # B_k = B_0 * (1 + i) ** k - P * ((1 + i) ** k - 1) / i
+        k = np.arange(0, stop - start + 1)
+        rate_column = monthly_rate[..., None]
+        growth = np.power(1 + rate_column, k)
+        zero_rate = rate_column == 0
+        if zero_rate.any():
+            safe_rate = np.where(zero_rate, 1.0, rate_column)
+            annuity = np.where(zero_rate, k, (growth - 1) / safe_rate)
+        else:
+            annuity = (growth - 1) / rate_column
+        balances = balance[..., None] * growth - payment[..., None] * annuity
+        balance_before, balance_after = balances[..., :-1], balances[..., 1:]
+
+        interest = balance_before * rate_column
+        block = {
+            "payment": np.broadcast_to(payment[..., None], interest.shape),
+            "interest": interest,
+            "principal": payment[..., None] - interest,
+            "balance": balance_after,
+        }
+        # Zero out the months after maturity of shorter loans
+        in_term = (start + k[1:]) <= term_months[..., None]
+        all_in_term = in_term.all()
+        for key in SCHEDULE_KEYS:
+            value = block[key] if all_in_term else np.where(in_term, block[key], 0.0)
+            schedule[key][..., start:stop] = value
+
+        balance = np.where(active, balance_after[..., -1], 0.0)
+
+    return schedule
+
+
+def first_years(schedule: dict, years: int) -> dict:
+    """Slice the first N years of a monthly schedule (views, no copies)."""
+    return {key: value[..., : years * 12] for key, value in schedule.items()}
+
+
+def yearly_totals(schedule: dict) -> dict:
+    """
+    Aggregate a monthly schedule by loan year.
+
+    Returns:
+        dict: Arrays of shape (..., n_years) with the yearly "payment",
+        "interest" and "principal" totals and the "balance" at year end.
+    """
+    n_months = schedule["balance"].shape[-1]
+    n_years = -(-n_months // 12)
+    pad = n_years * 12 - n_months
+
+    yearly = {}
+    for key in ("payment", "interest", "principal"):
+        value = schedule[key]
+        if pad:
+            value = np.concatenate([value, np.zeros(value.shape[:-1] + (pad,))], axis=-1)
+        yearly[key] = value.reshape(value.shape[:-1] + (n_years, 12)).sum(axis=-1)
+
+    month_end = np.minimum(np.arange(1, n_years + 1) * 12, n_months) - 1
+    yearly["balance"] = schedule["balance"][..., month_end]
+    return yearly
+
+
+def amortization_by_period(
+    principal,
+    term_years,
+    rate_resets,
+    review_months: int = 12,
+) -> dict:
+    """
+    Amortization totals per rate review period, without the monthly detail.
+
+    Equivalent to aggregating `amortization_schedule(..., rate_resets=...)`
+    over each review period, but only evaluates the balance at review dates.
+    This is what large simulations need: O(n_reviews) work per loan instead
+    of O(n_months).
+
+    Args:
+        principal (float or array): Amount borrowed
+        term_years (int or array): Loan term in years
+        rate_resets (array): Annual rates (decimal) in force from each review
+            date, shape (..., n_reviews)
+        review_months (int): Months between rate reviews (default: 12)
+
+    Returns:
+        dict: Arrays of shape (..., n_periods) with the monthly "payment" in
+        force during each period, the total "interest" and "principal" paid
+        in the period and the "balance" at its end.
+    """
+    if review_months <= 0:
+        raise ValueError("'review_months' must be positive.")
+    rates = np.asarray(rate_resets, dtype=float)
+    term_months = np.asarray(term_years, dtype=int) * 12
+    shape = np.broadcast_shapes(np.shape(principal), np.shape(term_months), rates.shape[:-1])
+    balance = np.broadcast_to(np.asarray(principal, dtype=float), shape)
+    term_months = np.broadcast_to(term_months, shape)
+    rates = np.broadcast_to(rates, shape + rates.shape[-1:])
+
+    n_periods = -(-int(term_months.max(initial=0)) // review_months)
+    totals = {key: np.zeros(shape + (n_periods,)) for key in SCHEDULE_KEYS}
+
+    for p in range(n_periods):
+        start = p * review_months
+        monthly_rate = rates[..., min(p, rates.shape[-1] - 1)] / 12
+        remaining = term_months - start
+        months = np.clip(remaining, 0, review_months)
+        payment = np.where(
+            remaining > 0,
+            np.abs(npf.pmt(monthly_rate, np.maximum(remaining, 1), balance)),
+            0.0,
+        )
+
+        growth = np.power(1 + monthly_rate, months)
+        zero_rate = monthly_rate == 0
+        safe_rate = np.where(zero_rate, 1.0, monthly_rate)
+        annuity = np.where(zero_rate, months, (growth - 1) / safe_rate)
+        balance_end = balance * growth - payment * annuity
+
+        totals["payment"][..., p] = payment
+        totals["principal"][..., p] = balance - balance_end
+        totals["interest"][..., p] = payment * months - (balance - balance_end)
+        totals["balance"][..., p] = balance_end
+        balance = balance_end
+
+    return totals
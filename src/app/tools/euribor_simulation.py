@@ -0,0 +1,241 @@
+"""
+Monte Carlo simulation of Euribor paths for variable-rate mortgages.
+
+Euribor is modelled as a mean-reverting Ornstein-Uhlenbeck (Vasicek) process
+sampled with its exact transition, so paths can be generated at any step
+(monthly, or directly at the mortgage review dates) without discretization
+error. The variable mortgage payment and the cash flow of
+`real_estate_profitability_calculator` are then revalued along every path
+with vectorized NumPy operations.
+"""
+
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from .amortization import amortization_by_period
+from .real_estate_tools import RealEstateProfitabilityInput, _columns_from_inputs
+
+# Default Vasicek parameters for 12-month Euribor (annual units, rates in %)
+DEFAULT_MEAN_REVERSION = 0.3
+DEFAULT_LONG_TERM_RATE = 2.5
+DEFAULT_VOLATILITY = 0.8
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def simulate_euribor_paths(
+    initial_rate: float,
+    n_paths: int,
+    n_steps: int,
+    step_months: int = 1,
+    mean_reversion: float = DEFAULT_MEAN_REVERSION,
+    long_term_rate: float = DEFAULT_LONG_TERM_RATE,
+    volatility: float = DEFAULT_VOLATILITY,
+    seed: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    Simulate Euribor paths with a mean-reverting (Vasicek) process.
+
+    Args:
+        initial_rate (float): Current Euribor rate (percentage)
+        n_paths (int): Number of paths
+        n_steps (int): Number of rates per path, the first one being the current rate
+        step_months (int): Months between consecutive rates (default: 1)
+        mean_reversion (float): Speed of mean reversion (per year)
+        long_term_rate (float): Long-term mean of Euribor (percentage)
+        volatility (float): Annual volatility of Euribor (percentage points)
+        seed (int, optional): Seed for a new NumPy generator
+        rng (Generator, optional): Generator to draw from (takes precedence over seed)
+
+    Returns:
+        np.ndarray: Euribor rates (percentage) of shape (n_paths, n_steps)
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
+    dt = step_months / 12
+    if mean_reversion > 0:
+        decay = np.exp(-mean_reversion * dt)
+        step_std = volatility * np.sqrt((1 - decay ** 2) / (2 * mean_reversion))
+    else:
+        decay = 1.0
+        step_std = volatility * np.sqrt(dt)
+
+    paths = np.empty((n_paths, n_steps))
+    if n_steps == 0:
+        return paths
+    paths[:, 0] = initial_rate
+    shocks = rng.standard_normal((n_paths, n_steps - 1))
+    for step in range(1, n_steps):
+        paths[:, step] = (
+            long_term_rate
+            + (paths[:, step - 1] - long_term_rate) * decay
+            + step_std * shocks[:, step - 1]
+        )
+    return paths
+
+
+def iter_euribor_paths(
+    initial_rate: float,
+    n_paths: int,
+    n_steps: int,
+    chunk_size: int,
+    seed: Optional[int] = None,
+    **process_kwargs,
+) -> Iterator[np.ndarray]:
+    """
+    Generate Euribor paths in chunks of at most `chunk_size` paths.
+
+    All chunks share one generator, so concatenating them gives exactly the
+    paths of a single `simulate_euribor_paths` call with the same seed, while
+    only one chunk is held in memory at a time.
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_paths, chunk_size):
+        yield simulate_euribor_paths(
+            initial_rate,
+            min(chunk_size, n_paths - start),
+            n_steps,
+            rng=rng,
+            **process_kwargs,
+        )
+
+
+def simulate_variable_mortgage(
+    input_data: RealEstateProfitabilityInput,
+    n_paths: int = 10000,
+    review_months: int = 12,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    chunk_size: Optional[int] = None,
+    rate_floor: Optional[float] = 0.0,
+    seed: Optional[int] = None,
+    mean_reversion: float = DEFAULT_MEAN_REVERSION,
+    long_term_rate: float = DEFAULT_LONG_TERM_RATE,
+    volatility: float = DEFAULT_VOLATILITY,
+) -> dict:
+    """
+    Revalue a variable mortgage and its rental cash flow along simulated Euribor paths.
+
+    Each path sets the mortgage rate (Euribor + margin) at every review date,
+    the payment is recomputed over the remaining term and the yearly cash
+    flow and ROCE of the property are evaluated as in
+    `real_estate_profitability_calculator`, using that year's interest and
+    principal instead of the first-year figures.
+
+    Args:
+        input_data: Validated variable-rate property scenario; its
+            `euribor_rate` is the starting point of every path
+        n_paths (int): Number of simulated paths
+        review_months (int): Months between rate reviews; must divide 12
+        percentiles (list): Percentiles reported for every metric
+        chunk_size (int, optional): Simulate and value at most this many paths
+            at a time to bound memory (default: all paths at once)
+        rate_floor (float, optional): Floor on the mortgage rate (percentage);
+            Spanish mortgages cannot charge negative interest (default: 0)
+        seed (int, optional): Seed of the random generator
+        mean_reversion, long_term_rate, volatility: Vasicek parameters
+
+    Returns:
+        Dictionary with
+        - "year": (n_years,) loan years
+        - "percentiles": the requested percentiles
+        - "euribor_rate", "monthly_mortgage_payment",
+          "annual_cash_flow_conservative", "annual_cash_flow_optimistic",
+          "roce_conservative", "roce_optimistic": percentile bands of shape
+          (n_percentiles, n_years)
+        - "mean_annual_cash_flow_conservative": (n_years,) mean over paths
+    """
+    if input_data.mortgage_type != "variable":
+        raise ValueError("Monte Carlo valuation requires a 'variable' mortgage.")
+    if review_months <= 0 or 12 % review_months:
+        raise ValueError("'review_months' must divide 12.")
+
+    c = {key: value[0] for key, value in _columns_from_inputs([input_data]).items()}
+    term_years = int(input_data.loan_term_years)
+    reviews_per_year = 12 // review_months
+    n_reviews = term_years * reviews_per_year
+    chunk_size = chunk_size or n_paths
+
+    # Year-invariant parts of the profitability calculation
+    purchase_price = c["purchase_price"]
+    mortgage_loan_amount = purchase_price * c["loan_to_value_ratio"]
+    total_acquisition_cost = (
+        purchase_price
+        + purchase_price * c["itp_rate"]
+        + c["notary_cost"]
+        + c["registry_cost"]
+        + c["renovation_cost"]
+        + c["agency_commission"]
+        + c["mortgage_management_cost"]
+        + c["mortgage_appraisal_cost"]
+    )
+    total_upfront_cost = total_acquisition_cost - mortgage_loan_amount
+    annual_gross_rental_income = c["monthly_rental_income"] * 12
+    operating_expenses_before_interest = (
+        c["homeowners_association_fee"]
+        + c["maintenance_cost"]
+        + c["property_insurance"]
+        + c["mortgage_life_insurance"]
+        + c["rental_protection_insurance"]
+        + c["property_tax_ibi"]
+        + c["vacancy_allowance"]
+    )
+    annual_depreciation_expense = 0.025 * purchase_price
+    optimistic_addback = c["vacancy_allowance"] + c["maintenance_cost"]
+
+    euribor, payment, cash_flow = [], [], []
+    for paths in iter_euribor_paths(
+        input_data.euribor_rate,
+        n_paths,
+        n_reviews,
+        chunk_size,
+        seed=seed,
+        step_months=review_months,
+        mean_reversion=mean_reversion,
+        long_term_rate=long_term_rate,
+        volatility=volatility,
+    ):
+        mortgage_rate = paths + input_data.mortgage_margin
+        if rate_floor is not None:
+            mortgage_rate = np.maximum(mortgage_rate, rate_floor)
+
+        periods = amortization_by_period(
+            mortgage_loan_amount, term_years, mortgage_rate / 100, review_months
+        )
+        shape = (paths.shape[0], term_years, reviews_per_year)
+        interest = periods["interest"].reshape(shape).sum(axis=-1)
+        principal = periods["principal"].reshape(shape).sum(axis=-1)
+
+        net_operating_income = annual_gross_rental_income - (
+            operating_expenses_before_interest + interest
+        )
+        income_tax_on_rental = (
+            np.maximum(0, net_operating_income - annual_depreciation_expense) * c["irpf_tax"]
+        )
+        net_income_after_taxes = net_operating_income - income_tax_on_rental
+
+        euribor.append(paths[:, ::reviews_per_year])
+        payment.append(periods["payment"][:, ::reviews_per_year])
+        cash_flow.append(net_income_after_taxes - principal)
+
+    euribor = np.concatenate(euribor)
+    payment = np.concatenate(payment)
+    cash_flow_conservative = np.concatenate(cash_flow)
+    cash_flow_optimistic = cash_flow_conservative + optimistic_addback
+
+    def bands(values):
+        return np.percentile(values, percentiles, axis=0)
+
+    return {
+        "year": np.arange(1, term_years + 1),
+        "percentiles": np.asarray(percentiles),
+        "euribor_rate": bands(euribor),
+        "monthly_mortgage_payment": bands(payment),
+        "annual_cash_flow_conservative": bands(cash_flow_conservative),
+        "annual_cash_flow_optimistic": bands(cash_flow_optimistic),
+        "roce_conservative": bands(cash_flow_conservative / total_upfront_cost),
+        "roce_optimistic": bands(cash_flow_optimistic / total_upfront_cost),
+        "mean_annual_cash_flow_conservative": cash_flow_conservative.mean(axis=0),
+    }
@@ -7,7 +7,11 @@ enabling context offloading and information persistence across agent interaction
 Some functions in this script are comming from https://github.com/langchain-ai/deep-agents-from-scratch/
 """
 
-from typing import Annotated
+import re
+from collections import Counter
+from fnmatch import fnmatch
+from itertools import islice
+from typing import Annotated, Optional
 
 from langchain_core.messages import ToolMessage
 from langchain_core.tools import InjectedToolCallId, tool
@@ -15,16 +19,20 @@ from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 
 from prompts import ( 
+    GREP_DESCRIPTION,
     LS_DESCRIPTION,
     READ_FILE_DESCRIPTION,
+    SEARCH_FILES_DESCRIPTION,
     WRITE_FILE_DESCRIPTION,
 )
+from blob_store import MissingBlobError
+from file_store import FileMap, as_file_map
 from state import DeepAgentState
 
 @tool(description=LS_DESCRIPTION)
 def ls(state: Annotated[DeepAgentState, InjectedState]) -> list[str]:
     """List all files in the virtual filesystem."""
-    return list(state.get("files", {}).keys())
+    return sorted(state.get("files", {}))
 
 @tool(description=READ_FILE_DESCRIPTION, parse_docstring=True)
 def read_file(
@@ -48,20 +56,33 @@ def read_file(
     if file_path not in files:
         return f"Error: File '{file_path}' not found"
 
-    content = files[file_path]
+    try:
+        content = files[file_path]
+    except MissingBlobError as exc:
+        return f"Error: Content of file '{file_path}' is no longer available ({exc})"
     if not content:
         return "System reminder: File exists but has empty contents"
 
-    lines = content.splitlines()
+    # The line index built at write time lets us slice only the requested page;
+    # a plain dict (e.g. in tests) is split directly rather than indexed
+    if isinstance(files, FileMap):
+        n_lines = files.line_count(file_path)
+    else:
+        lines = content.splitlines()
+        n_lines = len(lines)
     start_idx = offset
-    end_idx = min(start_idx + limit, len(lines))
+    end_idx = min(start_idx + limit, n_lines)
 
-    if start_idx >= len(lines):
-        return f"Error: Line offset {offset} exceeds file length ({len(lines)} lines)"
+    if start_idx >= n_lines:
+        return f"Error: Line offset {offset} exceeds file length ({n_lines} lines)"
 
+    if isinstance(files, FileMap):
+        page = files.read_lines(file_path, start_idx, end_idx)
+    else:
+        page = lines[start_idx:end_idx]
     result_lines = []
-    for i in range(start_idx, end_idx):
-        line_content = lines[i][:2000]  # Truncate long lines
+    for i, line in enumerate(page, start_idx):
+        line_content = line[:2000]  # Truncate long lines
         result_lines.append(f"{i + 1:6d}\t{line_content}")
 
     return "\n".join(result_lines) # Returns a string
@@ -85,13 +106,100 @@ def write_file(
     Returns:
         Command to update agent state with new file content
     """
-    files = state.get("files", {})
-    files[file_path] = content
+    # Only the changed path is returned; the files reducer merges it into the state
     return Command(
         update={
-            "files": files,
+            "files": {file_path: content},
             "messages": [
                 ToolMessage(f"Updated file {file_path}", tool_call_id=tool_call_id)
             ],
         }
     )
+
+
+@tool(description=GREP_DESCRIPTION, parse_docstring=True)
+def grep(
+    pattern: str,
+    state: Annotated[DeepAgentState, InjectedState],
+    path_glob: Optional[str] = None,
+    ignore_case: bool = False,
+    max_results: int = 50,
+) -> str:
+    """Search the virtual filesystem with a regular expression.
+
+    Args:
+        pattern: Regular expression to search for
+        state: Agent state containing virtual filesystem (injected in tool node)
+        path_glob: Only search files whose path matches this glob
+        ignore_case: Case-insensitive matching
+        max_results: Maximum number of matching lines to return
+
+    Returns:
+        Matching lines as `path:line_number: line`, or a message if nothing matches
+    """
+    try:
+        regex = re.compile(pattern, re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    except re.error as exc:
+        return f"Error: Invalid regular expression '{pattern}': {exc}"
+
+    files = as_file_map(state.get("files", {}), spill=False)
+    paths = [path for path in files if fnmatch(path, path_glob)] if path_glob else None
+    try:
+        matches = list(islice(files.find(regex, paths), max_results + 1))
+    except MissingBlobError as exc:
+        return f"Error: A file's content is no longer available ({exc})"
+    if not matches:
+        return f"No matches found for '{pattern}'"
+
+    result_lines = [f"{path}:{line + 1}: {text[:200]}" for path, line, text in matches[:max_results]]
+    if len(matches) > max_results:
+        result_lines.append(f"... more than {max_results} matches, refine the pattern or use path_glob")
+    return "\n".join(result_lines)
+
+
+@tool(description=SEARCH_FILES_DESCRIPTION, parse_docstring=True)
+def search_files(
+    query: str,
+    state: Annotated[DeepAgentState, InjectedState],
+    max_files: int = 10,
+) -> str:
+    """Find the files that mention all the keywords of a query.
+
+    Args:
+        query: Space-separated keywords
+        state: Agent state containing virtual filesystem (injected in tool node)
+        max_files: Maximum number of files to return
+
+    Returns:
+        Matching files, best first, with numbered snippets
+    """
+    keywords = query.split()
+    if not keywords:
+        return "Error: Empty query"
+
+    files = as_file_map(state.get("files", {}), spill=False)
+    lowered = [keyword.lower() for keyword in keywords]
+    regex = re.compile("|".join(map(re.escape, lowered)))
+    snippets, counts, found = {}, Counter(), {}
+    try:
+        # Spilled files that cannot match are skipped without being loaded
+        candidates = files.mentioning(lowered)
+        for path, line, text in files.find(regex, candidates, lowercase=True):
+            counts[path] += 1
+            if counts[path] <= 3:
+                snippets.setdefault(path, []).append(f"{line + 1:6d}\t{text[:200]}")
+            lowered_line = text.lower()
+            found.setdefault(path, set()).update(k for k in lowered if k in lowered_line)
+    except MissingBlobError as exc:
+        return f"Error: A file's content is no longer available ({exc})"
+    # Drop the candidates that only passed the filter (keywords never span lines)
+    for path in [path for path in counts if len(found[path]) < len(set(lowered))]:
+        del counts[path]
+    if not counts:
+        return f"No files mention all of: {query}"
+
+    ranked = sorted(counts, key=lambda path: (-counts[path], path))[:max_files]
+    return "\n\n".join(
+        f"{path} ({counts[path]} matching lines)\n" + "\n".join(snippets[path])
+        for path in ranked
+    )
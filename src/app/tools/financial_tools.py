@@ -2,8 +2,9 @@
 Quantitative finance tools for LLMs
 """
 
-from typing import Annotated, List, Literal, Union
+from typing import Annotated, List, Literal, Optional, Sequence, Union
 
+import numpy as np
 from langchain_core.messages import ToolMessage
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import InjectedState
@@ -13,6 +14,11 @@ from langgraph.prebuilt.chat_agent_executor import AgentState
 
 from pydantic import BaseModel, Field
 
+from .result_cache import canonical_key, tool_result_cache
+
+# Bump when a change of the engine changes its results, to invalidate cached ones
+COMPOUND_INTEREST_ENGINE_VERSION = "1"
+
 # Create a class for tool function inputs. This introduces types and values validation.
 class CompoundInterestInput(BaseModel):
     """Input for compound interest calculator."""
@@ -22,7 +28,186 @@ class CompoundInterestInput(BaseModel):
         description="Deposit frequency: 'weekly', 'monthly', or 'annually'")
     interest_rate: float = Field(..., description="Annual interest rate as a percentage (e.g., 7.5 for 7.5%)")
     years: int = Field(..., description="Number of years to calculate")
-    
+
+
+# Number of compounding/deposit periods per year for each deposit frequency
+PERIODS_PER_YEAR = {"weekly": 52, "monthly": 12, "annually": 1}
+
+
+def _compound_interest_engine(
+    initial_balance,
+    periodic_deposit,
+    interest_rate,
+    years: int,
+    periods_per_year) -> dict:
+    """
+    Closed-form compound interest engine.
+
+    Computes the end-of-year balances with the annuity formula instead of
+    stepping through every period:
+
+        balance_k = B0 * (1 + r) ** (n * k) + D * ((1 + r) ** (n * k) - 1) / r
+
+    where r = interest_rate / n and k is the year. Deposits grow linearly and
+    the accumulated interest is whatever the balance holds on top of the
+    initial balance and the deposits.
+
+    Every argument except `years` may be a scalar or a NumPy column of shape
+    (n_scenarios, 1); the yearly axis is broadcast along the last dimension.
+
+    Args:
+        initial_balance (float or array): Initial balance
+        periodic_deposit (float or array): Deposit made at the end of each period
+        interest_rate (float or array): Annual interest rate as a decimal (eg: 0.075)
+        years (int): Number of years
+        periods_per_year (int or array): Deposit/compounding periods per year
+
+    Returns:
+        dict: NumPy arrays "year", "total_deposit", "total_interest" and "balance"
+    """
+    year = np.arange(1, years + 1)
+    periods = periods_per_year * year
+    rate = np.asarray(interest_rate / periods_per_year, dtype=float)
+
+    growth = np.power(1 + rate, periods)
+    # (1 + r) ** p - 1 computed through expm1/log1p to keep precision for small
+    # rates. A zero rate degenerates into the plain number of periods.
+    zero_rate = rate == 0
+    safe_rate = np.where(zero_rate, 1.0, rate)
+    annuity_factor = np.where(
+        zero_rate,
+        periods,
+        np.expm1(periods * np.log1p(safe_rate)) / safe_rate,
+    )
+
+    total_deposit = periodic_deposit * periods
+    balance = initial_balance * growth + periodic_deposit * annuity_factor
+    total_interest = balance - initial_balance - total_deposit
+
+    return {
+        "year": year,
+        "total_deposit": total_deposit,
+        "total_interest": total_interest,
+        "balance": balance,
+    }
+
+
+def compound_interest_batch(
+    scenarios: Optional[Sequence[Union[CompoundInterestInput, dict]]] = None,
+    *,
+    initial_balance=None,
+    periodic_deposit=None,
+    interest_rate=None,
+    years=None,
+    deposit_frequency="annually") -> dict:
+    """
+    Batch compound interest calculator over many scenarios in one NumPy pass.
+
+    Scenarios are given either as a table of `CompoundInterestInput` rows (or
+    plain dicts with the same fields) or as parallel arrays. Parallel arrays
+    skip the per-scenario Pydantic validation, so they are the fast path for
+    portfolio-level runs. Scalars are broadcast against the arrays.
+
+    Args:
+        scenarios (list): Rows of CompoundInterestInput or dicts
+        initial_balance (array): Initial balances
+        periodic_deposit (array): Periodic deposits made at end of period
+        interest_rate (array): Annual interest rates (as percentage, eg: 7.5 para 7.5%)
+        years (array): Number of years of each scenario
+        deposit_frequency (str or array): Deposit frequencies ("weekly", "monthly", "annually")
+
+    Returns:
+        dict: Columnar result with
+            - "year": (max_years,) year numbers shared by every scenario
+            - "years", "initial_balance": (n_scenarios,) scenario inputs
+            - "total_deposit", "total_interest", "balance": (n_scenarios, max_years)
+              yearly trajectories, NaN after each scenario's own horizon
+            - "final_balance": (n_scenarios,) balance at the end of each horizon
+
+    Example:
+        compound_interest_batch(
+            initial_balance=[1000, 5000],
+            periodic_deposit=[100, 0],
+            interest_rate=[7.5, 3.0],
+            years=[5, 10],
+            deposit_frequency=["monthly", "annually"],
+        )
+    """
+    if scenarios is not None:
+        rows = [
+            row if isinstance(row, CompoundInterestInput) else CompoundInterestInput(**row)
+            for row in scenarios
+        ]
+        initial_balance = [row.initial_balance for row in rows]
+        periodic_deposit = [row.periodic_deposit for row in rows]
+        interest_rate = [row.interest_rate for row in rows]
+        years = [row.years for row in rows]
+        deposit_frequency = [row.deposit_frequency for row in rows]
+    elif any(column is None for column in (initial_balance, periodic_deposit, interest_rate, years)):
+        raise ValueError(
+            "Provide either 'scenarios' or the 'initial_balance', 'periodic_deposit', "
+            "'interest_rate' and 'years' arrays."
+        )
+
+    # Map frequency names to periods per year once per distinct name
+    frequency_names, frequency_index = np.unique(
+        np.asarray(deposit_frequency, dtype=str), return_inverse=True
+    )
+    invalid = [name for name in frequency_names if name not in PERIODS_PER_YEAR]
+    if invalid:
+        raise ValueError(f"Invalid deposit frequency: {invalid[0]}. Use 'weekly', 'monthly', or 'annually'")
+    periods_per_year = np.array(
+        [PERIODS_PER_YEAR[name] for name in frequency_names]
+    )[frequency_index.reshape(np.shape(deposit_frequency))]
+
+    initial_balance, periodic_deposit, interest_rate, years, periods_per_year = (
+        np.broadcast_arrays(
+            np.asarray(initial_balance, dtype=float),
+            np.asarray(periodic_deposit, dtype=float),
+            np.asarray(interest_rate, dtype=float),
+            np.asarray(years, dtype=int),
+            periods_per_year,
+        )
+    )
+    initial_balance, periodic_deposit, interest_rate, years, periods_per_year = (
+        np.atleast_1d(column).ravel()
+        for column in (initial_balance, periodic_deposit, interest_rate, years, periods_per_year)
+    )
+    if np.any(years < 0):
+        raise ValueError("'years' must be non-negative.")
+
+    max_years = int(years.max()) if years.size else 0
+    engine = _compound_interest_engine(
+        initial_balance[:, None],
+        periodic_deposit[:, None],
+        interest_rate[:, None] / 100,
+        max_years,
+        periods_per_year[:, None],
+    )
+
+    # Blank out the years past each scenario's own horizon
+    beyond_horizon = engine["year"][None, :] > years[:, None]
+    for key in ("total_deposit", "total_interest", "balance"):
+        engine[key] = np.where(beyond_horizon, np.nan, engine[key])
+
+    final_index = np.clip(years - 1, 0, None)
+    if max_years:
+        final_balance = engine["balance"][np.arange(years.size), final_index]
+    else:
+        final_balance = np.zeros(years.size)
+    final_balance = np.where(years > 0, final_balance, initial_balance)
+
+    return {
+        "year": engine["year"],
+        "years": years,
+        "initial_balance": initial_balance,
+        "total_deposit": engine["total_deposit"],
+        "total_interest": engine["total_interest"],
+        "balance": engine["balance"],
+        "final_balance": final_balance,
+    }
+
+
 @tool(args_schema=CompoundInterestInput)
 def compound_interest_calculator(
     initial_balance: float,
@@ -46,33 +231,38 @@ def compound_interest_calculator(
     Example:
         compound_interest(1000, 100, "monthly", 7.5, 5)
     """
+    # Identical calls are served from the shared result cache
+    cache_key = canonical_key("compound_interest_calculator", {
+        "initial_balance": initial_balance,
+        "periodic_deposit": periodic_deposit,
+        "interest_rate": interest_rate,
+        "years": years,
+        "deposit_frequency": deposit_frequency,
+    }, version=COMPOUND_INTEREST_ENGINE_VERSION)
+    cached = tool_result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     # Convert % interest rate to decimal
     interest_rate = interest_rate / 100
-    
-    if deposit_frequency == "weekly":
-        n = 52
-    elif deposit_frequency == "monthly":
-        n = 12
-    elif deposit_frequency == "annually":
-        n = 1
-    else:
+
+    if deposit_frequency not in PERIODS_PER_YEAR:
         raise ValueError(f"Invalid deposit frequency: {deposit_frequency}. Use 'weekly', 'monthly', or 'annually'")
-    
+    n = PERIODS_PER_YEAR[deposit_frequency]
+
     # cf = (initial_balance * (1 + interest_rate / n) ** (n * years)
     # + periodic_deposit * (((1 + interest_rate / n) ** (n * years) - 1) / (interest_rate / n)))
+    engine = _compound_interest_engine(
+        initial_balance, periodic_deposit, interest_rate, years, n
+    )
 
     data = []
-    acc_deposit = 0
-    acc_interest = 0
-    balance = initial_balance
-
-    for year in range(1, years + 1):
-        for period in range (n): # Each period, we make a deposit and apply interests over them
-            interest = balance * (interest_rate / n)
-            balance = balance + periodic_deposit + interest 
-            acc_deposit += periodic_deposit
-            acc_interest += interest
-
+    for year, acc_deposit, acc_interest, balance in zip(
+        engine["year"].tolist(),
+        engine["total_deposit"].tolist(),
+        engine["total_interest"].tolist(),
+        engine["balance"].tolist(),
+    ):
         data.append({
             "year": year,
             "initial_balance" : initial_balance,
@@ -81,6 +271,6 @@ def compound_interest_calculator(
             "balance" : balance
         })
     
-    return data
+    return tool_result_cache.set(cache_key, data)
 
 
@@ -0,0 +1,142 @@
+"""
+Streaming extraction of the main content of HTML pages.
+
+Pages are parsed incrementally while they download. Boilerplate elements
+(navigation, scripts, styles, page headers and footers, form controls...)
+are dropped, and parsing stops as soon as a budget of visible characters
+has been collected, so huge pages never have to be read, converted or
+summarized in full. Only the small, clean HTML that was kept is converted
+to markdown.
+"""
+
+from html import escape
+from html.parser import HTMLParser
+
+from markdownify import markdownify
+
+# Visible characters kept per page (roughly 4 characters per token)
+DEFAULT_CONTENT_BUDGET = 20_000
+
+# Elements whose whole subtree is boilerplate. Forms are kept (some sites
+# wrap the whole page in one), only their controls are dropped
+BOILERPLATE_TAGS = frozenset({
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "aside", "button", "select", "textarea", "dialog",
+})
+
+# Boilerplate only outside the main content: the header of an <article>
+# holds its title and byline
+SECTION_TAGS = frozenset({"header", "footer"})
+CONTENT_TAGS = frozenset({"article", "main"})
+
+# Elements without closing tag
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+})
+
+# Elements allowed in <head>; any other start tag (<body>, <p>, <div>...)
+# ends the head, whose closing tag is optional
+HEAD_TAGS = frozenset({
+    "head", "title", "base", "link", "meta", "style", "script", "noscript", "template",
+})
+
+# Attributes kept in the clean HTML (the ones markdownify uses)
+KEPT_ATTRIBUTES = frozenset({"href", "src", "alt", "title"})
+
+
+class StreamingHTMLExtractor(HTMLParser):
+    """
+    Incremental HTML parser that keeps the main content within a budget.
+
+    Args:
+        max_chars (int): Budget of visible characters to keep
+
+    Example:
+        >>> extractor = StreamingHTMLExtractor(max_chars=5000)
+        >>> for chunk in chunks:
+        ...     if extractor.feed(chunk):
+        ...         break  # budget reached, stop reading
+        >>> markdown = extractor.markdown()
+    """
+
+    def __init__(self, max_chars: int = DEFAULT_CONTENT_BUDGET):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.chars = 0
+        self.done = False
+        self._parts = []
+        self._skip_depth = 0
+        self._in_head = False
+        self._content_depth = 0
+        self._skipped_sections = []     # whether each open header/footer is skipped
+
+    def feed(self, data: str) -> bool:
+        """Parse the next chunk of the page; returns True once the budget is reached."""
+        if not self.done:
+            super().feed(data)
+        return self.done
+
+    def markdown(self) -> str:
+        """Markdown of the content kept so far."""
+        if not self.done:
+            self.close()
+        return markdownify("".join(self._parts)).strip()
+
+    def _skipping(self) -> bool:
+        return self._skip_depth > 0 or self._in_head or self.done
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "head":
+            self._in_head = True
+        elif self._in_head and tag not in HEAD_TAGS:
+            self._in_head = False
+        if tag in CONTENT_TAGS:
+            self._content_depth += 1
+        elif tag in SECTION_TAGS:
+            skipped = self._content_depth == 0
+            self._skipped_sections.append(skipped)
+            if skipped:
+                self._skip_depth += 1
+                return
+        if tag in BOILERPLATE_TAGS:
+            self._skip_depth += 1
+            return
+        # <input> is a form control too, but void: dropped without a skip level
+        if self._skipping() or tag == "input":
+            return
+        kept = "".join(
+            f' {name}="{escape(value, quote=True)}"'
+            for name, value in attrs
+            if name in KEPT_ATTRIBUTES and value is not None
+        )
+        self._parts.append(f"<{tag}{kept}>")
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._in_head = False
+        elif tag in SECTION_TAGS and self._skipped_sections and self._skipped_sections.pop():
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in BOILERPLATE_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif not self._skipping() and tag not in VOID_TAGS:
+            self._parts.append(f"</{tag}>")
+        if tag in CONTENT_TAGS:
+            self._content_depth = max(self._content_depth - 1, 0)
+
+    def handle_data(self, data):
+        if self._skipping():
+            return
+        remaining = self.max_chars - self.chars
+        if len(data) >= remaining:
+            data = data[:remaining]
+            self.done = True
+        self.chars += len(data)
+        self._parts.append(escape(data, quote=False))
+
+
+def extract_markdown(html: str, max_chars: int = DEFAULT_CONTENT_BUDGET) -> str:
+    """Main content of a complete HTML document as markdown, within `max_chars`."""
+    extractor = StreamingHTMLExtractor(max_chars)
+    extractor.feed(html)
+    return extractor.markdown()
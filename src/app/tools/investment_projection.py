@@ -0,0 +1,227 @@
+"""
+Multi-year holding-period projection for rental investments.
+
+Projects the yearly cash flows of a batch of properties over a holding
+period (rent indexation, expense growth, amortization schedule and IRPF on
+the rental income), adds the exit sale net of the remaining debt, and values
+the resulting cash flow streams with NPV and IRR.
+
+IRR is solved for every property at once with a vectorized Newton-Raphson
+iteration, warm-started from a closed-form guess or from previous results.
+Only properties that do not converge fall back to `numpy_financial.irr`.
+"""
+
+from typing import Any, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import numpy_financial as npf
+
+from .amortization import amortization_by_period
+from .real_estate_tools import RealEstateProfitabilityInput, RealEstateRecord, _resolve_columns
+
+IRR_MAX_ITERATIONS = 50
+IRR_TOLERANCE = 1e-10
+
+
+def npv(rate, cash_flows) -> np.ndarray:
+    """
+    Net present value of each row of cash flows.
+
+    Same convention as `numpy_financial.npv` (the first flow happens at
+    t = 0), applied along the last axis so a whole batch is valued at once.
+
+    Args:
+        rate (float or array): Discount rate per period, one per row or shared
+        cash_flows (array): Cash flows of shape (..., n_periods)
+
+    Returns:
+        np.ndarray: NPV of each row
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    t = np.arange(cash_flows.shape[-1])
+    discount = np.power(1 + np.asarray(rate, dtype=float)[..., None], -t)
+    return (cash_flows * discount).sum(axis=-1)
+
+
+def irr(cash_flows, guess=None) -> np.ndarray:
+    """
+    Internal rate of return of each row of cash flows.
+
+    Runs Newton-Raphson on every row simultaneously. Rows that do not
+    converge (or leave the (-1, inf) domain) are solved with
+    `numpy_financial.irr`, which returns NaN when no real solution exists.
+
+    Args:
+        cash_flows (array): Cash flows of shape (n_rows, n_periods), the
+            first one at t = 0
+        guess (float or array, optional): Starting rates, e.g. last night's
+            IRRs. Defaults to the annualized multiple on the invested capital.
+
+    Returns:
+        np.ndarray: IRR of each row (decimal)
+    """
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    n_rows, n_periods = cash_flows.shape
+    t = np.arange(n_periods)
+
+    if guess is None:
+        # Annualized multiple: (inflows / outflows) ** (1 / horizon) - 1
+        inflows = np.where(cash_flows > 0, cash_flows, 0).sum(axis=1)
+        outflows = -np.where(cash_flows < 0, cash_flows, 0).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            guess = np.power(inflows / outflows, 1 / max(n_periods - 1, 1)) - 1
+        guess = np.where(np.isfinite(guess), guess, 0.1)
+    rate = np.broadcast_to(np.asarray(guess, dtype=float), (n_rows,)).copy()
+
+    converged = np.zeros(n_rows, dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(IRR_MAX_ITERATIONS):
+            discount = np.power(1 + rate[:, None], -t)
+            value = (cash_flows * discount).sum(axis=1)
+            derivative = -(t * cash_flows * discount).sum(axis=1) / (1 + rate)
+            step = value / derivative
+            active = ~converged
+            rate = np.where(active, rate - step, rate)
+            converged |= np.abs(step) < IRR_TOLERANCE
+            if converged.all():
+                break
+
+    failed = ~converged | ~np.isfinite(rate) | (rate <= -1)
+    for row in np.flatnonzero(failed):
+        rate[row] = npf.irr(cash_flows[row])
+    return rate
+
+
+def project_rental_investment(
+    properties: Union[
+        Sequence[RealEstateProfitabilityInput], Sequence[RealEstateRecord], np.ndarray, Mapping[str, Any]
+    ],
+    holding_years: int = 10,
+    rent_growth=0.02,
+    expense_growth=0.02,
+    property_appreciation=0.02,
+    selling_cost_rate=0.05,
+    capital_gains_tax_rate=0.0,
+    discount_rate=0.05,
+    irr_guess=None,
+) -> dict:
+    """
+    Project the yearly cash flows of a batch of rental properties and value them.
+
+    Year 1 matches `real_estate_profitability_calculator` (conservative cash
+    flow). Later years index the rent and the rent-linked costs (maintenance,
+    vacancy, rental protection insurance) by `rent_growth`, the remaining
+    operating costs by `expense_growth`, and take interest and principal from
+    the amortization schedule. The last year adds the exit: sale price after
+    appreciation and selling costs, minus capital gains tax, minus the
+    remaining debt. Variable mortgages are projected at the current Euribor.
+
+    Growth, cost and discount rates are decimals and may be scalars or one
+    value per property.
+
+    Args:
+        properties: Validated input models, records or a mapping of
+            columns, as in `real_estate_portfolio_calculator`
+        holding_years (int): Holding period in years
+        rent_growth: Yearly rent indexation (eg: 0.02)
+        expense_growth: Yearly growth of the fixed operating costs
+        property_appreciation: Yearly property value growth
+        selling_cost_rate: Selling costs as a share of the sale price
+        capital_gains_tax_rate: Tax rate on the gain over the purchase price
+        discount_rate: Discount rate for the NPV
+        irr_guess (optional): Warm-start IRRs, one per property
+
+    Returns:
+        Dictionary with
+        - "year": (holding_years + 1,) years, 0 being the purchase
+        - "cash_flows": (n_properties, holding_years + 1) equity cash flows
+        - "net_operating_income", "income_tax_on_rental",
+          "interest_expense", "principal_payment": (n_properties, holding_years)
+        - "sale_price", "remaining_debt", "exit_proceeds",
+          "npv", "irr": (n_properties,)
+    """
+    c = _resolve_columns(properties)
+    if holding_years < 1:
+        raise ValueError("'holding_years' must be at least 1.")
+
+    def per_property(value):
+        return np.asarray(value, dtype=float)[..., None]
+
+    years = np.arange(1, holding_years + 1)
+    rent_index = np.power(1 + per_property(rent_growth), years - 1)
+    expense_index = np.power(1 + per_property(expense_growth), years - 1)
+
+    purchase_price = c["purchase_price"]
+    mortgage_loan_amount = purchase_price * c["loan_to_value_ratio"]
+    total_acquisition_cost = (
+        purchase_price
+        + purchase_price * c["itp_rate"]
+        + c["notary_cost"]
+        + c["registry_cost"]
+        + c["renovation_cost"]
+        + c["agency_commission"]
+        + c["mortgage_management_cost"]
+        + c["mortgage_appraisal_cost"]
+    )
+
+    # Interest and principal per loan year, zero once the loan is repaid
+    periods = amortization_by_period(
+        mortgage_loan_amount, c["loan_term_years"], c["interest_rate"][..., None]
+    )
+    n_loan_years = periods["interest"].shape[-1]
+    pad = max(holding_years - n_loan_years, 0)
+
+    def loan_years(value):
+        return np.pad(value, [(0, 0)] * (value.ndim - 1) + [(0, pad)])[..., :holding_years]
+
+    interest_expense = loan_years(periods["interest"])
+    principal_payment = loan_years(periods["principal"])
+    remaining_debt = loan_years(periods["balance"])[..., -1]
+
+    annual_gross_rental_income = (c["monthly_rental_income"] * 12)[..., None] * rent_index
+    rent_linked_expenses = (
+        c["maintenance_cost"] + c["rental_protection_insurance"] + c["vacancy_allowance"]
+    )[..., None] * rent_index
+    fixed_expenses = (
+        c["homeowners_association_fee"]
+        + c["property_insurance"]
+        + c["mortgage_life_insurance"]
+        + c["property_tax_ibi"]
+    )[..., None] * expense_index
+
+    net_operating_income = annual_gross_rental_income - (
+        rent_linked_expenses + fixed_expenses + interest_expense
+    )
+    annual_depreciation_expense = (0.025 * purchase_price)[..., None]
+    income_tax_on_rental = (
+        np.maximum(0, net_operating_income - annual_depreciation_expense)
+        * c["irpf_tax"][..., None]
+    )
+    operating_cash_flow = net_operating_income - income_tax_on_rental - principal_payment
+
+    # Exit: sale net of selling costs and capital gains tax, minus outstanding debt
+    sale_price = purchase_price * np.power(1 + np.asarray(property_appreciation, dtype=float), holding_years)
+    net_sale_price = sale_price * (1 - np.asarray(selling_cost_rate, dtype=float))
+    capital_gains_tax = (
+        np.maximum(0, net_sale_price - total_acquisition_cost)
+        * np.asarray(capital_gains_tax_rate, dtype=float)
+    )
+    exit_proceeds = net_sale_price - capital_gains_tax - remaining_debt
+
+    total_upfront_cost = total_acquisition_cost - mortgage_loan_amount
+    cash_flows = np.concatenate([-total_upfront_cost[..., None], operating_cash_flow], axis=-1)
+    cash_flows[..., -1] += exit_proceeds
+
+    return {
+        "year": np.arange(0, holding_years + 1),
+        "cash_flows": cash_flows,
+        "net_operating_income": net_operating_income,
+        "income_tax_on_rental": income_tax_on_rental,
+        "interest_expense": interest_expense,
+        "principal_payment": principal_payment,
+        "sale_price": sale_price,
+        "remaining_debt": remaining_debt,
+        "exit_proceeds": exit_proceeds,
+        "npv": npv(discount_rate, cash_flows),
+        "irr": irr(cash_flows, guess=irr_guess),
+    }
@@ -0,0 +1,55 @@
+"""
+Lazy, thread-safe holders for expensive clients (LLMs, search APIs...).
+
+A client is built by its provider on first use, once, even when several
+threads ask for it at the same time. Importing a module that declares
+clients therefore costs nothing, and processes that never use a client
+never build it nor need its API keys. Providers can be replaced, e.g. to
+inject a stub in tests or a differently configured client.
+"""
+
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyClient(Generic[T]):
+    """
+    Client built on first use by `provider`.
+
+    Example:
+        >>> search_client = LazyClient(lambda: TavilyClient())
+        >>> search_client.get().search("euribor")  # built here, reused afterwards
+        >>> search_client.set_provider(lambda: StubSearchClient())
+    """
+
+    def __init__(self, provider: Callable[[], T]):
+        self._provider = provider
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        """The client, built by the provider on the first call."""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._provider()
+                instance = self._instance
+        return instance
+
+    def set_provider(self, provider: Callable[[], T]) -> None:
+        """Replace the provider; the client is rebuilt with it on next use."""
+        with self._lock:
+            self._provider = provider
+            self._instance = None
+
+    def reset(self) -> None:
+        """Drop the client so that the next use builds a new one."""
+        with self._lock:
+            self._instance = None
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
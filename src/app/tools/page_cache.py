@@ -0,0 +1,267 @@
+"""
+Persistent cache of fetched pages and their summaries.
+
+Pages are stored by URL together with their ETag/Last-Modified validators,
+and their converted content is stored once per content hash. Summaries are
+keyed by that same hash, so a page whose content has not changed is never
+summarized twice, even if it is reached through a different URL.
+
+- A fresh page (younger than the TTL) costs no network request.
+- A stale page is revalidated with a conditional request; a 304 answer
+  refreshes it without downloading or summarizing it again.
+- The stored contents are bounded in bytes; the least recently used pages
+  are evicted first, together with the contents no other page refers to.
+- Summaries have their own byte budget and are evicted least recently
+  used first, independently of pages: a summary may outlive its page, or
+  exist for content that was never fetched (e.g. search raw content).
+
+Everything lives in a single SQLite file, by default under
+src/infrastructure/db.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+DEFAULT_PAGE_CACHE_PATH = (
+    Path(__file__).resolve().parents[2] / "infrastructure" / "db" / "web_cache.sqlite3"
+)
+DEFAULT_PAGE_TTL = 24 * 3600
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_SUMMARY_BYTES = 32 * 1024 * 1024
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 of a page content, the key of contents and summaries."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class CachedPage(NamedTuple):
+    """Page stored in the cache."""
+    url: str
+    content: str
+    content_hash: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool             # fetched less than `ttl` seconds ago
+
+    def revalidation_headers(self) -> dict:
+        """Headers of a conditional request for this page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    SQLite cache of page contents and summaries.
+
+    Args:
+        path: SQLite file (created with its directory if needed)
+        ttl (float): Seconds a page is served without revalidation
+        max_bytes (int): Maximum total size of the stored contents
+        max_summary_bytes (int): Maximum total size of the stored summaries
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_PAGE_CACHE_PATH,
+        ttl: float = DEFAULT_PAGE_TTL,
+        max_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+        max_summary_bytes: int = DEFAULT_MAX_SUMMARY_BYTES,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_summary_bytes = max_summary_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS contents (
+                    content_hash TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    size INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS summaries (
+                    content_hash TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    summary TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+                """
+            )
+            # Files created before summaries had their own budget
+            columns = {row[1] for row in self._connection.execute("PRAGMA table_info(summaries)")}
+            if "size" not in columns:
+                self._connection.execute(
+                    "ALTER TABLE summaries ADD COLUMN size INTEGER NOT NULL DEFAULT 0"
+                )
+                self._connection.execute(
+                    "UPDATE summaries SET size = LENGTH(CAST(filename || summary AS BLOB))"
+                )
+            if "accessed_at" not in columns:
+                self._connection.execute(
+                    "ALTER TABLE summaries ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0"
+                )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS summaries_accessed_at ON summaries (accessed_at)"
+            )
+
+    def get_page(self, url: str) -> Optional[CachedPage]:
+        """Cached page of `url`, fresh or stale, or None if it was never stored."""
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT c.content, p.content_hash, p.etag, p.last_modified, p.fetched_at "
+                "FROM pages p JOIN contents c ON c.content_hash = p.content_hash "
+                "WHERE p.url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url)
+            )
+        content, digest, etag, last_modified, fetched_at = row
+        return CachedPage(url, content, digest, etag, last_modified, now - fetched_at < self.ttl)
+
+    def put_page(
+        self,
+        url: str,
+        content: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> str:
+        """Store the content of `url` and return its content hash."""
+        digest = content_hash(content)
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO contents (content_hash, content, size) VALUES (?, ?, ?)",
+                (digest, content, len(content.encode("utf-8"))),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(url, content_hash, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, digest, etag, last_modified, now, now),
+            )
+            self._evict()
+        return digest
+
+    def refresh_page(self, url: str) -> None:
+        """Mark a page as fresh again after a 304 Not Modified answer."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url)
+            )
+
+    def get_summary(self, digest: str) -> Optional[tuple[str, str]]:
+        """(filename, summary) stored for a content hash, or None."""
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT filename, summary FROM summaries WHERE content_hash = ?", (digest,)
+            ).fetchone()
+            if row is not None:
+                self._connection.execute(
+                    "UPDATE summaries SET accessed_at = ? WHERE content_hash = ?",
+                    (time.time(), digest),
+                )
+        return row
+
+    def put_summary(self, digest: str, filename: str, summary: str) -> None:
+        size = len(filename.encode("utf-8")) + len(summary.encode("utf-8"))
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO summaries "
+                "(content_hash, filename, summary, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (digest, filename, summary, size, time.time()),
+            )
+            self._evict_summaries()
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.executescript(
+                "DELETE FROM pages; DELETE FROM contents; DELETE FROM summaries;"
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self) -> None:
+        """Drop least recently used pages until the contents fit in `max_bytes`."""
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM contents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        pages = self._connection.execute(
+            "SELECT p.url, p.content_hash, c.size FROM pages p "
+            "JOIN contents c ON c.content_hash = p.content_hash ORDER BY p.accessed_at"
+        ).fetchall()
+        # A content shared by several pages is freed with the last of them only
+        references = Counter(digest for _, digest, _ in pages)
+        evicted = []
+        for url, digest, size in pages:
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            references[digest] -= 1
+            if not references[digest]:
+                total -= size
+        self._connection.executemany("DELETE FROM pages WHERE url = ?", evicted)
+        self._connection.execute(
+            "DELETE FROM contents WHERE content_hash NOT IN (SELECT content_hash FROM pages)"
+        )
+
+    def _evict_summaries(self) -> None:
+        """Drop least recently used summaries until they fit in `max_summary_bytes`."""
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+        if total <= self.max_summary_bytes:
+            return
+        evicted = []
+        for digest, size in self._connection.execute(
+            "SELECT content_hash, size FROM summaries ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_summary_bytes:
+                break
+            evicted.append((digest,))
+            total -= size
+        self._connection.executemany("DELETE FROM summaries WHERE content_hash = ?", evicted)
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Shared page cache, opened on first use at DEFAULT_PAGE_CACHE_PATH."""
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+        return _page_cache
+
+
+def set_page_cache(cache: Optional[PageCache]) -> None:
+    """Replace the shared page cache; None reopens the default one on next use."""
+    global _page_cache
+    with _page_cache_lock:
+        _page_cache = cache
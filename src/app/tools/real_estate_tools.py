@@ -2,8 +2,10 @@
 Real Estate profitability computation tools for LLMs
 """
 
+import math
 from ast import main
-from typing import Annotated, List, Literal, Union, Optional
+from typing import Annotated, Any, List, Literal, Mapping, NamedTuple, Optional, Sequence, Union
+import numpy as np
 import numpy_financial as npf
 
 from langchain_core.messages import ToolMessage
@@ -13,7 +15,31 @@ from langgraph.types import Command
 
 from langgraph.prebuilt.chat_agent_executor import AgentState
 
-from pydantic import BaseModel, Field, computed_field, model_validator
+from pydantic import BaseModel, Field, PrivateAttr, computed_field, model_validator
+
+from .amortization import amortization_schedule
+from .result_cache import canonical_key, tool_result_cache
+from .tax_rules import (
+    TAX_RULES,
+    default_cost_ratio,
+    get_tax_tables,
+    irpf_rate,
+    itp_rate,
+    rules_version,
+)
+
+# Bump when a change of the profitability engine changes its results, to invalidate cached ones
+PROFITABILITY_ENGINE_VERSION = "1"
+
+# Optional costs that default to a share of the purchase price or of the rent
+DERIVED_COST_FIELDS = (
+    "notary_cost",
+    "registry_cost",
+    "agency_commission",
+    "property_tax_ibi",
+    "maintenance_cost",
+    "vacancy_allowance",
+)
 
 # Create a class for tool function inputs. This introduces types and values validation.
 class RealEstateProfitabilityInput(BaseModel):
@@ -85,6 +111,11 @@ class RealEstateProfitabilityInput(BaseModel):
         None,
         description="IRPF tax withholding percentage based on salary"
     )
+    tax_year: Optional[int] = Field(
+        None,
+        ge=min(TAX_RULES),
+        description=f"Tax year whose ITP and IRPF rules apply, from {min(TAX_RULES)} (default: latest available)"
+    )
 
     """Mortgage Financing"""
     loan_to_value_ratio: float = Field(
@@ -120,28 +151,39 @@ class RealEstateProfitabilityInput(BaseModel):
         description="Variable interest rate (annual percentage)"
     )
 
+    _defaulted_fields: set = PrivateAttr(default_factory=set)
+
     @model_validator(mode="after")
     def calculate_automatic_fields(self):
+        # Remember which costs are derived from price/rent so that sweeps
+        # over those parameters can recompute them
+        self._defaulted_fields = {
+            name for name in DERIVED_COST_FIELDS if getattr(self, name) is None
+        }
+
         # Calculate rental protection insurance if applicable
         if self.has_rental_protection_insurance == "Y":
             self.rental_protection_insurance = (
-                self.monthly_rental_income * 12 * 0.05
+                self.monthly_rental_income * 12
+                * _cost_ratio("rental_protection_insurance", self.tax_year)
             )
 
         # Calculate default values if not provided
         if self.maintenance_cost is None:
-            self.maintenance_cost = 0.10 * self.monthly_rental_income * 12
+            self.maintenance_cost = (
+                _cost_ratio("maintenance_cost", self.tax_year) * self.monthly_rental_income * 12
+            )
         # Align types to int to avoid Pydantic serialization warnings
         if self.notary_cost is None:
-            self.notary_cost = int(0.02 * self.purchase_price)
+            self.notary_cost = int(_cost_ratio("notary_cost", self.tax_year) * self.purchase_price)
         else:
             self.notary_cost = int(self.notary_cost)
         if self.registry_cost is None:
-            self.registry_cost = int(0.002 * self.purchase_price)
+            self.registry_cost = int(_cost_ratio("registry_cost", self.tax_year) * self.purchase_price)
         if self.agency_commission is None:
-            self.agency_commission = int(0.02 * self.purchase_price)
+            self.agency_commission = int(_cost_ratio("agency_commission", self.tax_year) * self.purchase_price)
         if self.property_tax_ibi is None:
-            self.property_tax_ibi = int(0.001 * self.purchase_price)
+            self.property_tax_ibi = int(_cost_ratio("property_tax_ibi", self.tax_year) * self.purchase_price)
         if self.mortgage_management_cost is not None:
             self.mortgage_management_cost = int(self.mortgage_management_cost)
         if self.mortgage_appraisal_cost is not None:
@@ -153,22 +195,12 @@ class RealEstateProfitabilityInput(BaseModel):
         if self.property_insurance is not None:
             self.property_insurance = int(self.property_insurance)
         if self.vacancy_allowance is None:
-            self.vacancy_allowance = 0.05 * 12 * self.monthly_rental_income
+            self.vacancy_allowance = (
+                _cost_ratio("vacancy_allowance", self.tax_year) * 12 * self.monthly_rental_income
+            )
 
         # Calculate income tax bracket
-        salary = self.annual_gross_salary
-        if salary <= 12450:
-            self.irpf_tax = 0.19
-        elif salary <= 20199:
-            self.irpf_tax = 0.24
-        elif salary <= 35199:
-            self.irpf_tax = 0.30
-        elif salary <= 59999:
-            self.irpf_tax = 0.37
-        elif salary <= 299999:
-            self.irpf_tax = 0.45
-        else:
-            self.irpf_tax = 0.47
+        self.irpf_tax = float(irpf_rate(self.annual_gross_salary, self.tax_year))
 
         # Validate financing data consistency
         if self.mortgage_type == "variable":
@@ -193,6 +225,382 @@ class RealEstateProfitabilityInput(BaseModel):
 
         return self
 
+    def to_record(self) -> "RealEstateRecord":
+        """Resolved engine inputs of this property, for the validation-free fast path."""
+        return self._engine_record(float(itp_rate(self.autonomous_community, self.tax_year)))
+
+    def _engine_record(self, itp: float) -> "RealEstateRecord":
+        # Using or 0 to avoid NoneType errors in pydantic
+        costs = {
+            name: float(getattr(self, name) or 0)
+            for name in RealEstateRecord._fields
+            if name not in ("itp_rate", "interest_rate")
+        }
+        interest_rate = (
+            self.variable_interest_rate if self.mortgage_type == "variable"
+            else self.fixed_interest_rate
+        )
+        return RealEstateRecord(itp_rate=itp, interest_rate=interest_rate / 100, **costs)
+
+
+class RealEstateRecord(NamedTuple):
+    """
+    Pre-validated property, resolved into the inputs of the profitability engine.
+
+    Fast path for internal and batch callers: records skip Pydantic
+    validation entirely, so they must come from a trusted source such as
+    `RealEstateProfitabilityInput.to_record` or `real_estate_records`.
+    Defaults are already applied; itp_rate and interest_rate are decimals.
+    """
+    purchase_price: float
+    itp_rate: float
+    notary_cost: float
+    registry_cost: float
+    renovation_cost: float
+    agency_commission: float
+    mortgage_management_cost: float
+    mortgage_appraisal_cost: float
+    monthly_rental_income: float
+    homeowners_association_fee: float
+    maintenance_cost: float
+    property_insurance: float
+    mortgage_life_insurance: float
+    rental_protection_insurance: float
+    property_tax_ibi: float
+    vacancy_allowance: float
+    irpf_tax: float
+    loan_to_value_ratio: float
+    loan_term_years: float
+    interest_rate: float
+
+
+# Required columns for portfolio evaluation from raw arrays
+PORTFOLIO_REQUIRED_COLUMNS = (
+    "purchase_price",
+    "autonomous_community",
+    "renovation_cost",
+    "monthly_rental_income",
+    "annual_gross_salary",
+    "loan_term_years",
+    "mortgage_type",
+)
+
+
+def _cost_ratio(name: str, tax_year: Optional[int] = None) -> float:
+    """Default cost ratio from the tax rules, as a plain float for model fields."""
+    return float(default_cost_ratio(name, tax_year))
+
+
+def _columns_from_records(records) -> dict:
+    """Split records (or an array with one row per record) into engine columns."""
+    matrix = np.asarray(records, dtype=float).reshape(-1, len(RealEstateRecord._fields))
+    return dict(zip(RealEstateRecord._fields, np.ascontiguousarray(matrix.T)))
+
+
+def _columns_from_inputs(
+    inputs: Sequence[Union[RealEstateProfitabilityInput, RealEstateRecord]],
+) -> dict:
+    """
+    Stack validated input models (and records) into the resolved columns used by the engine.
+
+    The ITP rates of the models are resolved in one vectorized tax rules
+    lookup over their communities and tax years, not model by model.
+    """
+    models = [i for i, item in enumerate(inputs) if isinstance(item, RealEstateProfitabilityInput)]
+    columns = _columns_from_records([
+        item._engine_record(np.nan) if isinstance(item, RealEstateProfitabilityInput) else item
+        for item in inputs
+    ])
+    if models:
+        # Models without a tax year use the latest rules
+        years = [inputs[i].tax_year for i in models]
+        if all(year is None for year in years):
+            tax_year = None
+        else:
+            latest = get_tax_tables().years[-1]
+            tax_year = np.array([latest if year is None else year for year in years])
+        communities = np.array([inputs[i].autonomous_community for i in models])
+        columns["itp_rate"][models] = itp_rate(communities, tax_year)
+    return columns
+
+
+def _columns_from_mapping(data: Mapping[str, Any]) -> dict:
+    """
+    Resolve raw portfolio columns into the columns used by the engine.
+
+    Applies the same defaults and consistency checks as
+    RealEstateProfitabilityInput.calculate_automatic_fields, but on whole
+    columns at once.
+    """
+    missing = [name for name in PORTFOLIO_REQUIRED_COLUMNS if name not in data]
+    if missing:
+        raise ValueError(f"Missing required portfolio columns: {missing}")
+
+    purchase_price = np.atleast_1d(np.asarray(data["purchase_price"], dtype=float))
+    shape = purchase_price.shape
+
+    def column(name, default=np.nan, dtype=float):
+        value = data.get(name)
+        if value is None:
+            return np.full(shape, default, dtype=dtype)
+        return np.broadcast_to(np.asarray(value, dtype=dtype), shape)
+
+    def with_default(name, default):
+        value = column(name)
+        return np.where(np.isnan(value), default, value)
+
+    monthly_rental_income = column("monthly_rental_income")
+    # Rows without a tax year use the latest rules
+    tax_year = column("tax_year")
+    if np.all(np.isnan(tax_year)):
+        tax_year = None
+    else:
+        latest = get_tax_tables().years[-1]
+        tax_year = np.where(np.isnan(tax_year), latest, tax_year).astype(int)
+
+    def ratio(name):
+        return default_cost_ratio(name, tax_year)
+
+    has_rental_protection = column("has_rental_protection_insurance", "Y", dtype=object) == "Y"
+    rental_protection_insurance = np.where(
+        has_rental_protection,
+        monthly_rental_income * 12 * ratio("rental_protection_insurance"),
+        with_default("rental_protection_insurance", 0),
+    )
+
+    # Interest rate depends on the mortgage type of each property
+    mortgage_type = column("mortgage_type", dtype=object)
+    is_variable = mortgage_type == "variable"
+    is_fixed = mortgage_type == "fixed"
+    if not np.all(is_variable | is_fixed):
+        raise ValueError("'mortgage_type' must be 'fixed' or 'variable'.")
+    variable_interest_rate = column("mortgage_margin") + column("euribor_rate")
+    fixed_interest_rate = column("fixed_interest_rate")
+    if np.any(is_variable & np.isnan(variable_interest_rate)):
+        raise ValueError(
+            "If mortgage type is 'variable', "
+            "'mortgage_margin' and 'euribor_rate' "
+            "must be specified."
+        )
+    if np.any(is_fixed & np.isnan(fixed_interest_rate)):
+        raise ValueError(
+            "If mortgage type is 'fixed', "
+            "'fixed_interest_rate' must be specified."
+        )
+
+    return {
+        "purchase_price": purchase_price,
+        "itp_rate": itp_rate(column("autonomous_community", dtype=str), tax_year),
+        "notary_cost": with_default(
+            "notary_cost", np.trunc(ratio("notary_cost") * purchase_price)
+        ),
+        "registry_cost": with_default(
+            "registry_cost", np.trunc(ratio("registry_cost") * purchase_price)
+        ),
+        "renovation_cost": column("renovation_cost"),
+        "agency_commission": with_default(
+            "agency_commission", np.trunc(ratio("agency_commission") * purchase_price)
+        ),
+        "mortgage_management_cost": with_default("mortgage_management_cost", 0),
+        "mortgage_appraisal_cost": with_default("mortgage_appraisal_cost", 0),
+        "monthly_rental_income": monthly_rental_income,
+        "homeowners_association_fee": with_default("homeowners_association_fee", 100),
+        "maintenance_cost": with_default(
+            "maintenance_cost", ratio("maintenance_cost") * monthly_rental_income * 12
+        ),
+        "property_insurance": with_default("property_insurance", 100),
+        "mortgage_life_insurance": with_default("mortgage_life_insurance", 0),
+        "rental_protection_insurance": rental_protection_insurance,
+        "property_tax_ibi": with_default(
+            "property_tax_ibi", np.trunc(ratio("property_tax_ibi") * purchase_price)
+        ),
+        "vacancy_allowance": with_default(
+            "vacancy_allowance", ratio("vacancy_allowance") * 12 * monthly_rental_income
+        ),
+        "irpf_tax": irpf_rate(column("annual_gross_salary"), tax_year),
+        "loan_to_value_ratio": with_default("loan_to_value_ratio", 0.80),
+        "loan_term_years": column("loan_term_years"),
+        "interest_rate": np.where(is_variable, variable_interest_rate, fixed_interest_rate) / 100,
+    }
+
+
+def _resolve_columns(properties) -> dict:
+    """Engine columns from raw columns, records, a record array or input models."""
+    if isinstance(properties, Mapping):
+        return _columns_from_mapping(properties)
+    if isinstance(properties, np.ndarray):
+        return _columns_from_records(properties)
+    properties = list(properties)
+    if any(isinstance(item, RealEstateProfitabilityInput) for item in properties):
+        return _columns_from_inputs(properties)
+    return _columns_from_records(properties)
+
+
+def real_estate_records(data: Mapping[str, Any]) -> np.ndarray:
+    """
+    Validate raw portfolio columns once and return them as a record array.
+
+    The result has one row per property and one column per
+    RealEstateRecord field. It can be stored and passed to
+    `real_estate_portfolio_calculator` (or `project_rental_investment`) any
+    number of times without repeating the validation.
+
+    Args:
+        data: Mapping of column name -> array-like, as accepted by
+            `real_estate_portfolio_calculator`
+
+    Returns:
+        np.ndarray: Array of shape (n_properties, len(RealEstateRecord._fields))
+    """
+    columns = _columns_from_mapping(data)
+    return np.column_stack([columns[name] for name in RealEstateRecord._fields])
+
+
+def _profitability_metrics(c: Mapping[str, Any]) -> dict:
+    """
+    Vectorized real estate profitability engine.
+
+    Takes resolved columns (see `_columns_from_inputs`) and computes every
+    metric of `real_estate_profitability_calculator` with NumPy operations,
+    so the same code evaluates one property, a portfolio or a broadcast grid.
+
+    Args:
+        c: Mapping of resolved input columns (defaults already applied,
+            interest_rate and itp_rate as decimals)
+
+    Returns:
+        Dictionary of metric name -> NumPy array
+    """
+    purchase_price = c["purchase_price"]
+
+    # Compute ITP tax to pay
+    itp_to_pay = purchase_price * c["itp_rate"]
+
+    # Compute total acquisition cost (including mortgage management and appraisal costs)
+    total_acquisition_cost = (
+        purchase_price
+        + itp_to_pay
+        + c["notary_cost"]
+        + c["registry_cost"]
+        + c["renovation_cost"]
+        + c["agency_commission"]
+        + c["mortgage_management_cost"]
+        + c["mortgage_appraisal_cost"]
+    )
+
+    # Compute annual gross rental income
+    annual_gross_rental_income = c["monthly_rental_income"] * 12
+
+    # Compute mortgage financing
+    mortgage_loan_amount = purchase_price * c["loan_to_value_ratio"]
+    down_payment = purchase_price - mortgage_loan_amount
+    monthly_interest_rate = c["interest_rate"] / 12
+
+    # PMT = Payment: Compute periodic payment for loan based on
+    # constant payments and constant interest rates
+    number_of_payments = c["loan_term_years"] * 12  # Monthly payments
+    monthly_mortgage_payment = np.abs(npf.pmt(
+        monthly_interest_rate, number_of_payments, mortgage_loan_amount
+    ))
+    total_mortgage_payments = number_of_payments * monthly_mortgage_payment
+    total_interest_over_life = total_mortgage_payments - mortgage_loan_amount
+    annual_mortgage_payment = monthly_mortgage_payment * 12
+
+    # Calculate first year interest expense from the amortization schedule
+    # (more accurate than dividing total by years)
+    first_year = amortization_schedule(
+        mortgage_loan_amount, c["interest_rate"], c["loan_term_years"], horizon_months=12
+    )
+    first_year_interest_expense = first_year["interest"].sum(axis=-1)
+
+    # Compute annual operating expenses
+    total_annual_operating_expenses = (
+        c["homeowners_association_fee"]
+        + c["maintenance_cost"]
+        + c["property_insurance"]
+        + c["mortgage_life_insurance"]
+        + c["rental_protection_insurance"]
+        + c["property_tax_ibi"]
+        + first_year_interest_expense
+        + c["vacancy_allowance"]
+    )
+
+    # Compute net operating income (NOI)
+    net_operating_income = annual_gross_rental_income - total_annual_operating_expenses
+
+    # Calculate depreciation expense
+    # (typically 2-3% of property value annually)
+    annual_depreciation_expense = 0.025 * purchase_price
+
+    # Tax calculation for rental income in Spain
+    # Rental income is taxed at marginal IRPF rate,
+    # with depreciation deductions allowed
+    taxable_rental_income = (
+        net_operating_income - annual_depreciation_expense
+    )
+    # Only tax positive income
+    income_tax_on_rental = np.maximum(0, taxable_rental_income) * c["irpf_tax"]
+
+    net_income_after_taxes = net_operating_income - income_tax_on_rental
+
+    # Compute profitability metrics
+    gross_rental_yield = annual_gross_rental_income / total_acquisition_cost
+    net_rental_yield_conservative = (
+        net_income_after_taxes / total_acquisition_cost
+    )
+    net_rental_yield_optimistic = (
+        (net_income_after_taxes + c["vacancy_allowance"] +
+         c["maintenance_cost"]) / total_acquisition_cost
+    )
+
+    # Cash flow analysis
+    # Principal payment = total mortgage payment - interest payment
+    annual_principal_payment = (
+        annual_mortgage_payment - first_year_interest_expense
+    )
+
+    # Cash flow = money remaining after paying mortgage principal
+    annual_cash_flow_conservative = (
+        net_income_after_taxes - annual_principal_payment
+    )
+    annual_cash_flow_optimistic = (
+        annual_cash_flow_conservative +
+        c["vacancy_allowance"] + c["maintenance_cost"]
+    )
+
+    # ROCE (Return on Capital Employed)
+    total_upfront_cost = total_acquisition_cost - mortgage_loan_amount
+    roce_conservative = (
+        annual_cash_flow_conservative / total_upfront_cost
+    )
+    roce_optimistic = (
+        annual_cash_flow_optimistic / total_upfront_cost
+    )
+
+    return {
+        "itp_tax_amount": itp_to_pay,
+        "total_acquisition_cost": total_acquisition_cost,
+        "down_payment": down_payment,
+        "mortgage_loan_amount": mortgage_loan_amount,
+        "annual_gross_rental_income": annual_gross_rental_income,
+        "first_year_interest_expense": first_year_interest_expense,
+        "total_annual_operating_expenses": total_annual_operating_expenses,
+        "net_operating_income": net_operating_income,
+        "income_tax_on_rental": income_tax_on_rental,
+        "net_income_after_taxes": net_income_after_taxes,
+        "monthly_mortgage_payment": monthly_mortgage_payment,
+        "annual_mortgage_payment": annual_mortgage_payment,
+        "total_interest_over_life": total_interest_over_life,
+        "annual_principal_payment": annual_principal_payment,
+        "gross_rental_yield": gross_rental_yield,
+        "net_rental_yield_conservative": net_rental_yield_conservative,
+        "net_rental_yield_optimistic": net_rental_yield_optimistic,
+        "annual_cash_flow_conservative": annual_cash_flow_conservative,
+        "annual_cash_flow_optimistic": annual_cash_flow_optimistic,
+        "roce_conservative": roce_conservative,
+        "roce_optimistic": roce_optimistic,
+    }
+
 
 @tool(args_schema=RealEstateProfitabilityInput)
 def real_estate_profitability_calculator(
@@ -267,229 +675,305 @@ def real_estate_profitability_calculator(
     if input_data is None:
         input_data = RealEstateProfitabilityInput(**kwargs)
 
-    # Unpack input model into local variables for readability
-    purchase_price = input_data.purchase_price
-    autonomous_community = input_data.autonomous_community
-    notary_cost = input_data.notary_cost
-    registry_cost = input_data.registry_cost
-    renovation_cost = input_data.renovation_cost
-    agency_commission = input_data.agency_commission
-    mortgage_management_cost = input_data.mortgage_management_cost
-    mortgage_appraisal_cost = input_data.mortgage_appraisal_cost
-    monthly_rental_income = input_data.monthly_rental_income
-    homeowners_association_fee = input_data.homeowners_association_fee
-    maintenance_cost = input_data.maintenance_cost
-    property_insurance = input_data.property_insurance
-    mortgage_life_insurance = input_data.mortgage_life_insurance
-    has_rental_protection_insurance = input_data.has_rental_protection_insurance
-    rental_protection_insurance = input_data.rental_protection_insurance
-    property_tax_ibi = input_data.property_tax_ibi
-    vacancy_allowance = input_data.vacancy_allowance
-    annual_gross_salary = input_data.annual_gross_salary
-    irpf_tax = input_data.irpf_tax
-    loan_to_value_ratio = input_data.loan_to_value_ratio
-    loan_term_years = input_data.loan_term_years
-    mortgage_type = input_data.mortgage_type
-    mortgage_margin = input_data.mortgage_margin
-    euribor_rate = input_data.euribor_rate
-    fixed_interest_rate = input_data.fixed_interest_rate
-    variable_interest_rate = input_data.variable_interest_rate
-
-    def calculate_itp(autonomous_community):
-        ITP_BY_COMMUNITY = {
-            "Andalucía": 7.0,
-            "Aragón": 8.0,
-            "Asturias": 8.0,
-            "Islas Baleares": 8.0,
-            "Canarias": 6.5,
-            "Cantabria": 9.0,
-            "Castilla-La Mancha": 9.0,
-            "Castilla y León": 8.0,
-            "Cataluña": 10.0,
-            "Ceuta": 6.0,
-            "Comunidad de Madrid": 6.0,
-            "Comunidad Valenciana": 10.0,
-            "Extremadura": 8.0,
-            "Galicia": 8.0,
-            "La Rioja": 7.0,
-            "Melilla": 6.0,
-            "Murcia": 8.0,
-            "Navarra": 6.0,
-            "País Vasco": 7.0,
-        }
-
-        if autonomous_community not in ITP_BY_COMMUNITY:
-            raise ValueError(
-                f"Autonomous community {autonomous_community} "
-                "is not in the list."
-            )
-        
-        itp_rate = ITP_BY_COMMUNITY[autonomous_community] / 100
-        itp_to_pay = purchase_price * itp_rate
-        return itp_rate, itp_to_pay
-
-    # Compute ITP tax to pay
-    itp_rate, itp_to_pay = calculate_itp(autonomous_community)
-    # TODO: Try to compute this in class validators
-
-    # Compute total acquisition cost (including mortgage management and appraisal costs)
-    # Using or 0 to avoid NoneType errors in pydantic
-    total_acquisition_cost = (
-        (purchase_price or 0)
-        + (itp_to_pay or 0)
-        + (notary_cost or 0)
-        + (registry_cost or 0)
-        + (renovation_cost or 0)
-        + (agency_commission or 0)
-        + (mortgage_management_cost or 0)
-        + (mortgage_appraisal_cost or 0)
+    # Identical validated inputs are served from the shared result cache, as long
+    # as neither the engine nor the tax rules (used when tax_year is None) changed
+    cache_key = canonical_key(
+        "real_estate_profitability_calculator",
+        input_data,
+        version=f"{PROFITABILITY_ENGINE_VERSION}:{rules_version()}",
     )
+    cached = tool_result_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    # Compute annual gross rental income
-    annual_gross_rental_income = monthly_rental_income * 12
+    # Evaluate the property as a portfolio of one and unwrap the scalars
+    metrics = _profitability_metrics(_columns_from_records([input_data.to_record()]))
+    metrics = {key: value.item() for key, value in metrics.items()}
 
-    # Compute mortgage financing
-    mortgage_loan_amount = purchase_price * loan_to_value_ratio
-    down_payment = purchase_price - mortgage_loan_amount
-    
-    if mortgage_type == "variable":
-        variable_interest_rate = variable_interest_rate / 100
-        monthly_interest_rate = variable_interest_rate / 12
-    elif mortgage_type == "fixed":
-        fixed_interest_rate = fixed_interest_rate / 100
-        monthly_interest_rate = fixed_interest_rate / 12
-
-    # PMT = Payment: Compute periodic payment for loan based on
-    # constant payments and constant interest rates
-    number_of_payments = loan_term_years * 12  # Monthly payments
-    monthly_mortgage_payment = abs(npf.pmt(
-        monthly_interest_rate, number_of_payments, mortgage_loan_amount
-    ))
-    total_mortgage_payments = number_of_payments * monthly_mortgage_payment
-    total_interest_over_life = total_mortgage_payments - mortgage_loan_amount
-    annual_mortgage_payment = monthly_mortgage_payment * 12
-    
-    # Calculate first year interest expense
-    # (more accurate than dividing total by years)
-    remaining_principal_balance = mortgage_loan_amount
-    first_year_interest_expense = 0
-    
-    for month in range(12):
-        monthly_interest_expense = (
-            remaining_principal_balance * monthly_interest_rate
-        )
-        principal_payment = (
-            monthly_mortgage_payment - monthly_interest_expense
-        )
-        remaining_principal_balance -= principal_payment
-        first_year_interest_expense += monthly_interest_expense
-
-    # Compute annual operating expenses
-    # Property management and maintenance (typically 8-12% of gross rental income)
-    property_management_fee = 0.10 * annual_gross_rental_income
-    
-    total_annual_operating_expenses = (
-        (homeowners_association_fee or 0)
-        + (maintenance_cost or 0)
-        + (property_insurance or 0)
-        + (mortgage_life_insurance or 0)
-        + (rental_protection_insurance or 0)
-        + (property_tax_ibi or 0)
-        + (first_year_interest_expense or 0.0)
-        + (vacancy_allowance or 0)
-    )
-
-    # Compute net operating income (NOI)
-    net_operating_income = annual_gross_rental_income - total_annual_operating_expenses
-    
-    # Calculate depreciation expense
-    # (typically 2-3% of property value annually)
-    annual_depreciation_expense = 0.025 * purchase_price
-    
-    # Tax calculation for rental income in Spain
-    # Rental income is taxed at marginal IRPF rate,
-    # with depreciation deductions allowed
-    taxable_rental_income = (
-        net_operating_income - annual_depreciation_expense
-    )
-    # Only tax positive income
-    income_tax_on_rental = max(0, taxable_rental_income) * irpf_tax
-    
-    net_income_after_taxes = net_operating_income - income_tax_on_rental
-    
-    # Compute profitability metrics
-    gross_rental_yield = annual_gross_rental_income / total_acquisition_cost
-    net_rental_yield_conservative = (
-        net_income_after_taxes / total_acquisition_cost
-    )
-    net_rental_yield_optimistic = (
-        (net_income_after_taxes + (vacancy_allowance or 0) +
-         maintenance_cost) / total_acquisition_cost
-    )
-    
-    # Cash flow analysis
-    # Principal payment = total mortgage payment - interest payment
-    annual_principal_payment = (
-        annual_mortgage_payment - first_year_interest_expense
-    )
-    
-    # Cash flow = money remaining after paying mortgage principal
-    annual_cash_flow_conservative = (
-        net_income_after_taxes - annual_principal_payment
-    )
-    annual_cash_flow_optimistic = (
-        annual_cash_flow_conservative +
-        (vacancy_allowance or 0) + maintenance_cost
-    )
-    
-    # ROCE (Return on Capital Employed)
-    total_upfront_cost = total_acquisition_cost - mortgage_loan_amount
-    roce_conservative = (
-        annual_cash_flow_conservative / total_upfront_cost
-    )
-    roce_optimistic = (
-        annual_cash_flow_optimistic / total_upfront_cost
-    )
-    
     # Return comprehensive analysis results
-    return [
+    return tool_result_cache.set(cache_key, [
         {
             "analysis_category": "Property Acquisition Analysis",
-            "purchase_price": purchase_price,
-            "itp_tax_amount": itp_to_pay,
-            "total_acquisition_cost": total_acquisition_cost,
-            "down_payment": down_payment,
-            "mortgage_loan_amount": mortgage_loan_amount
+            "purchase_price": input_data.purchase_price,
+            "itp_tax_amount": metrics["itp_tax_amount"],
+            "total_acquisition_cost": metrics["total_acquisition_cost"],
+            "down_payment": metrics["down_payment"],
+            "mortgage_loan_amount": metrics["mortgage_loan_amount"]
         },
         {
             "analysis_category": "Annual Income & Operating Expenses",
-            "annual_gross_rental_income": annual_gross_rental_income,
-            "first_year_interest_expense": first_year_interest_expense,
-            "total_annual_operating_expenses": total_annual_operating_expenses,
-            "net_operating_income": net_operating_income,
-            "income_tax_on_rental": income_tax_on_rental,
-            "net_income_after_taxes": net_income_after_taxes
+            "annual_gross_rental_income": metrics["annual_gross_rental_income"],
+            "first_year_interest_expense": metrics["first_year_interest_expense"],
+            "total_annual_operating_expenses": metrics["total_annual_operating_expenses"],
+            "net_operating_income": metrics["net_operating_income"],
+            "income_tax_on_rental": metrics["income_tax_on_rental"],
+            "net_income_after_taxes": metrics["net_income_after_taxes"]
         },
         {
             "analysis_category": "Mortgage Financing Details",
-            "monthly_mortgage_payment": monthly_mortgage_payment,
-            "annual_mortgage_payment": annual_mortgage_payment,
-            "first_year_interest_expense": first_year_interest_expense, #Or yearly interest for fixed rates
-            "annual_principal_payment": annual_principal_payment,
+            "monthly_mortgage_payment": metrics["monthly_mortgage_payment"],
+            "annual_mortgage_payment": metrics["annual_mortgage_payment"],
+            "first_year_interest_expense": metrics["first_year_interest_expense"], #Or yearly interest for fixed rates
+            "annual_principal_payment": metrics["annual_principal_payment"],
         },
         {
             "analysis_category": "Profitability Metrics",
-            "gross_rental_yield": gross_rental_yield,
-            "net_rental_yield_conservative": net_rental_yield_conservative,
-            "net_rental_yield_optimistic": net_rental_yield_optimistic,
-            "annual_cash_flow_conservative": annual_cash_flow_conservative,
-            "annual_cash_flow_optimistic": annual_cash_flow_optimistic,
-            "roce_conservative": roce_conservative,
-            "roce_optimistic": roce_optimistic
+            "gross_rental_yield": metrics["gross_rental_yield"],
+            "net_rental_yield_conservative": metrics["net_rental_yield_conservative"],
+            "net_rental_yield_optimistic": metrics["net_rental_yield_optimistic"],
+            "annual_cash_flow_conservative": metrics["annual_cash_flow_conservative"],
+            "annual_cash_flow_optimistic": metrics["annual_cash_flow_optimistic"],
+            "roce_conservative": metrics["roce_conservative"],
+            "roce_optimistic": metrics["roce_optimistic"]
         },
         {
             "analysis_category": "Cash Flow Analysis",
-            "annual_cash_flow_conservative": annual_cash_flow_conservative,
-            "annual_cash_flow_optimistic": annual_cash_flow_optimistic
+            "annual_cash_flow_conservative": metrics["annual_cash_flow_conservative"],
+            "annual_cash_flow_optimistic": metrics["annual_cash_flow_optimistic"]
         }
-    ]
\ No newline at end of file
+    ])
+
+
+def real_estate_portfolio_calculator(
+    properties: Union[
+        Sequence[RealEstateProfitabilityInput], Sequence[RealEstateRecord], np.ndarray, Mapping[str, Any]
+    ],
+) -> dict:
+    """
+    Evaluate the profitability of N properties at once.
+
+    Portfolio counterpart of `real_estate_profitability_calculator` for
+    screening jobs: every metric is computed as a vectorized NumPy operation
+    over the whole portfolio instead of one tool call per property.
+
+    Args:
+        properties: Either a sequence of validated RealEstateProfitabilityInput
+            models, a sequence of RealEstateRecord (or the array returned by
+            `real_estate_records`), or a mapping of column name -> array-like
+            with one entry per property. Columns use the
+            RealEstateProfitabilityInput field names; optional cost columns
+            may be omitted or contain NaN to use the same defaults as the
+            model validator. Records skip validation and are the fastest
+            input for repeated batch runs.
+
+    Returns:
+        Dictionary mapping each metric name (itp_tax_amount,
+        monthly_mortgage_payment, first_year_interest_expense,
+        net_operating_income, income_tax_on_rental, gross_rental_yield,
+        annual_cash_flow_conservative, roce_conservative, ...) to a NumPy
+        array with one value per property.
+
+    Example:
+        >>> result = real_estate_portfolio_calculator({
+        ...     "purchase_price": [150000, 200000],
+        ...     "autonomous_community": ["Comunidad de Madrid", "Cataluña"],
+        ...     "renovation_cost": [30000, 8000],
+        ...     "monthly_rental_income": [1000, 1000],
+        ...     "annual_gross_salary": [38928, 35000],
+        ...     "loan_term_years": [25, 20],
+        ...     "mortgage_type": ["fixed", "variable"],
+        ...     "fixed_interest_rate": [2.5, np.nan],
+        ...     "mortgage_margin": [np.nan, 1.5],
+        ...     "euribor_rate": [np.nan, 2.0],
+        ... })
+        >>> result["gross_rental_yield"]
+    """
+    return _profitability_metrics(_resolve_columns(properties))
+
+
+# Axes accepted by the sensitivity engine, in the order they appear in the grid
+SENSITIVITY_AXES = (
+    "purchase_price",
+    "monthly_rental_income",
+    "interest_rate",
+    "euribor_rate",
+    "loan_to_value_ratio",
+    "loan_term_years",
+)
+
+
+def real_estate_sensitivity_grid(
+    base: RealEstateProfitabilityInput,
+    purchase_price: Optional[Sequence[float]] = None,
+    monthly_rental_income: Optional[Sequence[float]] = None,
+    interest_rate: Optional[Sequence[float]] = None,
+    euribor_rate: Optional[Sequence[float]] = None,
+    loan_to_value_ratio: Optional[Sequence[float]] = None,
+    loan_term_years: Optional[Sequence[int]] = None,
+) -> dict:
+    """
+    Evaluate the profitability engine over the Cartesian grid of parameter ranges.
+
+    Every given range becomes one axis of the grid and the whole grid is
+    computed in a single broadcast pass of the vectorized engine. Parameters
+    left as None keep the value of the base scenario. Defaults derived from
+    the purchase price (notary, registry, agency, IBI) or from the rent
+    (maintenance, vacancy, rental protection insurance) follow the swept
+    values unless they were given explicitly in the base scenario.
+
+    Args:
+        base: Validated base scenario
+        purchase_price: Purchase prices to evaluate
+        monthly_rental_income: Monthly rents to evaluate
+        interest_rate: Fixed annual interest rates (percentage) to evaluate
+        euribor_rate: Euribor rates (percentage) to evaluate; the rate is
+            Euribor + the base mortgage margin
+        loan_to_value_ratio: LTV ratios (decimal) to evaluate
+        loan_term_years: Mortgage terms in years to evaluate
+
+    Returns:
+        Dictionary with:
+        - "dims": names of the swept axes, in grid order
+        - "axes": mapping of axis name -> NumPy array of its values
+        - one dense N-D NumPy array per metric (gross_rental_yield,
+          net_rental_yield_conservative, annual_cash_flow_conservative,
+          roce_conservative, ...) of shape (len(axis_1), ..., len(axis_n))
+
+    Example:
+        >>> grid = real_estate_sensitivity_grid(
+        ...     base, interest_rate=[2.5, 3.5], loan_term_years=[20, 30]
+        ... )
+        >>> grid["roce_conservative"][1, 0]  # 3.5% over 20 years
+    """
+    ranges = {
+        "purchase_price": purchase_price,
+        "monthly_rental_income": monthly_rental_income,
+        "interest_rate": interest_rate,
+        "euribor_rate": euribor_rate,
+        "loan_to_value_ratio": loan_to_value_ratio,
+        "loan_term_years": loan_term_years,
+    }
+    if interest_rate is not None and euribor_rate is not None:
+        raise ValueError("Sweep either 'interest_rate' (fixed) or 'euribor_rate' (variable), not both.")
+    if euribor_rate is not None and base.mortgage_margin is None:
+        raise ValueError("Sweeping 'euribor_rate' requires 'mortgage_margin' in the base scenario.")
+
+    dims = tuple(name for name in SENSITIVITY_AXES if ranges[name] is not None)
+    axes = {name: np.asarray(ranges[name], dtype=float) for name in dims}
+
+    def along(name):
+        # Reshape an axis so it broadcasts along its own grid dimension
+        shape = [1] * len(dims)
+        shape[dims.index(name)] = -1
+        return axes[name].reshape(shape)
+
+    # Scalar base columns broadcast against every axis
+    columns = {
+        key: value[0] for key, value in _columns_from_inputs([base]).items()
+    }
+    defaulted = base._defaulted_fields
+
+    def ratio(name):
+        return default_cost_ratio(name, base.tax_year)
+
+    if "purchase_price" in axes:
+        price = columns["purchase_price"] = along("purchase_price")
+        for name in ("notary_cost", "registry_cost", "agency_commission", "property_tax_ibi"):
+            if name in defaulted:
+                columns[name] = np.trunc(ratio(name) * price)
+
+    if "monthly_rental_income" in axes:
+        rent = columns["monthly_rental_income"] = along("monthly_rental_income")
+        if "maintenance_cost" in defaulted:
+            columns["maintenance_cost"] = ratio("maintenance_cost") * rent * 12
+        if "vacancy_allowance" in defaulted:
+            columns["vacancy_allowance"] = ratio("vacancy_allowance") * 12 * rent
+        if base.has_rental_protection_insurance == "Y":
+            columns["rental_protection_insurance"] = rent * 12 * ratio("rental_protection_insurance")
+
+    if "interest_rate" in axes:
+        columns["interest_rate"] = along("interest_rate") / 100
+    if "euribor_rate" in axes:
+        columns["interest_rate"] = (base.mortgage_margin + along("euribor_rate")) / 100
+    if "loan_to_value_ratio" in axes:
+        columns["loan_to_value_ratio"] = along("loan_to_value_ratio")
+    if "loan_term_years" in axes:
+        columns["loan_term_years"] = along("loan_term_years")
+
+    grid_shape = tuple(axes[name].size for name in dims)
+    metrics = {
+        key: np.broadcast_to(value, grid_shape)
+        for key, value in _profitability_metrics(columns).items()
+    }
+    return {"dims": dims, "axes": axes, **metrics}
+
+
+class RealEstateSensitivityInput(RealEstateProfitabilityInput):
+    """Base scenario plus the parameter ranges to sweep."""
+    purchase_price_range: Optional[List[int]] = Field(
+        None, description="Purchase prices to compare"
+    )
+    monthly_rental_income_range: Optional[List[int]] = Field(
+        None, description="Monthly rents to compare"
+    )
+    interest_rate_range: Optional[List[float]] = Field(
+        None, description="Fixed annual interest rates (percentage) to compare"
+    )
+    euribor_rate_range: Optional[List[float]] = Field(
+        None, description="Euribor rates (percentage) to compare for variable mortgages"
+    )
+    loan_to_value_ratio_range: Optional[List[float]] = Field(
+        None, description="LTV ratios (decimal) to compare"
+    )
+    loan_term_years_range: Optional[List[int]] = Field(
+        None, description="Mortgage terms in years to compare"
+    )
+
+
+# Keep the tool answer small enough for the LLM context
+MAX_SENSITIVITY_COMBINATIONS = 256
+
+SENSITIVITY_REPORTED_METRICS = (
+    "gross_rental_yield",
+    "net_rental_yield_conservative",
+    "net_rental_yield_optimistic",
+    "monthly_mortgage_payment",
+    "annual_cash_flow_conservative",
+    "annual_cash_flow_optimistic",
+    "roce_conservative",
+    "roce_optimistic",
+)
+
+
+@tool(args_schema=RealEstateSensitivityInput)
+def real_estate_sensitivity_analysis(
+    input_data: Optional[RealEstateSensitivityInput] = None, **kwargs,
+) -> list:
+    """
+    Compare the profitability of a Spanish rental property across ranges of
+    purchase price, rent, interest rate (fixed, or Euribor + margin), LTV and
+    mortgage term in a single call.
+
+    Use this tool instead of calling `real_estate_profitability_calculator`
+    once per combination, e.g. "compare 2.5% vs 3.5% over 20 vs 30 years".
+    The base scenario takes the same parameters as
+    `real_estate_profitability_calculator`; each *_range parameter lists the
+    values to compare and every combination is evaluated.
+
+    Returns:
+        List of dictionaries, one per combination, with the swept parameter
+        values and the key profitability metrics (yields, monthly mortgage
+        payment, annual cash flow and ROCE).
+    """
+    if input_data is None:
+        input_data = RealEstateSensitivityInput(**kwargs)
+
+    ranges = {name: getattr(input_data, f"{name}_range") for name in SENSITIVITY_AXES}
+
+    # Reject oversized grids before computing them
+    n_combinations = math.prod(len(values) for values in ranges.values() if values is not None)
+    if n_combinations > MAX_SENSITIVITY_COMBINATIONS:
+        raise ValueError(
+            f"Too many combinations ({n_combinations}); "
+            f"reduce the ranges to at most {MAX_SENSITIVITY_COMBINATIONS} combinations."
+        )
+
+    grid = real_estate_sensitivity_grid(input_data, **ranges)
+
+    dims = grid["dims"]
+    rows = []
+    for index in np.ndindex(*(grid["axes"][name].size for name in dims)):
+        row = {name: grid["axes"][name][i].item() for name, i in zip(dims, index)}
+        row.update({key: grid[key][index].item() for key in SENSITIVITY_REPORTED_METRICS})
+        rows.append(row)
+    return rows
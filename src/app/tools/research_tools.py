@@ -6,28 +6,51 @@ including web search capabilities and content summarization tools.
 
 Some functions in this script are comming from https://github.com/langchain-ai/deep-agents-from-scratch/
 """
+import asyncio
 import os
 from datetime import datetime
 import uuid, base64
 import platform
 
-import httpx
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, ToolMessage
 from langchain_core.tools import InjectedToolArg, InjectedToolCallId, tool
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
-from markdownify import markdownify
 from pydantic import BaseModel, Field
-from tavily import TavilyClient
-from typing_extensions import Annotated, Literal
+from typing_extensions import Annotated, Literal, Optional
 
 from prompts import SUMMARIZE_WEB_SEARCH
 from state import DeepAgentState
-
-# Summarization model 
-summarization_model = init_chat_model(model="openai:gpt-4o-mini")
-tavily_client = TavilyClient()
+from .html_extract import DEFAULT_CONTENT_BUDGET, StreamingHTMLExtractor
+from .lazy_client import LazyClient
+from .page_cache import content_hash, get_page_cache
+from .web_fetch import MAX_CONCURRENT_FETCHES, afetch_page, get_async_client, run_sync
+from .web_search import MAX_CONCURRENT_SEARCHES, SearchLayer
+
+# Summarization model and search backend
+def _default_summarization_model():
+    from langchain.chat_models import init_chat_model
+    return init_chat_model(model="openai:gpt-4o-mini")
+
+def _default_search_backend():
+    from tavily import TavilyClient
+    return TavilyClient()
+
+# Clients are built on first use, so importing this module needs no API keys
+summarization_model = LazyClient(_default_summarization_model)
+search_backend = LazyClient(_default_search_backend)
+# Cached, deduplicating front-end of the search backend
+search_layer = LazyClient(lambda: SearchLayer(search_backend.get()))
+
+def set_summarization_model_provider(provider) -> None:
+    """Build the summarization model with `provider` (e.g. another model or a stub)."""
+    summarization_model.set_provider(provider)
+    structured_summarizer.reset()
+
+def set_search_backend_provider(provider) -> None:
+    """Build the search backend with `provider` (e.g. a local stub instead of Tavily)."""
+    search_backend.set_provider(provider)
+    search_layer.reset()
 
 class Summary(BaseModel):
     """Schema for webpage content summarization."""
@@ -47,6 +70,9 @@ def run_tavily_search(
 ) -> dict:
     """Perform search using Tavily API for a single query.
 
+    Results are cached for an hour and identical queries in flight share
+    one API call (see `SearchLayer`).
+
     Args:
         search_query: Search query to execute
         max_results: Maximum number of results per query
@@ -56,95 +82,228 @@ def run_tavily_search(
     Returns:
         Search results dictionary
     """
-    result = tavily_client.search(
+    return search_layer.get().search(
         search_query,
         max_results=max_results,
+        topic=topic,
         include_raw_content=include_raw_content,
-        topic=topic
     )
 
-    return result
+# Maximum number of summarization calls in flight per search
+MAX_CONCURRENT_SUMMARIES = 4
+
+structured_summarizer = LazyClient(
+    lambda: summarization_model.get().with_structured_output(Summary)
+)
+
+def get_structured_summarizer():
+    """Structured-output summarization runnable, built once and reused by every call."""
+    return structured_summarizer.get()
+
+def _summarization_messages(webpage_content: str) -> list:
+    return [
+        HumanMessage(content=SUMMARIZE_WEB_SEARCH.format(
+            webpage_content=webpage_content, 
+            date=get_today_str()
+        ))
+    ]
+
+def _fallback_summary(webpage_content: str) -> Summary:
+    # Return a basic summary object on failure
+    return Summary(
+        filename="search_result.md",
+        summary=webpage_content[:1000] + "..." if len(webpage_content) > 1000 else webpage_content
+    )
+
+def _cached_summary(digest: str) -> Optional[Summary]:
+    cached = get_page_cache().get_summary(digest)
+    return Summary(filename=cached[0], summary=cached[1]) if cached else None
+
+def _store_summary(digest: str, summary_obj: Summary) -> Summary:
+    get_page_cache().put_summary(digest, summary_obj.filename, summary_obj.summary)
+    return summary_obj
 
 def summarize_webpage_content(webpage_content: str) -> Summary:
     """Summarize webpage content using the configured summarization model.
 
+    Summaries are cached by content hash, so the same content is only
+    summarized once.
+
     Args:
         webpage_content: Raw webpage content to summarize
 
     Returns:
         Summary object with filename and summary
     """
+    digest = content_hash(webpage_content)
+    cached = _cached_summary(digest)
+    if cached is not None:
+        return cached
     try:
-        # Set up structured output model for summarization
-        structured_model = summarization_model.with_structured_output(Summary)
+        summary_obj = get_structured_summarizer().invoke(_summarization_messages(webpage_content))
+    except Exception:
+        return _fallback_summary(webpage_content)
+    return _store_summary(digest, summary_obj)
 
-        # Generate summary
-        summary_and_filename = structured_model.invoke([
-            HumanMessage(content=SUMMARIZE_WEB_SEARCH.format(
-                webpage_content=webpage_content, 
-                date=get_today_str()
-            ))
-        ])
+async def asummarize_webpage_content(webpage_content: str) -> Summary:
+    """Async version of `summarize_webpage_content`.
 
-        return summary_and_filename
+    Args:
+        webpage_content: Raw webpage content to summarize
 
-    except Exception:
-        # Return a basic summary object on failure
-        return Summary(
-            filename="search_result.md",
-            summary=webpage_content[:1000] + "..." if len(webpage_content) > 1000 else webpage_content
+    Returns:
+        Summary object with filename and summary
+    """
+    digest = content_hash(webpage_content)
+    # SQLite calls run in a worker thread, off the event loop
+    cached = await asyncio.to_thread(_cached_summary, digest)
+    if cached is not None:
+        return cached
+    try:
+        summary_obj = await get_structured_summarizer().ainvoke(
+            _summarization_messages(webpage_content)
         )
+    except Exception:
+        return _fallback_summary(webpage_content)
+    return await asyncio.to_thread(_store_summary, digest, summary_obj)
+
+def _uniquify_filename(summary_obj: Summary) -> Summary:
+    uid = base64.urlsafe_b64encode(uuid.uuid4().bytes).rstrip(b"=").decode("ascii")[:8]
+    name, ext = os.path.splitext(summary_obj.filename)
+    summary_obj.filename = f"{name}_{uid}{ext}"
+    return summary_obj
 
 # This is the favourite way to process search results for langchain (although optional)
-# Use HTTPX client -> read url -> convert to md -> return process results
-def process_search_results(results: dict) -> list[dict]:
+# Each url runs its own pipeline: fetch with the pooled client -> convert to md -> summarize,
+# so a page is summarized as soon as it arrives while the others are still downloading
+async def aprocess_search_results(
+    results: dict,
+    max_concurrent_fetches: int = MAX_CONCURRENT_FETCHES,
+    max_concurrent_summaries: int = MAX_CONCURRENT_SUMMARIES,
+    max_content_chars: int = DEFAULT_CONTENT_BUDGET,
+) -> list[dict]:
     """Process search results by summarizing content where available.
 
+    All result URLs are fetched concurrently through the shared, pooled
+    HTTP client, with per-request timeouts and size caps, and every page is
+    summarized as soon as it has been fetched. Pages and summaries are
+    cached (see `page_cache`): a page already summarized costs no network
+    request while fresh, and no LLM call while its content is unchanged.
+
     Args:
         results: Tavily search results dictionary
+        max_concurrent_fetches: Maximum number of HTTP requests in flight
+        max_concurrent_summaries: Maximum number of summarization calls in flight
+        max_content_chars: Budget of visible characters kept per page; the
+            rest of the page is neither downloaded nor summarized
 
     Returns:
-        List of processed results with summaries
+        List of processed results with summaries, in the order of the search results
     """
-    processed_results = []
-
-    # Create a client for HTTP requests
-    HTTPX_CLIENT = httpx.Client()
-
-    for result in results.get('results', []):
-
-        # Get url 
-        url = result['url']
-
-        # Read url
-        response = HTTPX_CLIENT.get(url)
-
-        if response.status_code == 200:
-            # Convert HTML to markdown
-            raw_content = markdownify(response.text)
-            summary_obj = summarize_webpage_content(raw_content)
+    client = get_async_client()
+    fetch_semaphore = asyncio.Semaphore(max_concurrent_fetches)
+    summary_semaphore = asyncio.Semaphore(max_concurrent_summaries)
+    page_cache = get_page_cache()
+
+    async def read_page(url: str) -> Optional[str]:
+        """Markdown content of a page, from the cache when it is fresh or not modified."""
+        # SQLite calls run in a worker thread, off the event loop
+        cached = await asyncio.to_thread(page_cache.get_page, url)
+        if cached is not None and cached.fresh:
+            return cached.content
+
+        # The body is parsed while it downloads, without boilerplate, and the
+        # download stops once the content budget is reached
+        extractor = StreamingHTMLExtractor(max_content_chars)
+        async with fetch_semaphore:
+            page = await afetch_page(
+                url,
+                client,
+                headers=cached.revalidation_headers() if cached else None,
+                on_text=extractor.feed,
+            )
+        if page.status_code == 304 and cached is not None:
+            await asyncio.to_thread(page_cache.refresh_page, url)
+            return cached.content
+        if page.status_code != 200:
+            return None
+
+        # Convert the kept HTML to markdown
+        raw_content = extractor.markdown()
+        await asyncio.to_thread(page_cache.put_page, url, raw_content, page.etag, page.last_modified)
+        return raw_content
+
+    async def process(result: dict) -> dict:
+        raw_content = await read_page(result['url'])
+
+        if raw_content is not None:
+            # Summaries of already seen content come from the cache
+            async with summary_semaphore:
+                summary_obj = await asummarize_webpage_content(raw_content)
         else:
             # Use Tavily's generated summary
-            raw_content = result.get('raw_content', '')
+            raw_content = (result.get('raw_content') or '')[:max_content_chars]
             summary_obj = Summary(
                 filename="URL_error.md",
                 summary=result.get('content', 'Error reading URL; try another search.')
             )
+        summary_obj = _uniquify_filename(summary_obj)
 
-        # uniquify file names
-        uid = base64.urlsafe_b64encode(uuid.uuid4().bytes).rstrip(b"=").decode("ascii")[:8]
-        name, ext = os.path.splitext(summary_obj.filename)
-        summary_obj.filename = f"{name}_{uid}{ext}"
-
-        processed_results.append({
+        return {
             'url': result['url'],
             'title': result['title'],
             'summary': summary_obj.summary,
             'filename': summary_obj.filename,
             'raw_content': raw_content,
-        })
+        }
+
+    return list(await asyncio.gather(*(process(result) for result in results.get('results', []))))
+
+def process_search_results(results: dict) -> list[dict]:
+    """Synchronous version of `aprocess_search_results` for existing callers.
+
+    Args:
+        results: Tavily search results dictionary
+
+    Returns:
+        List of processed results with summaries
+    """
+    return run_sync(aprocess_search_results(results))
+
+def _save_search_results(query: str, processed_results: list[dict], files: dict) -> str:
+    """Save each processed result to `files` and return the minimal summary for the agent."""
+    saved_files = []
+    summaries = []
+
+    for i, result in enumerate(processed_results):
+        # Use the AI-generated filename from summarization
+        filename = result['filename']
+
+        # Create file content with full details
+        file_content = f"""# Search Result: {result['title']}
+
+**URL:** {result['url']}
+**Query:** {query}
+**Date:** {get_today_str()}
+
+## Summary
+{result['summary']}
+
+## Raw Content
+{result['raw_content'] if result['raw_content'] else 'No raw content available'}
+"""
+
+        files[filename] = file_content
+        saved_files.append(filename)
+        summaries.append(f"- {filename}: {result['summary']}...")
+
+    # Create minimal summary for tool message - focus on what was collected
+    return f"""🔍 Found {len(processed_results)} result(s) for '{query}':
 
-    return processed_results
+{chr(10).join(summaries)}
+
+Files: {', '.join(saved_files)}
+💡 Use read_file() to access full details when needed."""
 
 @tool(parse_docstring=True)
 def tavily_search(
@@ -180,46 +339,67 @@ def tavily_search(
     # Process and summarize results
     processed_results = process_search_results(search_results)
 
-    # Save each result to a file and prepare summary
-    files = state.get("files", {})
-    saved_files = []
-    summaries = []
+    # Only the new files are returned; the files reducer merges them into the state
+    files = {}
+    summary_text = _save_search_results(query, processed_results, files)
 
-    for i, result in enumerate(processed_results):
-        # Use the AI-generated filename from summarization
-        filename = result['filename']
-
-        # Create file content with full details
-        file_content = f"""# Search Result: {result['title']}
+    return Command(
+        update={
+            "files": files,
+            "messages": [
+                ToolMessage(summary_text, tool_call_id=tool_call_id)
+            ],
+        }
+    )
 
-**URL:** {result['url']}
-**Query:** {query}
-**Date:** {get_today_str()}
+@tool(parse_docstring=True)
+def tavily_search_many(
+    queries: list[str],
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    max_results: Annotated[int, InjectedToolArg] = 1,
+    topic: Annotated[Literal["general", "news", "finance"], InjectedToolArg] = "general",
+) -> Command:
+    """Run several web searches at once and save detailed results to files.
 
-## Summary
-{result['summary']}
+    Use it instead of several tavily_search calls when you already know all the
+    queries you need: they are searched, fetched and summarized concurrently.
+    Returns only essential information to help the agent decide on next steps.
 
-## Raw Content
-{result['raw_content'] if result['raw_content'] else 'No raw content available'}
-"""
+    Args:
+        queries: Search queries to execute
+        state: Injected agent state for file storage
+        tool_call_id: Injected tool call identifier
+        max_results: Maximum number of results per query (default: 1)
+        topic: Topic filter - 'general', 'news', or 'finance' (default: 'general')
 
-        files[filename] = file_content
-        saved_files.append(filename)
-        summaries.append(f"- {filename}: {result['summary']}...")
+    Returns:
+        Command that saves full results to files and provides minimal summary
+    """
+    async def run() -> list[list[dict]]:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
 
-    # Create minimal summary for tool message - focus on what was collected
-    summary_text = f"""🔍 Found {len(processed_results)} result(s) for '{query}':
+        # Each query is searched, then its pages fetched and summarized, independently
+        async def search_and_process(query: str) -> list[dict]:
+            async with semaphore:
+                search_results = await search_layer.get().asearch(
+                    query, max_results=max_results, topic=topic, include_raw_content=True
+                )
+                return await aprocess_search_results(search_results)
 
-{chr(10).join(summaries)}
+        return list(await asyncio.gather(*(search_and_process(query) for query in queries)))
 
-Files: {', '.join(saved_files)}
-💡 Use read_file() to access full details when needed."""
+    files = {}
+    summary_texts = [
+        _save_search_results(query, processed_results, files)
+        for query, processed_results in zip(queries, run_sync(run()))
+    ]
 
     return Command(
         update={
             "files": files,
             "messages": [
-                ToolMessage(summary_text, tool_call_id=tool_call_id)
+                ToolMessage("\n\n".join(summary_texts), tool_call_id=tool_call_id)
             ],
         }
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,226 @@
+"""
+Memoization of deterministic tool results.
+
+Tools such as `compound_interest_calculator` and
+`real_estate_profitability_calculator` are pure functions of their validated
+inputs, so their results can be reused whenever the same arguments come
+back, within a conversation or across users.
+
+Results are keyed by a SHA-256 hash of the canonical JSON of the inputs and
+stored as JSON text, which bounds the memory footprint (entries and bytes)
+and makes every hit return a fresh copy. An optional SQLite file lets warm
+results survive process restarts.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from pydantic import BaseModel
+
+
+def canonical_key(namespace: str, inputs: Union[BaseModel, dict], version: str = "") -> str:
+    """
+    Canonical hash of a tool call.
+
+    Args:
+        namespace (str): Tool name, so different tools never share entries
+        inputs: Validated input model or dictionary of arguments
+        version (str): Version of everything else the result depends on (engine
+            code, tax rules...), so that changing it invalidates stored results
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    if isinstance(inputs, BaseModel):
+        inputs = inputs.model_dump(mode="json")
+    payload = json.dumps(
+        [namespace, version, inputs], sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteResultStore:
+    """On-disk store of JSON results, shared by every process using the same file."""
+
+    def __init__(self, path: Union[str, Path], max_entries: int = 100_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[str]:
+        """JSON text stored under `key`, or None if missing or older than `ttl` seconds."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (ttl is not None and time.time() - row[1] > ttl):
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            # Keep the newest entries only
+            self._connection.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with time-to-live for JSON-serializable results.
+
+    Args:
+        maxsize (int): Maximum number of entries kept in memory
+        max_bytes (int): Maximum total size of the stored JSON text
+        ttl (float, optional): Seconds an entry stays valid (default: forever)
+        store (SQLiteResultStore, optional): Persistent second level, read on
+            memory misses and written on every `set`
+
+    Example:
+        >>> cache = ResultCache(maxsize=256, ttl=3600)
+        >>> key = canonical_key("my_tool", {"x": 1})
+        >>> if (result := cache.get(key)) is None:
+        ...     result = cache.set(key, compute())
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl: Optional[float] = None,
+        store: Optional[SQLiteResultStore] = None,
+    ):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store = store
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        """Cached result for `key` (a fresh copy), or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and now - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[0])
+
+        text = self.store.get(key, self.ttl) if self.store is not None else None
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._insert(key, text, now)
+        return json.loads(text)
+
+    def set(self, key: str, value: Any) -> Any:
+        """Store a JSON-serializable result and return it unchanged."""
+        text = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            self._insert(key, text, time.monotonic())
+        if self.store is not None:
+            self.store.set(key, text)
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry (memory and disk) and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.disk_hits = self.evictions = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current footprint."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _insert(self, key: str, text: str, now: float) -> None:
+        if key in self._entries:
+            self._remove(key)
+        if len(text) > self.max_bytes:
+            return
+        self._entries[key] = (text, now)
+        self._bytes += len(text)
+        while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        text, _ = self._entries.pop(key)
+        self._bytes -= len(text)
+
+
+# Shared cache of the deterministic calculator tools
+tool_result_cache = ResultCache(maxsize=1024, ttl=24 * 3600)
+
+
+def configure_tool_result_cache(
+    maxsize: int = 1024,
+    max_bytes: int = 16 * 1024 * 1024,
+    ttl: Optional[float] = 24 * 3600,
+    path: Optional[Union[str, Path]] = None,
+) -> ResultCache:
+    """
+    Reconfigure the shared tool cache, e.g. to persist results in a SQLite file.
+
+    Existing entries are discarded.
+    """
+    cache = tool_result_cache
+    if cache.store is not None:
+        cache.store.close()
+    with cache._lock:
+        cache.maxsize = maxsize
+        cache.max_bytes = max_bytes
+        cache.ttl = ttl
+        cache.store = SQLiteResultStore(path) if path is not None else None
+        cache._entries.clear()
+        cache._bytes = 0
+    return cache
@@ -3,17 +3,136 @@ Task delegation tools for context isolation through sub-agents.
 Some functions in this script are comming from https://github.com/langchain-ai/deep-agents-from-scratch/
 """
 
-from typing import Annotated, NotRequired
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Annotated, Callable, NotRequired, Optional, Union
+from weakref import WeakKeyDictionary
 from typing_extensions import TypedDict
 
 from langchain_core.messages import ToolMessage
-from langchain_core.tools import BaseTool, InjectedToolCallId, tool
-from langgraph.prebuilt import InjectedState, create_react_agent
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import merge_configs
+from langchain_core.tools import BaseTool, InjectedToolCallId, StructuredTool, tool
+from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 
-from prompts import TASK_DESCRIPTION_PREFIX
+from agent_factory import AgentRegistry
+from file_store import as_file_map
+from prompts import TASK_BATCH_DESCRIPTION_PREFIX, TASK_DESCRIPTION_PREFIX
 from state import DeepAgentState
 
+# Sub-agent runs allowed at the same time, by default
+MAX_CONCURRENT_SUBAGENTS = 4
+
+
+class ConcurrencyLimiter:
+    """
+    Bound on the number of sub-agents running at the same time.
+
+    Shared by several tools, it caps their calls together, whether they run in
+    the tool node's threads (`invoke`/`stream`) or in its event loop
+    (`ainvoke`/`astream`).
+
+    Args:
+        max_concurrency (int): Maximum number of concurrent runs
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_SUBAGENTS):
+        self.max_concurrency = max_concurrency
+        self._threads = threading.BoundedSemaphore(max_concurrency)
+        # asyncio semaphores belong to one event loop
+        self._loops: WeakKeyDictionary = WeakKeyDictionary()
+
+    @contextmanager
+    def slot(self):
+        with self._threads:
+            yield
+
+    @asynccontextmanager
+    async def aslot(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._loops.get(loop)
+        if semaphore is None:
+            semaphore = self._loops[loop] = asyncio.Semaphore(self.max_concurrency)
+        async with semaphore:
+            yield
+
+
+def _subagent_config(config: Optional[RunnableConfig], agent_name: str) -> RunnableConfig:
+    """Caller's config for a sub-agent run, with the agent appended to the "agent_path" metadata."""
+    config = config or {}
+    path = tuple((config.get("metadata") or {}).get("agent_path", ()))
+    return merge_configs(config, {"metadata": {"agent_path": (*path, agent_name)}})
+
+
+def subagent_tool(
+    agent: Union[Runnable, Callable[[], Runnable]],
+    name: str,
+    description: str,
+    limiter: Optional[ConcurrencyLimiter] = None,
+    agent_name: Optional[str] = None,
+) -> StructuredTool:
+    """
+    Wrap a sub-agent graph as a tool that returns its final answer.
+
+    `agent` is the graph or a function returning it (e.g.
+    `lambda: registry.get("financial_agent")`), called on each run, so that
+    the sub-agent is only compiled when the tool is first used.
+
+    The tool has a sync and an async implementation, so an agent run with
+    `ainvoke`/`astream` awaits the sub-agent with `ainvoke` and runs the
+    sub-agents called in the same turn concurrently, within `limiter`.
+
+    The caller's config (callbacks, tracing, streaming) is passed on, so the
+    sub-agent's tokens and tool calls show up in the caller's stream with
+    `subgraphs=True`. Its metadata gets the path of nested agent names under
+    "agent_path", which `streaming.AgentStream` uses to label events.
+    """
+    limiter = limiter or ConcurrencyLimiter()
+    get_agent = (lambda: agent) if isinstance(agent, Runnable) else agent
+    agent_name = agent_name or getattr(agent, "name", None) or name
+
+    def run(request: str, config: RunnableConfig) -> str:
+        with limiter.slot():
+            result = get_agent().invoke(
+                {"messages": [{"role": "user", "content": request}]}, _subagent_config(config, agent_name)
+            )
+        return result["messages"][-1].content
+
+    async def arun(request: str, config: RunnableConfig) -> str:
+        async with limiter.aslot():
+            result = await get_agent().ainvoke(
+                {"messages": [{"role": "user", "content": request}]}, _subagent_config(config, agent_name)
+            )
+        return result["messages"][-1].content
+
+    return StructuredTool.from_function(
+        func=run, coroutine=arun, name=name, description=description
+    )
+
+
+def scoped_subagent_state(description: str, state: dict, file_patterns: Optional[list[str]]) -> dict:
+    """
+    Input state of a sub-agent: its task and the parent files it was given.
+
+    Args:
+        description: Task of the sub-agent, its only message
+        state: Parent state (not modified)
+        file_patterns: Paths or glob patterns of the files to share; None shares them all
+    """
+    files = as_file_map(state.get("files"))
+    if file_patterns is not None:
+        files = files.select(file_patterns)
+    return {"messages": [{"role": "user", "content": description}], "files": files}
+
+
+def changed_files(sub_state: dict, result: dict) -> dict:
+    """File delta of a sub-agent run: the files it wrote or deleted, for the parent's reducer."""
+    return as_file_map(result.get("files")).diff(sub_state["files"])
+
+
 class SubAgent(TypedDict):
     """Configuration for a specialized sub-agent."""
 
@@ -22,24 +141,18 @@ class SubAgent(TypedDict):
     prompt: str
     tools: NotRequired[list[str]]
 
-# Routine that will generate sub-agents as tools
-def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
-    """Create a task delegation tool that enables context isolation through sub-agents.
 
-    This function implements the core pattern for spawning specialized sub-agents with
-    isolated contexts, preventing context clash and confusion in complex multi-step tasks.
+class DelegatedTask(TypedDict):
+    """One task of a `task_batch` call."""
 
-    Args:
-        tools: List of available tools that can be assigned to sub-agents
-        subagents: List of specialized sub-agent configurations
-        model: The language model to use for all agents
-        state_schema: The state schema (typically DeepAgentState)
+    subagent_type: str
+    description: str
+    files: NotRequired[list[str]]
 
-    Returns:
-        A 'task' tool that can delegate work to specialized sub-agents
-    """
-    # Create agent registry
-    agents = {}
+
+def _register_subagents(tools, subagents: list[SubAgent], model, state_schema) -> AgentRegistry:
+    """Registry of the configured sub-agents; each one is compiled on its first delegation."""
+    agents = AgentRegistry()
 
     # Build tool name mapping for selective tool assignment
     tools_by_name = {}
@@ -48,7 +161,7 @@ def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
             tool_ = tool(tool_)
         tools_by_name[tool_.name] = tool_
 
-    # Create specialized sub-agents based on configurations
+    # Register specialized sub-agents based on configurations
     for _agent in subagents:
         if "tools" in _agent:
             # Use specific tools if specified
@@ -56,9 +169,29 @@ def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
         else:
             # Default to all tools
             _tools = tools
-        agents[_agent["name"]] = create_react_agent(
-            model, prompt=_agent["prompt"], tools=_tools, state_schema=state_schema
-        ).with_config({"recursion_limit": 20})
+        agents.register(
+            _agent["name"], _agent["prompt"], _tools, model=model, state_schema=state_schema
+        )
+    return agents
+
+# Routine that will generate sub-agents as tools
+def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
+    """Create a task delegation tool that enables context isolation through sub-agents.
+
+    This function implements the core pattern for spawning specialized sub-agents with
+    isolated contexts, preventing context clash and confusion in complex multi-step tasks.
+
+    Args:
+        tools: List of available tools that can be assigned to sub-agents
+        subagents: List of specialized sub-agent configurations
+        model: The language model to use for all agents
+        state_schema: The state schema (typically DeepAgentState)
+
+    Returns:
+        A 'task' tool that can delegate work to specialized sub-agents
+    """
+    # Create agent registry; each sub-agent is compiled on its first delegation
+    agents = _register_subagents(tools, subagents, model, state_schema)
 
     # Generate description of available sub-agents for the tool description
     other_agents_string = [
@@ -71,30 +204,34 @@ def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
         subagent_type: str,
         state: Annotated[DeepAgentState, InjectedState],
         tool_call_id: Annotated[str, InjectedToolCallId],
+        config: RunnableConfig,
+        files: Optional[list[str]] = None,
     ):
         """Delegate a task to a specialized sub-agent with isolated context.
 
-        This creates a fresh context for the sub-agent containing only the task description,
-        preventing context pollution from the parent agent's conversation history.
+        This creates a fresh context for the sub-agent containing only the task description
+        and the parent's files (only the requested ones when `files` is given), preventing
+        context pollution from the parent agent's conversation history.
         """
         # Validate requested agent type exists
         if subagent_type not in agents:
-            return f"Error: invoked agent of type {subagent_type}, the only allowed types are {[f'`{k}`' for k in agents]}"
+            return f"Error: invoked agent of type {subagent_type}, the only allowed types are {[f'`{k}`' for k in agents.names()]}"
 
         # Get the requested sub-agent
-        sub_agent = agents[subagent_type]
+        sub_agent = agents.get(subagent_type).with_config({"recursion_limit": 20})
 
-        # Create isolated context with only the task description
-        # This is the key to context isolation - no parent history
-        state["messages"] = [{"role": "user", "content": description}]
+        # Create isolated context with only the task description and the (selected) files
+        # This is the key to context isolation - no parent history, and the parent state is left untouched
+        sub_state = scoped_subagent_state(description, state, files)
 
-        # Execute the sub-agent in isolation
-        result = sub_agent.invoke(state)
+        # Execute the sub-agent in isolation; the caller's config carries the
+        # streaming callbacks and the agent path
+        result = sub_agent.invoke(sub_state, _subagent_config(config, subagent_type))
 
         # Return results to parent agent via Command state update
         return Command(
             update={
-                "files": result.get("files", {}),  # Merge any file changes
+                "files": changed_files(sub_state, result),  # Only the files the sub-agent changed
                 "messages": [
                     # Sub-agent result becomes a ToolMessage in parent context
                     ToolMessage(
@@ -104,4 +241,104 @@ def _create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
             }
         )
 
-    return task
\ No newline at end of file
+    return task
+
+
+def _create_task_batch_tool(
+    tools,
+    subagents: list[SubAgent],
+    model,
+    state_schema,
+    max_concurrency: int = MAX_CONCURRENT_SUBAGENTS,
+):
+    """Create a tool that delegates several independent tasks at once.
+
+    The tasks run concurrently (at most `max_concurrency` at a time), each in its own
+    isolated context as with the 'task' tool. Their file changes are merged into a single
+    state update in the order of the tasks, so when two tasks write the same file the
+    later one wins, whatever order they finish in.
+
+    Args:
+        tools: List of available tools that can be assigned to sub-agents
+        subagents: List of specialized sub-agent configurations
+        model: The language model to use for all agents
+        state_schema: The state schema (typically DeepAgentState)
+        max_concurrency: Maximum number of sub-agents running at the same time
+
+    Returns:
+        A 'task_batch' tool that delegates a list of tasks to specialized sub-agents
+    """
+    agents = _register_subagents(tools, subagents, model, state_schema)
+    limiter = ConcurrencyLimiter(max_concurrency)
+    other_agents_string = [
+        f"- {_agent['name']}: {_agent['description']}" for _agent in subagents
+    ]
+
+    def prepare(task: DelegatedTask, state: dict, config: RunnableConfig):
+        """(sub-agent, input state, config) of a task; compiles the sub-agent on first use."""
+        if task["subagent_type"] not in agents:
+            raise ValueError(f"invoked agent of type {task['subagent_type']}, the only allowed types are {[f'`{k}`' for k in agents.names()]}")
+        sub_agent = agents.get(task["subagent_type"]).with_config({"recursion_limit": 20})
+        sub_state = scoped_subagent_state(task["description"], state, task.get("files"))
+        return sub_agent, sub_state, _subagent_config(config, task["subagent_type"])
+
+    def merge(tasks: list[DelegatedTask], outcomes: list, tool_call_id: str) -> Command:
+        """Single state update with the file deltas merged in task order and all answers."""
+        files, answers = {}, []
+        for i, (task, (sub_state, outcome)) in enumerate(zip(tasks, outcomes), 1):
+            if isinstance(outcome, BaseException):
+                answer = f"Error: {type(outcome).__name__}: {outcome}"
+            else:
+                files.update(changed_files(sub_state, outcome))
+                answer = outcome["messages"][-1].content
+            answers.append(f"## Task {i} ({task['subagent_type']})\n{answer}")
+        return Command(
+            update={
+                "files": files,
+                "messages": [ToolMessage("\n\n".join(answers), tool_call_id=tool_call_id)],
+            }
+        )
+
+    def run_batch(
+        tasks: list[DelegatedTask],
+        state: Annotated[DeepAgentState, InjectedState],
+        tool_call_id: Annotated[str, InjectedToolCallId],
+        config: RunnableConfig,
+    ) -> Command:
+        def run_one(task):
+            # Any failure, building the sub-agent included, becomes this task's answer
+            try:
+                sub_agent, sub_state, sub_config = prepare(task, state, config)
+                with limiter.slot():
+                    return sub_state, sub_agent.invoke(sub_state, sub_config)
+            except Exception as exc:
+                return None, exc
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(tasks), max_concurrency))) as executor:
+            outcomes = list(executor.map(run_one, tasks))
+        return merge(tasks, outcomes, tool_call_id)
+
+    async def arun_batch(
+        tasks: list[DelegatedTask],
+        state: Annotated[DeepAgentState, InjectedState],
+        tool_call_id: Annotated[str, InjectedToolCallId],
+        config: RunnableConfig,
+    ) -> Command:
+        async def run_one(task):
+            # Any failure, building the sub-agent included, becomes this task's answer
+            try:
+                sub_agent, sub_state, sub_config = prepare(task, state, config)
+                async with limiter.aslot():
+                    return sub_state, await sub_agent.ainvoke(sub_state, sub_config)
+            except Exception as exc:
+                return None, exc
+
+        outcomes = await asyncio.gather(*(run_one(task) for task in tasks))
+        return merge(tasks, list(outcomes), tool_call_id)
+
+    return StructuredTool.from_function(
+        func=run_batch,
+        coroutine=arun_batch,
+        name="task_batch",
+        description=TASK_BATCH_DESCRIPTION_PREFIX.format(other_agents=other_agents_string),
+    )
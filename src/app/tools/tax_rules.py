@@ -0,0 +1,199 @@
+"""
+Versioned Spanish tax rules for real estate calculations.
+
+Holds, per tax year, the ITP (property transfer tax) rate of every
+autonomous community, the IRPF brackets and the default cost ratios used
+when the user does not provide a cost. A new tax year is added by appending
+an entry to TAX_RULES; a query for a given year uses the latest rules in
+force on or before it.
+
+The rules are compiled once into compact NumPy tables and every lookup is a
+vectorized `searchsorted`, so portfolio and grid evaluations never branch
+per row in Python.
+"""
+
+import hashlib
+import json
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+TAX_RULES = {
+    2025: {
+        # ITP rate by autonomous community, as a percentage
+        "itp_by_community": {
+            "Andalucía": 7.0,
+            "Aragón": 8.0,
+            "Asturias": 8.0,
+            "Islas Baleares": 8.0,
+            "Canarias": 6.5,
+            "Cantabria": 9.0,
+            "Castilla-La Mancha": 9.0,
+            "Castilla y León": 8.0,
+            "Cataluña": 10.0,
+            "Ceuta": 6.0,
+            "Comunidad de Madrid": 6.0,
+            "Comunidad Valenciana": 10.0,
+            "Extremadura": 8.0,
+            "Galicia": 8.0,
+            "La Rioja": 7.0,
+            "Melilla": 6.0,
+            "Murcia": 8.0,
+            "Navarra": 6.0,
+            "País Vasco": 7.0,
+        },
+        # IRPF marginal rate by annual gross salary: (inclusive upper bound, rate).
+        # The last bracket has no upper bound.
+        "irpf_brackets": [
+            (12450, 0.19),
+            (20199, 0.24),
+            (35199, 0.30),
+            (59999, 0.37),
+            (299999, 0.45),
+            (None, 0.47),
+        ],
+        # Default costs as a share of the purchase price
+        "price_cost_ratios": {
+            "notary_cost": 0.02,
+            "registry_cost": 0.002,
+            "agency_commission": 0.02,
+            "property_tax_ibi": 0.001,
+        },
+        # Default costs as a share of the annual gross rental income
+        "rent_cost_ratios": {
+            "maintenance_cost": 0.10,
+            "vacancy_allowance": 0.05,
+            "rental_protection_insurance": 0.05,
+        },
+    },
+}
+
+
+class TaxTables(NamedTuple):
+    """Tax rules compiled into arrays; the first axis of every table is the tax year."""
+    years: np.ndarray                # (n_years,) sorted tax years
+    communities: np.ndarray          # (n_communities,) sorted community names
+    itp_rates: np.ndarray            # (n_years, n_communities) ITP rate as decimal
+    irpf_limits: np.ndarray          # (n_years, n_brackets - 1) inclusive upper bounds
+    irpf_rates: np.ndarray           # (n_years, n_brackets) marginal rates
+    cost_ratio_names: tuple          # names of the default cost ratios
+    cost_ratios: np.ndarray          # (n_years, n_ratios) default cost ratios
+
+
+@lru_cache(maxsize=1)
+def get_tax_tables() -> TaxTables:
+    """Compile TAX_RULES into arrays (done once per process)."""
+    years = sorted(TAX_RULES)
+    communities = sorted(TAX_RULES[years[-1]]["itp_by_community"])
+    cost_ratio_names = tuple(
+        list(TAX_RULES[years[-1]]["price_cost_ratios"])
+        + list(TAX_RULES[years[-1]]["rent_cost_ratios"])
+    )
+
+    n_brackets = max(len(TAX_RULES[year]["irpf_brackets"]) for year in years)
+    itp_rates, irpf_limits, irpf_rates, cost_ratios = [], [], [], []
+    for year in years:
+        rules = TAX_RULES[year]
+        itp_rates.append([
+            rules["itp_by_community"].get(name, np.nan) / 100 for name in communities
+        ])
+        # Pad shorter bracket lists with empty brackets so every year has the same shape
+        limits = [limit for limit, _ in rules["irpf_brackets"][:-1]]
+        rates = [rate for _, rate in rules["irpf_brackets"]]
+        missing = n_brackets - len(rates)
+        irpf_limits.append(limits + [np.inf] * missing)
+        irpf_rates.append(rates + [rates[-1]] * missing)
+        ratios = {**rules["price_cost_ratios"], **rules["rent_cost_ratios"]}
+        cost_ratios.append([ratios[name] for name in cost_ratio_names])
+
+    return TaxTables(
+        years=np.array(years),
+        communities=np.array(communities),
+        itp_rates=np.array(itp_rates),
+        irpf_limits=np.array(irpf_limits, dtype=float),
+        irpf_rates=np.array(irpf_rates),
+        cost_ratio_names=cost_ratio_names,
+        cost_ratios=np.array(cost_ratios),
+    )
+
+
+@lru_cache(maxsize=1)
+def rules_version() -> str:
+    """Hash of TAX_RULES, part of the cache key of every result that depends on them."""
+    payload = json.dumps(TAX_RULES, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _year_index(tables: TaxTables, year) -> np.ndarray:
+    """Index of the rules in force in each year (latest version not after it)."""
+    if year is None:
+        return np.asarray(len(tables.years) - 1)
+    index = np.searchsorted(tables.years, year, side="right") - 1
+    if np.any(index < 0):
+        raise ValueError(f"No tax rules before {tables.years[0]}.")
+    return index
+
+
+def itp_rate(autonomous_community, year: Optional[int] = None) -> np.ndarray:
+    """
+    ITP rate (decimal) of one or many autonomous communities.
+
+    Args:
+        autonomous_community (str or array): Community names
+        year (int or array, optional): Tax year (default: latest rules)
+
+    Returns:
+        np.ndarray: ITP rates with the shape of the inputs
+    """
+    tables = get_tax_tables()
+    names = np.asarray(autonomous_community, dtype=str)
+    index = np.searchsorted(tables.communities, names)
+    found = np.clip(index, 0, len(tables.communities) - 1)
+    unknown = tables.communities[found] != names
+    if np.any(unknown):
+        raise ValueError(
+            f"Autonomous community {names[unknown].flat[0]} "
+            "is not in the list."
+        )
+    rates = tables.itp_rates[_year_index(tables, year), found]
+    if np.any(np.isnan(rates)):
+        raise ValueError("No ITP rate for the requested community and year.")
+    return rates
+
+
+def irpf_rate(annual_gross_salary, year: Optional[int] = None) -> np.ndarray:
+    """
+    IRPF marginal rate for one or many annual gross salaries.
+
+    Args:
+        annual_gross_salary (float or array): Salaries
+        year (int or array, optional): Tax year (default: latest rules)
+
+    Returns:
+        np.ndarray: IRPF rates with the shape of the inputs
+    """
+    tables = get_tax_tables()
+    salary = np.asarray(annual_gross_salary, dtype=float)
+    year_index = _year_index(tables, year)
+    if year_index.ndim == 0:
+        bracket = np.searchsorted(tables.irpf_limits[year_index], salary, side="left")
+        return tables.irpf_rates[year_index][bracket]
+
+    # Different years per row: count the limits below each salary in its own year
+    year_index, salary = np.broadcast_arrays(year_index, salary)
+    bracket = (salary[..., None] > tables.irpf_limits[year_index]).sum(axis=-1)
+    return tables.irpf_rates[year_index, bracket]
+
+
+def default_cost_ratio(name: str, year: Optional[int] = None) -> np.ndarray:
+    """
+    Default ratio of an optional cost.
+
+    Price-based costs (notary_cost, registry_cost, agency_commission,
+    property_tax_ibi) are a share of the purchase price; rent-based costs
+    (maintenance_cost, vacancy_allowance, rental_protection_insurance) are a
+    share of the annual gross rental income.
+    """
+    tables = get_tax_tables()
+    return tables.cost_ratios[_year_index(tables, year), tables.cost_ratio_names.index(name)]
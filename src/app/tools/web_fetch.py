@@ -0,0 +1,180 @@
+"""
+Pooled, concurrent web page fetching for the research tools.
+
+One `httpx.AsyncClient` is shared per event loop, so connections are reused
+across searches and never leaked. Every request has a timeout and a cap on
+the number of bytes read, and the number of requests in flight is bounded.
+Synchronous callers go through `fetch_pages`, which runs the fetches on a
+background event loop owned by this module.
+"""
+
+import asyncio
+import codecs
+import threading
+import weakref
+from typing import Callable, Iterable, NamedTuple, Optional
+
+import httpx
+
+# Per-request limits
+FETCH_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+MAX_CONCURRENT_FETCHES = 8
+
+# Connection pool shared by every fetch on the same event loop
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; research-agent)"}
+
+
+class FetchedPage(NamedTuple):
+    """Result of fetching one URL."""
+    url: str
+    status_code: int            # 0 when the request failed before any response
+    text: str                   # decoded body, at most MAX_PAGE_BYTES of it
+    truncated: bool = False     # True when the body was not read to the end
+    error: Optional[str] = None
+    etag: Optional[str] = None  # validators for conditional requests
+    last_modified: Optional[str] = None
+
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Pooled client of the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=FETCH_TIMEOUT,
+            limits=POOL_LIMITS,
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    """Close the pooled client of the running event loop, if any."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def afetch_page(
+    url: str,
+    client: Optional[httpx.AsyncClient] = None,
+    max_bytes: int = MAX_PAGE_BYTES,
+    headers: Optional[dict] = None,
+    on_text: Optional[Callable[[str], bool]] = None,
+) -> FetchedPage:
+    """
+    Fetch one URL, reading at most `max_bytes` of its body.
+
+    `headers` are added to the request, e.g. If-None-Match for revalidation.
+    When `on_text` is given, the decoded body of a 200 response is passed
+    to it chunk by chunk instead of being accumulated in `text`; reading
+    stops as soon as it returns True (see `html_extract`).
+    Failures (network errors, timeouts, invalid URLs, unknown charsets,
+    errors of `on_text`) are returned as a FetchedPage with `status_code` 0
+    and the error message, never raised, so one bad URL cannot abort the
+    others fetched alongside it.
+    """
+    client = client or get_async_client()
+    try:
+        async with client.stream("GET", url, headers=headers) as response:
+            decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+            consume = on_text if on_text is not None and response.status_code == 200 else None
+            parts, size, truncated = [], 0, False
+            async for chunk in response.aiter_bytes():
+                if size + len(chunk) > max_bytes:
+                    chunk, truncated = chunk[:max_bytes - size], True
+                size += len(chunk)
+                text = decoder.decode(chunk)
+                if consume is None:
+                    parts.append(text)
+                elif consume(text):
+                    truncated = True
+                    break
+                if truncated:
+                    break
+            else:
+                tail = decoder.decode(b"", final=True)
+                if consume is None:
+                    parts.append(tail)
+                else:
+                    consume(tail)
+            return FetchedPage(
+                url,
+                response.status_code,
+                "".join(parts),
+                truncated,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+    except Exception as exc:
+        return FetchedPage(url, 0, "", error=f"{type(exc).__name__}: {exc}")
+
+
+async def afetch_pages(
+    urls: Iterable[str],
+    client: Optional[httpx.AsyncClient] = None,
+    max_concurrency: int = MAX_CONCURRENT_FETCHES,
+    max_bytes: int = MAX_PAGE_BYTES,
+) -> list[FetchedPage]:
+    """
+    Fetch several URLs concurrently.
+
+    Args:
+        urls: URLs to fetch
+        client: HTTP client (default: the pooled client of the running loop)
+        max_concurrency: Maximum number of requests in flight
+        max_bytes: Size cap of each body
+
+    Returns:
+        One FetchedPage per URL, in the order of `urls`
+    """
+    client = client or get_async_client()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(url):
+        async with semaphore:
+            return await afetch_page(url, client, max_bytes)
+
+    return list(await asyncio.gather(*(fetch(url) for url in urls)))
+
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop running in a daemon thread, used by the sync wrappers."""
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="web-fetch-loop", daemon=True
+            ).start()
+            _background_loop = loop
+    return _background_loop
+
+
+def run_sync(coroutine):
+    """
+    Run a coroutine on the background loop and wait for its result.
+
+    Works from plain threads and from code already running inside another
+    event loop, and keeps the pooled client of the background loop alive
+    between calls.
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, _get_background_loop()).result()
+
+
+def fetch_pages(urls: Iterable[str], **kwargs) -> list[FetchedPage]:
+    """Synchronous wrapper of `afetch_pages` for existing callers."""
+    return run_sync(afetch_pages(list(urls), **kwargs))
@@ -0,0 +1,128 @@
+"""
+Caching and batching layer over the web search backend.
+
+`SearchLayer` wraps any backend with a Tavily-like `search` method and adds:
+
+- a TTL cache keyed by (query, topic, max_results, include_raw_content),
+- coalescing of identical queries in flight, so concurrent callers share
+  one backend call,
+- concurrent execution of a list of queries.
+
+The backend is a protocol, so tests and offline runs can plug in a local
+stub instead of the Tavily client.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Literal, Optional, Protocol, Sequence
+
+from .result_cache import ResultCache, canonical_key
+from .web_fetch import run_sync
+
+DEFAULT_SEARCH_TTL = 3600
+MAX_CONCURRENT_SEARCHES = 4
+
+Topic = Literal["general", "news", "finance"]
+
+
+class SearchBackend(Protocol):
+    """Anything with the signature of `TavilyClient.search`."""
+
+    def search(
+        self,
+        query: str,
+        max_results: int = ...,
+        include_raw_content: bool = ...,
+        topic: Topic = ...,
+    ) -> dict:
+        ...
+
+
+class SearchLayer:
+    """
+    Cached, deduplicating search front-end.
+
+    Args:
+        backend: Search backend (e.g. a TavilyClient)
+        ttl (float): Seconds a result is reused
+        maxsize (int): Maximum number of cached results
+    """
+
+    def __init__(
+        self,
+        backend: SearchBackend,
+        ttl: Optional[float] = DEFAULT_SEARCH_TTL,
+        maxsize: int = 512,
+    ):
+        self.backend = backend
+        self.cache = ResultCache(maxsize=maxsize, ttl=ttl)
+        self._in_flight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def search(
+        self,
+        query: str,
+        max_results: int = 1,
+        topic: Topic = "general",
+        include_raw_content: bool = True,
+    ) -> dict:
+        """Search results of one query, from the cache or from the backend."""
+        key = canonical_key("web_search", {
+            "query": query.strip(),
+            "max_results": max_results,
+            "topic": topic,
+            "include_raw_content": include_raw_content,
+        })
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Only the first caller of a query runs it; the others wait for its result
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            result = self.backend.search(
+                query,
+                max_results=max_results,
+                include_raw_content=include_raw_content,
+                topic=topic,
+            )
+            self.cache.set(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    async def asearch(self, query: str, **kwargs) -> dict:
+        """Async version of `search`; the backend call runs in a worker thread."""
+        return await asyncio.to_thread(self.search, query, **kwargs)
+
+    async def asearch_many(
+        self,
+        queries: Sequence[str],
+        max_concurrency: int = MAX_CONCURRENT_SEARCHES,
+        **kwargs,
+    ) -> list[dict]:
+        """Run several queries concurrently; results are in the order of `queries`."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(query):
+            async with semaphore:
+                return await self.asearch(query, **kwargs)
+
+        return list(await asyncio.gather(*(run(query) for query in queries)))
+
+    def search_many(self, queries: Sequence[str], **kwargs) -> list[dict]:
+        """Synchronous version of `asearch_many`."""
+        return run_sync(self.asearch_many(list(queries), **kwargs))
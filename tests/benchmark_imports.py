@@ -0,0 +1,67 @@
+"""
+Import-time benchmark of the agent modules.
+
+Runs each import in a fresh interpreter (`python -X importtime`) without API
+keys and reports the cumulative import time, so regressions in startup cost
+(e.g. a client built at import time) are easy to spot.
+
+Usage:
+    python tests/benchmark_imports.py [module ...] [--repeat N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+app_root = project_root / "src" / "app"
+
+DEFAULT_MODULES = (
+    "tools.financial_tools",
+    "tools.real_estate_tools",
+    "tools.research_tools",
+    "tools.file_tools",
+    "tools.task_tool",
+    "agent",
+)
+
+API_KEYS = ("OPENAI_API_KEY", "TAVILY_API_KEY", "LANGCHAIN_API_KEY")
+
+
+def import_time(module: str) -> float:
+    """Cumulative import time of `module` in seconds, measured in a fresh interpreter."""
+    env = {key: value for key, value in os.environ.items() if key not in API_KEYS}
+    env["PYTHONPATH"] = os.pathsep.join([str(app_root), str(project_root)])
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    # Last line is the requested module: "import time: self | cumulative | name"
+    for line in reversed(result.stderr.splitlines()):
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'module':<32}{'median (s)':>12}{'min (s)':>10}")
+    for module in args.modules:
+        times = [import_time(module) for _ in range(args.repeat)]
+        print(f"{module:<32}{statistics.median(times):>12.3f}{min(times):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
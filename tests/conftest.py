@@ -6,4 +6,9 @@ from pathlib import Path
 
 # Add project root directory to path
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
\ No newline at end of file
+sys.path.insert(0, str(project_root))
+
+# Modules under src/app import their siblings as top-level modules (prompts, state, tools).
+# Tests import them by the same names only (`from tools.task_tool import ...`, never
+# `src.app.tools...`), so that each module, and its caches, is loaded once
+sys.path.insert(0, str(project_root / "src" / "app"))
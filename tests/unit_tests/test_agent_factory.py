@@ -0,0 +1,64 @@
+# test_agent_factory.py
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import agent_factory
+from agent_factory import AgentRegistry, build_agent
+from state import DeepAgentState
+from tools.file_tools import ls
+from tools.task_tool import _create_task_tool
+
+
+class FakeModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def fake_model(*answers):
+    return FakeModel(messages=iter([AIMessage(answer) for answer in answers]))
+
+
+def test_build_agent_compiles_each_configuration_once():
+    model = fake_model()
+    first = build_agent(model, [ls], "prompt A", name="a")
+    assert build_agent(model, [ls], "prompt A", name="a") is first
+    assert build_agent(model, [ls], "prompt B", name="a") is not first
+    assert build_agent(fake_model(), [ls], "prompt A", name="a") is not first
+
+
+def test_registry_compiles_on_first_use(monkeypatch):
+    built = []
+    monkeypatch.setattr(agent_factory, "build_agent", lambda *args, **kwargs: built.append(args) or object())
+
+    registry = AgentRegistry()
+    registry.register("financial_agent", "prompt", lambda: [ls], model="openai:gpt-4o-mini")
+    registry.register("real_estate_agent", "prompt", [ls], model="openai:gpt-4o-mini")
+    assert not built and not registry.is_compiled("financial_agent")
+
+    agent = registry.get("financial_agent")
+    assert registry.get("financial_agent") is agent
+    assert built == [("openai:gpt-4o-mini", [ls], "prompt")]
+    assert not registry.is_compiled("real_estate_agent")
+
+
+def test_agent_module_imports_without_configuration(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    import agent
+
+    assert set(agent.registry.names()) == {"financial_agent", "real_estate_agent", "supervisor_agent"}
+    assert not any(agent.registry.is_compiled(name) for name in agent.registry.names())
+
+
+def test_task_tool_compiles_sub_agents_on_first_delegation():
+    model = fake_model("Research done.")
+    subagents = [
+        {"name": "research-agent", "description": "Researches", "prompt": "Research."},
+        {"name": "critique-agent", "description": "Critiques", "prompt": "Critique."},
+    ]
+    task = _create_task_tool([ls], subagents, model, DeepAgentState)
+    cached = len(agent_factory._agents)
+
+    result = task.func("Find the Euribor forecast", "research-agent", {"messages": [], "files": {}}, "call_1", {})
+    assert result.update["messages"][0].content == "Research done."
+    assert len(agent_factory._agents) == cached + 1
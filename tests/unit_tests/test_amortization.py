@@ -0,0 +1,56 @@
+# test_amortization.py
+
+import numpy as np
+import numpy_financial as npf
+
+from tools.amortization import amortization_schedule, first_years, yearly_totals
+
+
+def month_by_month(principal, term_years, rates, review_months=12):
+    """Reference schedule computed one month at a time."""
+    n = term_years * 12
+    balance = principal
+    rows = []
+    for month in range(n):
+        if month % review_months == 0:
+            rate = rates[min(month // review_months, len(rates) - 1)] / 12
+            payment = abs(npf.pmt(rate, n - month, balance))
+        interest = balance * rate
+        balance -= payment - interest
+        rows.append((payment, interest, payment - interest, balance))
+    return np.array(rows).T
+
+
+def test_fixed_rate_schedule():
+    schedule = amortization_schedule(120000, 0.025, 25)
+    reference = month_by_month(120000, 25, [0.025], review_months=300)
+
+    for i, key in enumerate(("payment", "interest", "principal", "balance")):
+        np.testing.assert_allclose(schedule[key], reference[i], atol=1e-6)
+
+    yearly = yearly_totals(schedule)
+    assert yearly["interest"].shape == (25,)
+    assert int(yearly["interest"][0]) == 2960
+    assert abs(yearly["principal"].sum() - 120000) < 1e-6
+    assert abs(yearly["balance"][-1]) < 1e-6
+    assert first_years(schedule, 2)["interest"].shape == (24,)
+
+
+def test_variable_rate_resets():
+    rates = [0.035, 0.04, 0.0, 0.025]
+    schedule = amortization_schedule(150000, None, 20, rate_resets=rates, review_months=6)
+    reference = month_by_month(150000, 20, rates, review_months=6)
+
+    for i, key in enumerate(("payment", "interest", "principal", "balance")):
+        np.testing.assert_allclose(schedule[key], reference[i], atol=1e-6)
+
+
+def test_batch_of_loans_with_different_terms():
+    schedule = amortization_schedule(
+        np.array([100000, 200000]), np.array([0.02, 0.0]), np.array([10, 30])
+    )
+    assert schedule["balance"].shape == (2, 360)
+    # Months after maturity of the shorter loan are zero
+    assert not schedule["payment"][0, 120:].any()
+    np.testing.assert_allclose(schedule["principal"].sum(axis=-1), [100000, 200000])
+    np.testing.assert_allclose(schedule["payment"][1, :360], 200000 / 360)
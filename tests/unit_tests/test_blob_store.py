@@ -0,0 +1,35 @@
+# test_blob_store.py
+
+import os
+import time
+
+import pytest
+
+from blob_store import BlobStore, MissingBlobError
+
+
+def test_blobs_are_compressed_and_stored_once(tmp_path):
+    store = BlobStore(tmp_path)
+    content = "Euribor 12M: 2.5%\n" * 2000
+    digest = store.put(content)
+
+    assert store.put(content) == digest
+    assert digest in store and store.get(digest) == content
+    assert len(list(tmp_path.glob("??/*"))) == 1
+    assert store.size() < len(content) / 20
+
+
+def test_missing_blob(tmp_path):
+    with pytest.raises(MissingBlobError, match="missing"):
+        BlobStore(tmp_path).get("0" * 64)
+
+
+def test_garbage_collection_keeps_live_and_recent_blobs(tmp_path):
+    store = BlobStore(tmp_path)
+    live, dead, recent = (store.put(f"page {i}\n" * 1000) for i in range(3))
+    old = time.time() - 7200
+    for digest in (live, dead):
+        os.utime(tmp_path / digest[:2] / digest[2:], (old, old))
+
+    assert store.collect_garbage([live], min_age=3600) > 0
+    assert live in store and recent in store and dead not in store
@@ -0,0 +1,74 @@
+# test_euribor_simulation.py
+
+import numpy as np
+
+from tools.amortization import amortization_by_period, amortization_schedule, yearly_totals
+from tools.euribor_simulation import simulate_euribor_paths, simulate_variable_mortgage
+from tools.real_estate_tools import (
+    RealEstateProfitabilityInput,
+    real_estate_profitability_calculator,
+)
+
+VARIABLE_PROPERTY = {
+    "purchase_price": 200000,
+    "autonomous_community": "Cataluña",
+    "renovation_cost": 8000,
+    "monthly_rental_income": 1000,
+    "annual_gross_salary": 35000,
+    "loan_to_value_ratio": 0.75,
+    "loan_term_years": 30,
+    "mortgage_type": "variable",
+    "mortgage_margin": 1.5,
+    "euribor_rate": 2.0,
+}
+
+
+def test_amortization_by_period_matches_monthly_schedule():
+    rates = np.random.default_rng(0).uniform(0, 0.05, size=(3, 20))
+    principal = np.array([100000, 200000, 300000])
+    terms = np.array([20, 15, 10])
+    by_period = amortization_by_period(principal, terms, rates)
+    yearly = yearly_totals(amortization_schedule(principal, None, terms, rate_resets=rates))
+    for key in ("interest", "principal", "balance"):
+        np.testing.assert_allclose(by_period[key], yearly[key], atol=1e-6)
+
+
+def test_euribor_paths_are_seeded_and_mean_reverting():
+    paths = simulate_euribor_paths(4.0, 5000, 121, long_term_rate=2.0, seed=42)
+    assert paths.shape == (5000, 121)
+    assert (paths[:, 0] == 4.0).all()
+    np.testing.assert_array_equal(paths, simulate_euribor_paths(4.0, 5000, 121, long_term_rate=2.0, seed=42))
+    # After 10 years the mean has moved most of the way back to the long-term rate
+    assert abs(paths[:, -1].mean() - 2.0) < 0.2
+
+
+def test_constant_euribor_reproduces_calculator():
+    input_data = RealEstateProfitabilityInput(**VARIABLE_PROPERTY)
+    result = simulate_variable_mortgage(
+        input_data, n_paths=200, volatility=0, long_term_rate=2.0, seed=1
+    )
+    metrics = {
+        key: value
+        for category in real_estate_profitability_calculator.invoke(VARIABLE_PROPERTY)
+        for key, value in category.items()
+    }
+    assert result["annual_cash_flow_conservative"].shape == (5, 30)
+    np.testing.assert_allclose(
+        result["annual_cash_flow_conservative"][:, 0], metrics["annual_cash_flow_conservative"]
+    )
+    np.testing.assert_allclose(
+        result["monthly_mortgage_payment"][:, 0], metrics["monthly_mortgage_payment"]
+    )
+    np.testing.assert_allclose(result["roce_conservative"][:, 0], metrics["roce_conservative"])
+
+
+def test_chunked_simulation_matches_full_matrix():
+    input_data = RealEstateProfitabilityInput(**VARIABLE_PROPERTY)
+    full = simulate_variable_mortgage(input_data, n_paths=3000, seed=7)
+    chunked = simulate_variable_mortgage(input_data, n_paths=3000, seed=7, chunk_size=700)
+    for key in ("euribor_rate", "annual_cash_flow_conservative", "roce_optimistic"):
+        np.testing.assert_array_equal(full[key], chunked[key])
+    # Uncertainty widens the bands after the first review
+    bands = full["annual_cash_flow_conservative"]
+    assert bands[0, 0] == bands[-1, 0]
+    assert bands[0, 10] < bands[2, 10] < bands[-1, 10]
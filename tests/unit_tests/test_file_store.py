@@ -0,0 +1,254 @@
+# test_file_store.py
+
+import pickle
+import random
+import re
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import END, START, StateGraph
+
+import file_store
+from blob_store import BlobStore, MissingBlobError, set_blob_store
+from file_store import FileMap
+from state import DeepAgentState, file_reducer
+from tools.file_tools import grep, read_file, search_files
+
+
+@pytest.fixture
+def blob_store(tmp_path):
+    store = BlobStore(tmp_path)
+    set_blob_store(store)
+    file_store._load_blob.cache_clear()
+    file_store._blob_trigrams.cache_clear()
+    yield store
+    set_blob_store(None)
+    file_store._load_blob.cache_clear()
+    file_store._blob_trigrams.cache_clear()
+
+
+def test_file_map_matches_dict_and_keeps_old_versions():
+    rng = random.Random(0)
+    files, expected = FileMap(), {}
+    snapshots = []
+    for step in range(5000):
+        path = f"file_{rng.randrange(500)}.md"
+        if rng.random() < 0.3:
+            files, _ = files.delete(path), expected.pop(path, None)
+        else:
+            files = files.set(path, f"content {step}")
+            expected[path] = f"content {step}"
+        if step % 500 == 0:
+            snapshots.append((files, dict(expected)))
+
+    assert dict(files) == expected and len(files) == len(expected)
+    for snapshot, snapshot_expected in snapshots:
+        assert dict(snapshot) == snapshot_expected
+    assert pickle.loads(pickle.dumps(files)) == files
+
+
+def test_line_index_reads_match_splitlines():
+    content = "first\r\nsecond\rthird\n\nfifth\u2028sixth\n" + "x" * 2500 + "\nlast"
+    files = FileMap({"a.md": content})
+    lines = content.splitlines()
+    assert files.line_count("a.md") == len(lines)
+    for start in range(len(lines) + 1):
+        for stop in range(start, len(lines) + 2):
+            assert files.read_lines("a.md", start, stop) == lines[start:stop]
+
+    # Overwriting a file replaces its index
+    files = files.set("a.md", "one\ntwo")
+    assert files.line_count("a.md") == 2
+    assert files.read_lines("a.md", 1, 5) == ["two"]
+
+
+def _old_read_file(content, offset, limit):
+    lines = content.splitlines()
+    if offset >= len(lines):
+        return f"Error: Line offset {offset} exceeds file length ({len(lines)} lines)"
+    end = min(offset + limit, len(lines))
+    return "\n".join(f"{i + 1:6d}\t{lines[i][:2000]}" for i in range(offset, end))
+
+
+def test_read_file_pages_through_the_index():
+    content = "\n".join(f"line {i}" for i in range(50)) + "\n" + "y" * 3000
+    for files in (FileMap({"a.md": content}), {"a.md": content}):
+        for offset, limit in [(0, 2000), (10, 5), (49, 3), (51, 1), (60, 10)]:
+            result = read_file.func("a.md", {"files": files}, offset=offset, limit=limit)
+            assert result == _old_read_file(content, offset, limit)
+    assert read_file.func("empty.md", {"files": FileMap({"empty.md": ""})}).startswith("System reminder")
+
+
+def test_find_matches_a_line_by_line_scan():
+    rng = random.Random(1)
+    words = ["euribor", "Rate", "mortgage", "yield", "spread", "2025", "Madrid", "İtp", "\r\n", "\n\n"]
+    files = FileMap({
+        f"f{i}.md": " ".join(rng.choices(words, k=rng.randrange(0, 40))) for i in range(30)
+    })
+    for pattern in ["euribor", "rate", r"Rate \d+", "mad(rid)? yield", "^itp", "spread$", "x|yield"]:
+        regex = re.compile(pattern, re.MULTILINE | re.IGNORECASE)
+        expected = [
+            (path, i, line)
+            for path in sorted(files)
+            for i, line in enumerate(files[path].splitlines())
+            if regex.search(line)
+        ]
+        assert list(files.find(regex)) == expected
+        if pattern.islower():
+            assert list(files.find(re.compile(pattern, re.MULTILINE), lowercase=True)) == expected
+
+
+def test_grep_and_search_files_tools():
+    state = {"files": FileMap({
+        "a.md": "Euribor forecast\nrates fall in 2025\nEuribor again",
+        "b.md": "mortgage in Madrid\neuribor mentioned once",
+        "c.txt": "nothing here",
+    })}
+    assert grep.func("euribor", state) == "b.md:2: euribor mentioned once"
+    assert grep.func("euribor", state, ignore_case=True, max_results=2).splitlines() == [
+        "a.md:1: Euribor forecast",
+        "a.md:3: Euribor again",
+        "... more than 2 matches, refine the pattern or use path_glob",
+    ]
+    assert grep.func("nothing", state, path_glob="*.md") == "No matches found for 'nothing'"
+    assert grep.func("(", state).startswith("Error: Invalid regular expression")
+
+    result = search_files.func("EURIBOR", state)
+    assert result.index("a.md (2 matching lines)") < result.index("b.md (1 matching lines)")
+    assert search_files.func("euribor madrid", state).startswith("b.md (2 matching lines)")
+    assert search_files.func("euribor paris", state) == "No files mention all of: euribor paris"
+
+
+def test_large_files_are_spilled_to_the_blob_store(blob_store):
+    page = "\n".join(f"line {i}: euribor at {i / 100:.2f}%" for i in range(2000))
+    files = FileMap({"small.md": "notes"}).update({"page.md": page})
+    assert files.is_spilled("page.md") and not files.is_spilled("small.md")
+    assert files["page.md"] == page and dict(files) == {"small.md": "notes", "page.md": page}
+
+    # Checkpoints only carry the digest, which restores the same map
+    serialized = files._asdict()
+    assert serialized["files"] == {"small.md": "notes"}
+    assert list(serialized["blobs"]) == ["page.md"]
+    assert len(JsonPlusSerializer().dumps_typed(files)[1]) < 500
+    restored = pickle.loads(pickle.dumps(files))
+    file_store._load_blob.cache_clear()
+    assert restored == files
+
+    state = {"files": restored}
+    assert read_file.func("page.md", state, offset=1500, limit=2) == (
+        "  1501\tline 1500: euribor at 15.00%\n  1502\tline 1501: euribor at 15.01%"
+    )
+    assert grep.func(r"euribor at 19\.99", state) == "page.md:2000: line 1999: euribor at 19.99%"
+
+    # A sub-agent's map merged back as a delta passes its blobs on by digest
+    file_store._load_blob.cache_clear()
+    merged = FileMap().update(restored)
+    assert merged.is_spilled("page.md")
+    assert file_store._load_blob.cache_info().misses == 0
+
+
+def test_keyword_search_skips_spilled_files_without_loading_them(blob_store, monkeypatch):
+    pages = {f"page_{i}.md": f"Notes on topic {i}\n" * 2000 for i in range(50)}
+    pages["page_7.md"] += "Euribor mortgage forecast\n"
+    files = FileMap({"small.md": "a euribor mortgage"}).update(pages)
+    state = {"files": files}
+
+    file_store._load_blob.cache_clear()
+    assert files.mentioning(["euribor", "mortgage"]) == ["page_7.md", "small.md"]
+    assert search_files.func("EURIBOR mortgage", state).startswith("page_7.md (1 matching lines)")
+    assert file_store._load_blob.cache_info().misses == 1
+
+    # Filters are rebuilt once for maps restored from a checkpoint
+    restored = pickle.loads(pickle.dumps(files))
+    assert restored.mentioning(["euribor"]) == ["page_7.md", "small.md"]
+    assert file_store._blob_trigrams.cache_info().currsize == 50
+
+    # Candidates that only pass the filter are dropped by the search
+    monkeypatch.setattr(file_store, "_may_contain", lambda trigrams, keyword: True)
+    assert len(files.mentioning(["mortgage", "topic"])) == 50  # small.md is checked exactly
+    assert search_files.func("mortgage topic", state).startswith("page_7.md")
+    assert "small.md" not in search_files.func("mortgage topic", state)
+
+
+def test_missing_blob_is_reported_by_the_file_tools(blob_store, tmp_path):
+    page = "euribor\n" * 5000
+    files = FileMap({"page.md": page})
+    assert files.blob_digests() == {files._asdict()["blobs"]["page.md"]}
+
+    # The checkpoint is restored where the blob store is empty
+    set_blob_store(BlobStore(tmp_path / "other_host"))
+    file_store._load_blob.cache_clear()
+    restored = pickle.loads(pickle.dumps(files))
+    with pytest.raises(MissingBlobError):
+        restored["page.md"]
+
+    state = {"files": restored}
+    assert read_file.func("page.md", state).startswith("Error: Content of file 'page.md' is no longer available")
+    assert grep.func("euribor", state).startswith("Error:")
+    assert search_files.func("euribor", state).startswith("Error:")
+
+
+def test_read_file_from_a_plain_dict_does_not_spill(blob_store):
+    page = "\n".join(f"line {i}" for i in range(5000))
+    assert read_file.func("page.md", {"files": {"page.md": page}}, offset=4998) == "  4999\tline 4998\n  5000\tline 4999"
+    assert blob_store.size() == 0
+
+
+def test_search_tools_on_a_plain_dict_do_not_spill(blob_store):
+    state = {"files": {"page.md": "\n".join(f"line {i}" for i in range(5000))}}
+    assert grep.func(r"line 4999$", state) == "page.md:5000: line 4999"
+    assert search_files.func("line 4999", state).startswith("page.md (")
+    assert blob_store.size() == 0
+
+
+def test_select_and_diff():
+    rng = random.Random(2)
+    base = FileMap({f"notes/{i}.md": f"note {i}" for i in range(300)} | {"request.md": "question"})
+    assert sorted(base.select(["request.md", "notes/1?.md"])) == ["notes/1%d.md" % i for i in range(10)] + ["request.md"]
+    assert base.select([]) == {}
+
+    files = base
+    for step in range(200):
+        path = f"notes/{rng.randrange(400)}.md"
+        files = files.delete(path) if rng.random() < 0.3 else files.set(path, f"edit {step}")
+    delta = files.diff(base)
+    assert base.update(delta) == files
+    assert delta == {
+        path: files.get(path)
+        for path in set(base) | set(files)
+        if base.get(path) != files.get(path)
+    }
+    assert files.diff(files) == {} and FileMap().diff(FileMap()) == {}
+
+
+def test_reducer_applies_deltas():
+    files = file_reducer(None, {"a.md": "1", "b.md": "2"})
+    updated = file_reducer(files, {"a.md": None, "c.md": "3"})
+
+    assert isinstance(updated, FileMap)
+    assert dict(updated) == {"b.md": "2", "c.md": "3"}
+    assert dict(files) == {"a.md": "1", "b.md": "2"}
+    assert file_reducer(updated, None) is updated
+
+
+def test_file_deltas_through_a_checkpointed_graph():
+    def research(state):
+        return {"files": {"notes.md": "draft", "raw.md": "x" * 1000}}
+
+    def clean_up(state):
+        assert state["files"]["notes.md"] == "draft"
+        return {"files": {"raw.md": None, "notes.md": "final"}}
+
+    builder = StateGraph(DeepAgentState)
+    builder.add_node("research", research)
+    builder.add_node("clean_up", clean_up)
+    builder.add_edge(START, "research")
+    builder.add_edge("research", "clean_up")
+    builder.add_edge("clean_up", END)
+    graph = builder.compile(checkpointer=MemorySaver())
+
+    config = {"configurable": {"thread_id": "1"}}
+    result = graph.invoke({"messages": [], "files": {"todo.md": "- [ ] euribor"}}, config)
+    assert dict(result["files"]) == {"todo.md": "- [ ] euribor", "notes.md": "final"}
+    assert dict(graph.get_state(config).values["files"]) == dict(result["files"])
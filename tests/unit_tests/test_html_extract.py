@@ -0,0 +1,92 @@
+# test_html_extract.py
+
+import asyncio
+
+import httpx
+
+from tools.html_extract import StreamingHTMLExtractor, extract_markdown
+from tools.web_fetch import afetch_page
+
+PAGE = """<html><head><title>Euribor</title><style>p {color: red}</style></head>
+<body>
+<header><a href="/">Home</a></header>
+<nav><ul><li>Menu</li></ul></nav>
+<h1>Euribor today</h1>
+<p>The 12-month Euribor is <b>2.1%</b> &amp; <a href="https://example.com/history">falling</a>.</p>
+<script>var html = "<p>not content</p>";</script>
+<aside>Subscribe!</aside>
+<footer>Cookies</footer>
+</body></html>"""
+
+
+def test_boilerplate_is_removed():
+    markdown = extract_markdown(PAGE)
+    assert markdown.startswith("Euribor today\n=============")
+    assert "**2.1%** & [falling](https://example.com/history)." in markdown
+    for boilerplate in ("Home", "Menu", "color", "not content", "Subscribe", "Cookies"):
+        assert boilerplate not in markdown
+
+
+def test_body_is_kept_when_head_is_not_closed():
+    assert extract_markdown("<html><head><title>x</title><body><p>Hello world</p></body></html>") == "Hello world"
+    assert extract_markdown("<head><meta charset='utf-8'><title>x</title><h1>Title</h1>").startswith("Title")
+
+
+def test_budget_stops_parsing_across_chunks():
+    extractor = StreamingHTMLExtractor(max_chars=30)
+    chunks = [PAGE[i:i + 16] for i in range(0, len(PAGE), 16)]
+    fed = 0
+    for chunk in chunks:
+        fed += 1
+        if extractor.feed(chunk):
+            break
+    assert fed < len(chunks)
+    assert extractor.chars == 30
+    assert extract_markdown(PAGE, max_chars=30) == extractor.markdown()
+
+
+def test_download_stops_at_budget():
+    sent = 0
+
+    async def body():
+        nonlocal sent
+        yield b"<html><body>"
+        for _ in range(1000):
+            sent += 1
+            yield b"<p>" + b"x" * 1000 + b"</p>"
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+        async with httpx.AsyncClient(transport=transport) as client:
+            extractor = StreamingHTMLExtractor(max_chars=5000)
+            page = await afetch_page("https://example.com", client, on_text=extractor.feed)
+            return page, extractor
+
+    page, extractor = asyncio.run(run())
+    assert page.truncated and page.text == ""
+    assert sent < 10
+    assert extractor.chars == 5000
+    assert extractor.markdown().count("x") == 5000
+
+
+def test_article_header_is_kept():
+    markdown = extract_markdown(
+        "<body><header>Site name</header><main><article>"
+        "<header><h1>Euribor falls</h1><p>By Ana</p></header><p>Body text</p>"
+        "<footer>Filed under rates</footer></article></main><footer>Cookies</footer></body>"
+    )
+    assert markdown.startswith("Euribor falls")
+    for kept in ("By Ana", "Body text", "Filed under rates"):
+        assert kept in markdown
+    assert "Site name" not in markdown and "Cookies" not in markdown
+
+
+def test_page_wrapped_in_a_form_is_kept():
+    markdown = extract_markdown(
+        '<body><form action="/default.aspx"><input type="hidden" value="state">'
+        "<h1>Mortgage rates</h1><p>Fixed rate: 3%</p>"
+        "<select><option>Spain</option></select><button>Go</button></form></body>"
+    )
+    assert markdown.startswith("Mortgage rates")
+    assert "Fixed rate: 3%" in markdown
+    assert "Spain" not in markdown and "Go" not in markdown and "state" not in markdown
@@ -0,0 +1,80 @@
+# test_investment_projection.py
+
+import numpy as np
+import numpy_financial as npf
+
+from tools.investment_projection import irr, npv, project_rental_investment
+from tools.real_estate_tools import (
+    RealEstateProfitabilityInput,
+    real_estate_profitability_calculator,
+)
+
+FIXED_PROPERTY = {
+    "purchase_price": 150000,
+    "autonomous_community": "Comunidad de Madrid",
+    "notary_cost": 500,
+    "registry_cost": 250,
+    "renovation_cost": 30000,
+    "agency_commission": 3000,
+    "mortgage_management_cost": 300,
+    "mortgage_appraisal_cost": 200,
+    "monthly_rental_income": 1000,
+    "homeowners_association_fee": 600,
+    "property_insurance": 100,
+    "mortgage_life_insurance": 150,
+    "property_tax_ibi": 160,
+    "annual_gross_salary": 38928,
+    "loan_term_years": 25,
+    "mortgage_type": "fixed",
+    "fixed_interest_rate": 2.5,
+}
+
+
+def test_first_year_matches_calculator_and_exit():
+    projection = project_rental_investment(
+        [RealEstateProfitabilityInput(**FIXED_PROPERTY)], holding_years=10
+    )
+    metrics = {
+        key: value
+        for category in real_estate_profitability_calculator.invoke(FIXED_PROPERTY)
+        for key, value in category.items()
+    }
+    cash_flows = projection["cash_flows"][0]
+    assert cash_flows.shape == (11,)
+    assert cash_flows[0] == -(193250 - 120000)
+    assert abs(cash_flows[1] - metrics["annual_cash_flow_conservative"]) < 1e-6
+    # Indexed rent makes later operating cash flows grow
+    assert cash_flows[2] > cash_flows[1]
+    assert 0 < projection["remaining_debt"][0] < 120000
+
+    assert abs(projection["npv"][0] - npf.npv(0.05, cash_flows)) < 1e-6
+    assert abs(projection["irr"][0] - npf.irr(cash_flows)) < 1e-9
+
+
+def test_batch_irr_matches_numpy_financial():
+    rng = np.random.default_rng(0)
+    n = 500
+    columns = {
+        "purchase_price": rng.uniform(80000, 600000, n),
+        "autonomous_community": ["Galicia"] * n,
+        "renovation_cost": rng.uniform(0, 40000, n),
+        "monthly_rental_income": rng.uniform(400, 3000, n),
+        "annual_gross_salary": rng.uniform(10000, 100000, n),
+        "loan_to_value_ratio": rng.uniform(0, 1, n),
+        "loan_term_years": rng.integers(5, 41, n),
+        "mortgage_type": ["fixed"] * n,
+        "fixed_interest_rate": rng.uniform(0, 5, n),
+    }
+    projection = project_rental_investment(columns, holding_years=15, rent_growth=rng.uniform(0, 0.04, n))
+    expected = [npf.irr(row) for row in projection["cash_flows"]]
+    np.testing.assert_allclose(projection["irr"], expected, atol=1e-9)
+    np.testing.assert_allclose(
+        projection["npv"], [npf.npv(0.05, row) for row in projection["cash_flows"]]
+    )
+
+
+def test_irr_without_sign_change_is_nan():
+    result = irr([[-100, 60, 60], [100, 10, 10]])
+    assert abs(result[0] - npf.irr([-100, 60, 60])) < 1e-12
+    assert np.isnan(result[1])
+    assert abs(npv(0.1, [[-100, 110]])[0]) < 1e-9
@@ -0,0 +1,63 @@
+# test_page_cache.py
+
+from tools.page_cache import PageCache, content_hash
+
+
+def test_pages_and_summaries_are_content_addressed(tmp_path):
+    cache = PageCache(tmp_path / "cache.sqlite3")
+    digest = cache.put_page("https://a.example.com", "same content", etag='"1"')
+    assert cache.put_page("https://b.example.com", "same content") == digest == content_hash("same content")
+
+    cache.put_summary(digest, "page.md", "summary")
+    page = cache.get_page("https://b.example.com")
+    assert page.fresh and page.content == "same content"
+    assert cache.get_summary(page.content_hash) == ("page.md", "summary")
+    assert cache.get_page("https://a.example.com").revalidation_headers() == {"If-None-Match": '"1"'}
+    assert cache.get_page("https://missing.example.com") is None
+
+
+def test_least_recently_used_pages_are_evicted(tmp_path):
+    cache = PageCache(tmp_path / "cache.sqlite3", max_bytes=25)
+    cache.put_page("https://a.example.com", "a" * 10)
+    cache.put_summary(content_hash("a" * 10), "a.md", "summary of a")
+    cache.put_page("https://b.example.com", "b" * 10)
+    cache.get_page("https://a.example.com")
+    cache.put_page("https://c.example.com", "c" * 10)
+
+    assert cache.get_page("https://b.example.com") is None
+    assert cache.get_page("https://a.example.com") is not None
+    assert cache.get_summary(content_hash("a" * 10)) is not None
+
+    # Reopening the file keeps the cached pages
+    cache.close()
+    assert PageCache(tmp_path / "cache.sqlite3").get_page("https://c.example.com").content == "c" * 10
+
+
+def test_shared_contents_are_freed_once(tmp_path):
+    cache = PageCache(tmp_path / "cache.sqlite3", max_bytes=25)
+    cache.put_page("https://a.example.com", "a" * 10)
+    cache.put_page("https://a.example.com/copy", "a" * 10)
+    cache.put_page("https://b.example.com", "b" * 10)
+    cache.put_page("https://c.example.com", "c" * 10)
+
+    # Evicting one of the two pages of "a" frees nothing, so both go
+    assert cache.get_page("https://a.example.com") is None
+    assert cache.get_page("https://a.example.com/copy") is None
+    assert cache.get_page("https://b.example.com") is not None
+    assert cache.get_page("https://c.example.com") is not None
+
+
+def test_summaries_have_their_own_budget(tmp_path):
+    cache = PageCache(tmp_path / "cache.sqlite3", max_bytes=15, max_summary_bytes=30)
+    # Summary of content that was never stored as a page
+    cache.put_summary(content_hash("raw"), "raw.md", "summary")
+    cache.put_page("https://a.example.com", "a" * 10)
+    cache.put_page("https://b.example.com", "b" * 10)
+    assert cache.get_summary(content_hash("raw")) == ("raw.md", "summary")
+
+    cache.put_summary(content_hash("other"), "other.md", "summary")
+    cache.get_summary(content_hash("raw"))
+    cache.put_summary(content_hash("last"), "last.md", "summary")
+    assert cache.get_summary(content_hash("other")) is None
+    assert cache.get_summary(content_hash("raw")) is not None
+    assert cache.get_summary(content_hash("last")) is not None
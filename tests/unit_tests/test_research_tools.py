@@ -0,0 +1,145 @@
+# test_research_tools.py
+
+import asyncio
+
+import threading
+
+import httpx
+import pytest
+
+from tools import research_tools
+from tools.lazy_client import LazyClient
+from tools.page_cache import PageCache, set_page_cache
+from tools.research_tools import Summary, aprocess_search_results
+
+
+class FakeSummarizer:
+    """Summarization model stub (its own structured output) that records overlapping calls."""
+
+    def __init__(self):
+        self.in_flight = self.peak = self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return Summary(filename="page.md", summary="summary")
+
+    def with_structured_output(self, schema):
+        return self
+
+
+@pytest.fixture
+def summarizer(tmp_path):
+    """Fake summarizer and an empty page cache."""
+    summarizer = FakeSummarizer()
+    research_tools.set_summarization_model_provider(lambda: summarizer)
+    set_page_cache(PageCache(tmp_path / "web_cache.sqlite3"))
+    yield summarizer
+    set_page_cache(None)
+    research_tools.set_summarization_model_provider(research_tools._default_summarization_model)
+
+
+def process(results, handler, **kwargs):
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        research_tools.get_async_client = lambda: client
+        async with client:
+            return await aprocess_search_results(results, **kwargs)
+
+    original = research_tools.get_async_client
+    try:
+        return asyncio.run(run())
+    finally:
+        research_tools.get_async_client = original
+
+
+def test_clients_are_built_once_on_first_use():
+    built = []
+    barrier = threading.Barrier(8)
+    client = LazyClient(lambda: built.append(object()) or built[-1])
+
+    def use():
+        barrier.wait()
+        client.get()
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+
+    # Importing research_tools builds neither the model nor the search client
+    assert not research_tools.search_backend.initialized
+
+
+def test_pages_are_fetched_and_summarized_concurrently(summarizer):
+
+    async def handler(request):
+        await asyncio.sleep(0.01)
+        if request.url.path == "/broken":
+            return httpx.Response(500)
+        return httpx.Response(200, text="<h1>Euribor</h1><p>Rates</p>")
+
+    results = {"results": [
+        {"url": f"https://example.com/{i}", "title": f"Result {i}"} for i in range(5)
+    ] + [{"url": "https://example.com/broken", "title": "Broken", "content": "Tavily summary"}]}
+
+    processed = process(results, handler, max_concurrent_summaries=2)
+    assert [item["title"] for item in processed[:5]] == [f"Result {i}" for i in range(5)]
+    assert processed[0]["raw_content"].strip().endswith("Rates")
+    assert processed[0]["filename"].startswith("page_")
+    assert processed[-1]["summary"] == "Tavily summary"
+    assert summarizer.peak == 2
+
+
+def test_cached_pages_cost_no_download_and_no_summary(summarizer):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<p>Euribor 12M</p>", headers={"ETag": '"v1"'})
+
+    results = {"results": [{"url": "https://example.com/euribor", "title": "Euribor"}]}
+    first = process(results, handler)
+    second = process(results, handler)
+    assert len(requests) == 1  # fresh page: no request at all
+    assert summarizer.calls == 1
+    assert second[0]["summary"] == first[0]["summary"]
+
+    # Stale page: revalidated with a conditional request, still not summarized again
+    research_tools.get_page_cache().ttl = 0
+    third = process(results, handler)
+    assert len(requests) == 2 and requests[-1].headers["If-None-Match"] == '"v1"'
+    assert summarizer.calls == 1
+    assert third[0]["raw_content"] == first[0]["raw_content"]
+
+
+def test_tavily_search_many_saves_every_result(summarizer, monkeypatch):
+    class StubBackend:
+        def search(self, query, max_results=1, include_raw_content=True, topic="general"):
+            return {"results": [{"url": f"https://example.com/{query}", "title": query.title()}]}
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, text=f"<p>About {request.url.path[1:]}</p>")
+    ))
+    research_tools.set_search_backend_provider(StubBackend)
+    monkeypatch.setattr(research_tools, "get_async_client", lambda: client)
+    try:
+        command = research_tools.tavily_search_many.func(
+            queries=["euribor", "itp"], state={"files": {}}, tool_call_id="call_1"
+        )
+    finally:
+        research_tools.set_search_backend_provider(research_tools._default_search_backend)
+    files = command.update["files"]
+    assert len(files) == 2
+    assert sorted(content.splitlines()[0] for content in files.values()) == [
+        "# Search Result: Euribor", "# Search Result: Itp"
+    ]
+    message = command.update["messages"][0].content
+    assert "for 'euribor'" in message and "for 'itp'" in message
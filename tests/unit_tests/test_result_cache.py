@@ -0,0 +1,94 @@
+# test_result_cache.py
+
+import time
+
+from tools import tax_rules
+from tools.financial_tools import compound_interest_calculator
+from tools.real_estate_tools import real_estate_profitability_calculator
+from tools.result_cache import (
+    ResultCache,
+    SQLiteResultStore,
+    canonical_key,
+    tool_result_cache,
+)
+
+
+def test_canonical_key_ignores_argument_order():
+    assert canonical_key("tool", {"a": 1, "b": 2}) == canonical_key("tool", {"b": 2, "a": 1})
+    assert canonical_key("tool", {"a": 1}) != canonical_key("other_tool", {"a": 1})
+
+
+def test_lru_eviction_ttl_and_copies(monkeypatch):
+    cache = ResultCache(maxsize=2, ttl=10)
+    cache.set("a", [{"x": 1}])
+    cache.set("b", [{"x": 2}])
+    cache.get("a")
+    cache.set("c", [{"x": 3}])  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    hit = cache.get("a")
+    hit[0]["x"] = 99
+    assert cache.get("a") == [{"x": 1}]
+    assert cache.stats()["evictions"] == 1
+
+    now = time.monotonic()
+    monkeypatch.setattr("tools.result_cache.time.monotonic", lambda: now + 11)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_disk_store_survives_restart(tmp_path):
+    path = tmp_path / "results.sqlite3"
+    ResultCache(store=SQLiteResultStore(path)).set("key", {"balance": 1.5})
+
+    restarted = ResultCache(store=SQLiteResultStore(path))
+    assert restarted.get("key") == {"balance": 1.5}
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_tool_results_are_cached():
+    tool_result_cache.clear()
+    inputs = {
+        "initial_balance": 1000,
+        "periodic_deposit": 50,
+        "deposit_frequency": "monthly",
+        "interest_rate": 4,
+        "years": 3
+    }
+    first = compound_interest_calculator.invoke(inputs)
+    second = compound_interest_calculator.invoke(inputs)
+
+    assert first == second
+    assert tool_result_cache.stats()["hits"] == 1
+    assert tool_result_cache.stats()["misses"] == 1
+
+
+def test_tax_rules_change_invalidates_profitability_results(monkeypatch):
+    tool_result_cache.clear()
+    inputs = {
+        "purchase_price": 200000,
+        "autonomous_community": "Comunidad de Madrid",
+        "monthly_rental_income": 1200,
+        "annual_gross_salary": 40000,
+        "loan_to_value_ratio": 0.8,
+        "mortgage_type": "fixed",
+        "fixed_interest_rate": 3.0,
+        "loan_term_years": 25,
+        "renovation_cost": 0,
+    }
+    before = real_estate_profitability_calculator.func(**inputs)
+
+    rules = {2025: {**tax_rules.TAX_RULES[2025]}}
+    rules[2025]["itp_by_community"] = {**rules[2025]["itp_by_community"], "Comunidad de Madrid": 7.0}
+    monkeypatch.setattr(tax_rules, "TAX_RULES", rules)
+    tax_rules.get_tax_tables.cache_clear()
+    tax_rules.rules_version.cache_clear()
+    try:
+        after = real_estate_profitability_calculator.func(**inputs)
+    finally:
+        monkeypatch.undo()
+        tax_rules.get_tax_tables.cache_clear()
+        tax_rules.rules_version.cache_clear()
+
+    assert tool_result_cache.stats()["hits"] == 0
+    assert after[0]["itp_tax_amount"] > before[0]["itp_tax_amount"]
@@ -0,0 +1,124 @@
+# test_streaming.py
+
+import asyncio
+import json
+import time
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.prebuilt import create_react_agent
+
+from streaming import AgentStream, StreamPrinter
+from tools.task_tool import subagent_tool
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model replaying scripted answers, streamed word by word."""
+
+    responses: list
+    delay: float = 0.0
+    index: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next(self) -> AIMessage:
+        self.index += 1
+        return self.responses[self.index - 1]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self._next())])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._next()
+        for word in message.content.split():
+            time.sleep(self.delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(word + " ", chunk=chunk)
+            yield chunk
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ]))
+
+
+def build_supervisor(sub_delay=0.0):
+    answer = " ".join(["yield"] * 10)
+    sub_agent = create_react_agent(
+        ScriptedChatModel(responses=[AIMessage(answer)], delay=sub_delay),
+        tools=[],
+        name="real_estate_agent",
+    )
+    supervisor = create_react_agent(
+        ScriptedChatModel(responses=[
+            AIMessage("Delegating.", tool_calls=[
+                {"name": "run_real_estate_analysis", "args": {"request": "yield?"}, "id": "call_1"}
+            ]),
+            AIMessage("Gross yield is fine."),
+        ]),
+        tools=[subagent_tool(sub_agent, "run_real_estate_analysis", "Real estate sub-agent")],
+    )
+    return supervisor, answer
+
+
+def summarize(events):
+    return [(event.agent, event.depth, event.kind) for event in events]
+
+
+EXPECTED = [
+    ("supervisor", 0, "token"),
+    ("supervisor", 0, "tool_call"),
+    *[("real_estate_agent", 1, "token")] * 10,
+    ("supervisor", 0, "tool_result"),
+    ("supervisor", 0, "token"),
+    ("supervisor", 0, "token"),
+    ("supervisor", 0, "token"),
+    ("supervisor", 0, "token"),
+]
+
+
+def test_sub_agent_tokens_stream_through_the_supervisor():
+    supervisor, answer = build_supervisor()
+    stream = AgentStream(supervisor, {"messages": [("user", "Is this flat a good deal?")]})
+    events = list(stream)
+
+    assert summarize(events) == EXPECTED
+    assert "".join(e.content for e in events if e.agent == "real_estate_agent") == answer + " "
+    assert events[-5].content == answer + " "
+    assert stream.time_to_first_token is not None
+
+
+def test_first_sub_agent_token_arrives_before_the_sub_agent_finishes():
+    supervisor, _ = build_supervisor(sub_delay=0.05)
+
+    async def collect():
+        stream = AgentStream(supervisor, {"messages": [("user", "Is this flat a good deal?")]})
+        arrivals = [(event, time.perf_counter() - t0) async for event in stream]
+        return stream, arrivals
+
+    t0 = time.perf_counter()
+    stream, arrivals = asyncio.run(collect())
+    sub_times = [at for event, at in arrivals if event.depth == 1]
+
+    assert summarize(event for event, _ in arrivals) == EXPECTED
+    assert stream.time_to_first_token < 0.1
+    assert sub_times[0] < sub_times[-1] - 0.3  # tokens arrive while the sub-agent runs
+
+
+def test_stream_printer(capsys):
+    supervisor, _ = build_supervisor()
+    printer = StreamPrinter()
+    for event in AgentStream(supervisor, {"messages": [("user", "Is this flat a good deal?")]}):
+        printer(event)
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert lines[0] == "[supervisor] Delegating. "
+    assert lines[1] == "[supervisor] -> run_real_estate_analysis"
+    assert lines[2].startswith("\t[real_estate_agent] yield yield")
+    assert lines[-1] == "[supervisor] Gross yield is fine."
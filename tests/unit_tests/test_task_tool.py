@@ -0,0 +1,223 @@
+# test_task_tool.py
+
+import asyncio
+import time
+
+from typing import Annotated
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tools import tool
+from langgraph.prebuilt import InjectedState, ToolNode
+
+import agent_factory
+from file_store import FileMap
+from state import DeepAgentState
+from tools.file_tools import write_file
+from tools.task_tool import (
+    ConcurrencyLimiter,
+    _create_task_batch_tool,
+    _create_task_tool,
+    subagent_tool,
+)
+
+
+class Tracker:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+
+def fake_agent(tracker: Tracker, delay: float):
+    async def arun(state):
+        tracker.running += 1
+        tracker.peak = max(tracker.peak, tracker.running)
+        await asyncio.sleep(delay)
+        tracker.running -= 1
+        return {"messages": [AIMessage(f"done: {state['messages'][0]['content']}")]}
+
+    def run(state):
+        time.sleep(delay)
+        return {"messages": [AIMessage(f"done: {state['messages'][0]['content']}")]}
+
+    return RunnableLambda(run, afunc=arun)
+
+
+def supervisor_turn(n_calls):
+    return {"messages": [AIMessage("", tool_calls=[
+        {"name": f"agent_{i}", "args": {"request": f"q{i}"}, "id": f"call_{i}"}
+        for i in range(n_calls)
+    ])]}
+
+
+def test_subagents_of_a_turn_run_concurrently_within_the_limit():
+    tracker = Tracker()
+    limiter = ConcurrencyLimiter(max_concurrency=2)
+    tools = [
+        subagent_tool(fake_agent(tracker, 0.1), f"agent_{i}", "Fake sub-agent", limiter)
+        for i in range(4)
+    ]
+    node = ToolNode(tools)
+
+    start = time.perf_counter()
+    result = asyncio.run(node.ainvoke(supervisor_turn(4)))
+    elapsed = time.perf_counter() - start
+
+    assert [message.content for message in result["messages"]] == [f"done: q{i}" for i in range(4)]
+    assert tracker.peak == 2
+    assert 0.2 <= elapsed < 0.35  # two waves of two, not four sequential runs
+
+
+def test_subagent_tool_sync_path():
+    tool = subagent_tool(fake_agent(Tracker(), 0.0), "agent_0", "Fake sub-agent")
+    assert ToolNode([tool]).invoke(supervisor_turn(1))["messages"][0].content == "done: q0"
+
+
+class FakeModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def test_task_sub_agent_sees_only_selected_files_and_returns_its_changes():
+    seen, paths = [], []
+
+    @tool
+    def list_visible(state: Annotated[DeepAgentState, InjectedState], config: RunnableConfig) -> str:
+        """List the files visible to the agent."""
+        seen.append(sorted(state.get("files", {})))
+        paths.append(tuple(config["metadata"]["agent_path"]))
+        return "ok"
+
+    model = FakeModel(messages=iter([
+        AIMessage("", tool_calls=[{"name": "list_visible", "args": {}, "id": "c1"}]),
+        AIMessage("", tool_calls=[
+            {"name": "write_file", "args": {"file_path": "findings.md", "content": "new"}, "id": "c2"},
+            {"name": "write_file", "args": {"file_path": "request.md", "content": "question"}, "id": "c3"},
+        ]),
+        AIMessage("Findings saved."),
+    ]))
+    subagents = [{"name": "research-agent", "description": "Researches", "prompt": "Research."}]
+    task = _create_task_tool([list_visible, write_file], subagents, model, DeepAgentState)
+
+    parent_files = FileMap({"request.md": "question"} | {f"raw_{i}.md": "page" for i in range(100)})
+    parent_state = {"messages": ["parent history"], "files": parent_files, "todos": []}
+    command = task.func(
+        "Research it", "research-agent", parent_state, "call_1", {"metadata": {"agent_path": ("supervisor",)}},
+        files=["request.md"],
+    )
+
+    assert seen == [["request.md"]]
+    assert paths == [("supervisor", "research-agent")]
+    assert parent_state == {"messages": ["parent history"], "files": parent_files, "todos": []}
+    # request.md was rewritten with the same content, so only findings.md changed
+    assert command.update["files"] == {"findings.md": "new"}
+    assert command.update["messages"][0].content == "Findings saved."
+
+
+def test_task_without_files_shares_every_file():
+    seen = []
+
+    @tool
+    def list_visible(state: Annotated[DeepAgentState, InjectedState]) -> str:
+        """List the files visible to the agent."""
+        seen.append(sorted(state.get("files", {})))
+        return "ok"
+
+    model = FakeModel(messages=iter([
+        AIMessage("", tool_calls=[{"name": "list_visible", "args": {}, "id": "c1"}]),
+        AIMessage("Done."),
+    ]))
+    subagents = [{"name": "research-agent", "description": "Researches", "prompt": "Research."}]
+    task = _create_task_tool([list_visible], subagents, model, DeepAgentState)
+
+    state = {"messages": [], "files": {"a.md": "a", "b.md": "b"}, "todos": []}
+    command = task.func("Research it", "research-agent", state, "call_1", {})
+
+    assert seen == [["a.md", "b.md"]]
+    assert command.update["files"] == {}
+
+
+def scripted_agents(monkeypatch, tracker: Tracker):
+    """Sub-agents whose prompt is "<delay> <path>": they wait, then write their task to path."""
+    def build_agent(model, tools, prompt, name=None, state_schema=None):
+        if prompt == "broken":
+            raise RuntimeError("OPENAI_API_KEY is not set")
+        delay, path = prompt.split()
+
+        def written(state):
+            task = state["messages"][0]["content"]
+            if task == "fail":
+                raise ValueError("boom")
+            return {"messages": [AIMessage(f"{name}: {task}")], "files": state["files"].update({path: task})}
+
+        async def arun(state):
+            tracker.running += 1
+            tracker.peak = max(tracker.peak, tracker.running)
+            await asyncio.sleep(float(delay))
+            tracker.running -= 1
+            return written(state)
+
+        def run(state):
+            time.sleep(float(delay))
+            return written(state)
+
+        return RunnableLambda(run, afunc=arun)
+
+    monkeypatch.setattr(agent_factory, "build_agent", build_agent)
+
+
+SUBAGENTS = [
+    {"name": "slow", "description": "Slow writer", "prompt": "0.1 shared.md"},
+    {"name": "fast", "description": "Fast writer", "prompt": "0.0 shared.md"},
+    {"name": "notes", "description": "Note taker", "prompt": "0.05 notes.md"},
+    {"name": "broken", "description": "Cannot be built", "prompt": "broken"},
+]
+
+
+def test_task_batch_runs_tasks_concurrently_and_merges_files_in_task_order(monkeypatch):
+    tracker = Tracker()
+    scripted_agents(monkeypatch, tracker)
+    batch = _create_task_batch_tool([], SUBAGENTS, "model", DeepAgentState, max_concurrency=2)
+    tasks = [
+        {"subagent_type": "fast", "description": "first"},
+        {"subagent_type": "notes", "description": "notes"},
+        {"subagent_type": "slow", "description": "last"},
+    ]
+    state = {"messages": [], "files": {"shared.md": "old"}, "todos": []}
+
+    command = asyncio.run(batch.coroutine(tasks, state, "call_1", {}))
+
+    assert tracker.peak == 2
+    # "slow" finishes last but also comes last in the batch, and "fast" finishing first does not matter
+    assert command.update["files"] == {"shared.md": "last", "notes.md": "notes"}
+    reversed_command = batch.func(tasks[::-1], state, "call_2", {})
+    assert reversed_command.update["files"] == {"shared.md": "first", "notes.md": "notes"}
+    assert state["files"] == {"shared.md": "old"}
+
+    [message] = command.update["messages"]
+    assert message.tool_call_id == "call_1"
+    assert message.content.index("fast: first") < message.content.index("notes: notes") < message.content.index("slow: last")
+
+
+def test_task_batch_reports_failed_tasks_without_losing_the_others(monkeypatch):
+    scripted_agents(monkeypatch, Tracker())
+    batch = _create_task_batch_tool([], SUBAGENTS, "model", DeepAgentState)
+    tasks = [
+        {"subagent_type": "notes", "description": "fail"},
+        {"subagent_type": "unknown", "description": "anything"},
+        {"subagent_type": "broken", "description": "anything"},
+        {"subagent_type": "fast", "description": "kept"},
+    ]
+    state = {"messages": [], "files": {}}
+
+    for command in (
+        asyncio.run(batch.coroutine(tasks, state, "call_1", {})),
+        batch.func(tasks, state, "call_2", {}),
+    ):
+        assert command.update["files"] == {"shared.md": "kept"}
+        content = command.update["messages"][0].content
+        assert "Error: ValueError: boom" in content
+        assert "invoked agent of type unknown" in content
+        assert "Error: RuntimeError: OPENAI_API_KEY is not set" in content
+        assert "fast: kept" in content
@@ -0,0 +1,41 @@
+# test_tax_rules.py
+
+import numpy as np
+import pytest
+
+from tools import tax_rules
+from tools.tax_rules import default_cost_ratio, irpf_rate, itp_rate
+
+
+def test_irpf_bracket_boundaries():
+    salaries = np.array([0, 12450, 12451, 20199, 35200, 59999, 60000, 299999, 300000])
+    expected = [0.19, 0.19, 0.24, 0.24, 0.37, 0.37, 0.45, 0.45, 0.47]
+    np.testing.assert_array_equal(irpf_rate(salaries), expected)
+    assert float(irpf_rate(30000)) == 0.30
+
+
+def test_itp_lookup():
+    rates = itp_rate(["Comunidad de Madrid", "Cataluña", "Canarias"])
+    np.testing.assert_allclose(rates, [0.06, 0.10, 0.065])
+    with pytest.raises(ValueError, match="is not in the list"):
+        itp_rate(["Comunidad de Madrid", "Atlantis"])
+
+
+def test_rules_by_year(monkeypatch):
+    rules_2026 = {
+        **tax_rules.TAX_RULES[2025],
+        "itp_by_community": {**tax_rules.TAX_RULES[2025]["itp_by_community"], "Cataluña": 11.0},
+        "irpf_brackets": [(15000, 0.20), (None, 0.40)],
+    }
+    monkeypatch.setitem(tax_rules.TAX_RULES, 2026, rules_2026)
+    tax_rules.get_tax_tables.cache_clear()
+    try:
+        np.testing.assert_allclose(itp_rate(["Cataluña"] * 3, [2025, 2026, 2030]), [0.10, 0.11, 0.11])
+        np.testing.assert_allclose(irpf_rate([20000, 20000], [2025, 2026]), [0.24, 0.40])
+        assert float(irpf_rate(20000)) == 0.40
+        assert float(default_cost_ratio("notary_cost", 2026)) == 0.02
+        with pytest.raises(ValueError):
+            irpf_rate(20000, 2020)
+    finally:
+        monkeypatch.undo()
+        tax_rules.get_tax_tables.cache_clear()
@@ -1,7 +1,18 @@
 # test_tools.py
 
-from src.app.tools.financial_tools import compound_interest_calculator
-from src.app.tools.real_estate_tools import real_estate_profitability_calculator
+import numpy as np
+import pytest
+
+from tools import real_estate_tools
+from tools.financial_tools import compound_interest_batch, compound_interest_calculator
+from tools.real_estate_tools import (
+    RealEstateProfitabilityInput,
+    real_estate_portfolio_calculator,
+    real_estate_profitability_calculator,
+    real_estate_records,
+    real_estate_sensitivity_analysis,
+    real_estate_sensitivity_grid,
+)
 
 def test_compound_interest():
     data = compound_interest_calculator.invoke({
@@ -15,6 +26,80 @@ def test_compound_interest():
     assert round(final_balance, 2) == 30711.21
 
 
+def test_compound_interest_matches_period_by_period_compounding():
+    """The closed-form engine must reproduce the period-by-period compounding."""
+    inputs = {
+        "initial_balance": 2000,
+        "periodic_deposit": 35,
+        "deposit_frequency": "weekly",
+        "interest_rate": 6.25,
+        "years": 40
+    }
+    data = compound_interest_calculator.invoke(inputs)
+
+    n = 52
+    rate = inputs["interest_rate"] / 100
+    balance = inputs["initial_balance"]
+    acc_deposit = 0
+    acc_interest = 0
+    for year, row in enumerate(data, start=1):
+        for _ in range(n):
+            interest = balance * (rate / n)
+            balance = balance + inputs["periodic_deposit"] + interest
+            acc_deposit += inputs["periodic_deposit"]
+            acc_interest += interest
+        assert row["year"] == year
+        assert row["initial_balance"] == inputs["initial_balance"]
+        assert abs(row["total_deposit"] - acc_deposit) < 1e-6
+        assert abs(row["total_interest"] - acc_interest) < 1e-6
+        assert abs(row["balance"] - balance) < 1e-6
+    assert len(data) == inputs["years"]
+
+
+def test_compound_interest_zero_rate():
+    data = compound_interest_calculator.invoke({
+        "initial_balance": 100,
+        "periodic_deposit": 10,
+        "deposit_frequency": "monthly",
+        "interest_rate": 0,
+        "years": 2
+    })
+    assert [row["balance"] for row in data] == [220, 340]
+    assert [row["total_interest"] for row in data] == [0, 0]
+
+
+def test_compound_interest_batch_matches_tool():
+    scenarios = [
+        {"initial_balance": 865, "periodic_deposit": 123, "deposit_frequency": "monthly",
+         "interest_rate": 7.5, "years": 12},
+        {"initial_balance": 2000, "periodic_deposit": 35, "deposit_frequency": "weekly",
+         "interest_rate": 6.25, "years": 40},
+        {"initial_balance": 5000, "periodic_deposit": 0, "deposit_frequency": "annually",
+         "interest_rate": 0, "years": 3},
+    ]
+    batch = compound_interest_batch(scenarios)
+    assert batch["balance"].shape == (3, 40)
+    assert list(batch["years"]) == [12, 40, 3]
+    assert round(batch["final_balance"][0], 2) == 30711.21
+
+    for i, scenario in enumerate(scenarios):
+        data = compound_interest_calculator.invoke(scenario)
+        horizon = scenario["years"]
+        np.testing.assert_allclose(batch["balance"][i, :horizon], [row["balance"] for row in data])
+        np.testing.assert_allclose(batch["total_interest"][i, :horizon], [row["total_interest"] for row in data])
+        assert np.isnan(batch["balance"][i, horizon:]).all()
+
+    # Parallel arrays give the same trajectories without building models
+    columnar = compound_interest_batch(
+        initial_balance=[s["initial_balance"] for s in scenarios],
+        periodic_deposit=[s["periodic_deposit"] for s in scenarios],
+        interest_rate=[s["interest_rate"] for s in scenarios],
+        years=[s["years"] for s in scenarios],
+        deposit_frequency=[s["deposit_frequency"] for s in scenarios],
+    )
+    np.testing.assert_array_equal(columnar["balance"], batch["balance"])
+
+
 def test_real_estate_profitability_calculator():
     
     test_data = {
@@ -170,3 +255,149 @@ def test_real_estate_profitability_calculator_variable_mortgage():
     assert round(profitability["gross_rental_yield"], 2) == 0.05  
     
     print("\n[PASS] Variable interest real estate profitability calculator tests passed!")
+
+
+def test_real_estate_portfolio_calculator_matches_tool():
+    """Portfolio mode must give the same metrics as one tool call per property."""
+    properties = [
+        {
+            "purchase_price": 150000,
+            "autonomous_community": "Comunidad de Madrid",
+            "notary_cost": 500,
+            "registry_cost": 250,
+            "renovation_cost": 30000,
+            "agency_commission": 3000,
+            "mortgage_management_cost": 300,
+            "mortgage_appraisal_cost": 200,
+            "monthly_rental_income": 1000,
+            "homeowners_association_fee": 600,
+            "property_insurance": 100,
+            "mortgage_life_insurance": 150,
+            "property_tax_ibi": 160,
+            "annual_gross_salary": 38928,
+            "loan_term_years": 25,
+            "mortgage_type": "fixed",
+            "fixed_interest_rate": 2.5,
+        },
+        {
+            "purchase_price": 200000,
+            "autonomous_community": "Cataluña",
+            "renovation_cost": 8000,
+            "monthly_rental_income": 1000,
+            "has_rental_protection_insurance": "N",
+            "annual_gross_salary": 35000,
+            "loan_to_value_ratio": 0.75,
+            "loan_term_years": 20,
+            "mortgage_type": "variable",
+            "mortgage_margin": 1.5,
+            "euribor_rate": 2.0,
+        },
+    ]
+
+    # Columnar input: missing optional values are NaN and take the model defaults
+    columns = {
+        name: [prop.get(name, np.nan) for prop in properties]
+        for name in set().union(*properties)
+    }
+    columns["has_rental_protection_insurance"] = [
+        prop.get("has_rental_protection_insurance", "Y") for prop in properties
+    ]
+    portfolio = real_estate_portfolio_calculator(columns)
+    models = [RealEstateProfitabilityInput(**prop) for prop in properties]
+    from_models = real_estate_portfolio_calculator(models)
+    # Fast path: pre-validated records skip Pydantic
+    from_records = real_estate_portfolio_calculator([model.to_record() for model in models])
+    from_record_array = real_estate_portfolio_calculator(real_estate_records(columns))
+    mixed = real_estate_portfolio_calculator([models[0], models[1].to_record()])
+
+    for i, prop in enumerate(properties):
+        result = real_estate_profitability_calculator.invoke(prop)
+        for category in result:
+            for key, value in category.items():
+                if key in ("analysis_category", "purchase_price"):
+                    continue
+                assert portfolio[key][i] == value
+                assert from_models[key][i] == value
+                assert from_records[key][i] == value
+                assert from_record_array[key][i] == value
+                assert mixed[key][i] == value
+
+    assert list(portfolio["itp_tax_amount"]) == [9000, 20000]
+
+
+def test_real_estate_sensitivity_grid_matches_tool():
+    """Every point of the sensitivity grid must match a single tool call."""
+    base = {
+        "purchase_price": 150000,
+        "autonomous_community": "Comunidad de Madrid",
+        "renovation_cost": 30000,
+        "monthly_rental_income": 1000,
+        "annual_gross_salary": 32000,
+        "loan_term_years": 25,
+        "mortgage_type": "fixed",
+        "fixed_interest_rate": 2.5,
+    }
+    grid = real_estate_sensitivity_grid(
+        RealEstateProfitabilityInput(**base),
+        purchase_price=[140000, 160000],
+        interest_rate=[2.5, 3.5],
+        loan_term_years=[20, 30],
+    )
+    assert grid["dims"] == ("purchase_price", "interest_rate", "loan_term_years")
+    assert grid["roce_conservative"].shape == (2, 2, 2)
+
+    for index in np.ndindex(2, 2, 2):
+        price, rate, term = (grid["axes"][name][i] for name, i in zip(grid["dims"], index))
+        result = real_estate_profitability_calculator.invoke({
+            **base,
+            "purchase_price": int(price),
+            "fixed_interest_rate": rate,
+            "loan_term_years": int(term),
+        })
+        metrics = {key: value for category in result for key, value in category.items()}
+        for key in ("gross_rental_yield", "net_rental_yield_conservative",
+                    "annual_cash_flow_conservative", "roce_conservative"):
+            assert grid[key][index] == metrics[key]
+
+    rows = real_estate_sensitivity_analysis.invoke({
+        **base, "interest_rate_range": [2.5, 3.5], "loan_term_years_range": [20, 30]
+    })
+    assert len(rows) == 4
+    assert rows[0]["interest_rate"] == 2.5 and rows[0]["loan_term_years"] == 20
+    assert rows[0]["roce_conservative"] > rows[2]["roce_conservative"]
+
+
+def test_oversized_sensitivity_analysis_is_rejected_before_computing(monkeypatch):
+    def grid(*args, **kwargs):
+        raise AssertionError("the grid must not be computed")
+
+    monkeypatch.setattr(real_estate_tools, "real_estate_sensitivity_grid", grid)
+    with pytest.raises(ValueError, match=r"Too many combinations \(1000\)"):
+        real_estate_sensitivity_analysis.invoke({
+            "purchase_price": 150000,
+            "autonomous_community": "Comunidad de Madrid",
+            "renovation_cost": 0,
+            "monthly_rental_income": 1000,
+            "annual_gross_salary": 32000,
+            "loan_term_years": 25,
+            "mortgage_type": "fixed",
+            "fixed_interest_rate": 2.5,
+            "purchase_price_range": list(range(100000, 200000, 10000)),
+            "interest_rate_range": [1 + i / 10 for i in range(10)],
+            "loan_term_years_range": list(range(10, 40, 3)),
+        })
+
+
+def test_tax_year_before_the_first_rules_is_a_validation_error():
+    with pytest.raises(ValueError, match="tax_year\n  Input should be greater than or equal to 2025"):
+        RealEstateProfitabilityInput(
+            purchase_price=150000,
+            autonomous_community="Comunidad de Madrid",
+            renovation_cost=0,
+            monthly_rental_income=1000,
+            annual_gross_salary=32000,
+            loan_term_years=25,
+            mortgage_type="fixed",
+            fixed_interest_rate=2.5,
+            tax_year=2020,
+        )
@@ -0,0 +1,82 @@
+# test_web_fetch.py
+
+import asyncio
+
+import httpx
+
+from tools.web_fetch import afetch_page, afetch_pages, fetch_pages
+
+
+def make_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_pages_are_fetched_concurrently_and_in_order():
+    in_flight = peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        return httpx.Response(200, text=f"page {request.url.path}")
+
+    async def run():
+        async with make_client(handler) as client:
+            urls = [f"https://example.com/{i}" for i in range(6)] + ["https://example.com/missing"]
+            return await afetch_pages(urls, client=client, max_concurrency=3)
+
+    pages = asyncio.run(run())
+    assert [page.text for page in pages[:6]] == [f"page /{i}" for i in range(6)]
+    assert pages[-1].status_code == 404
+    assert peak == 3
+
+
+def test_size_cap_and_errors():
+    def handler(request):
+        if request.url.host == "down.example.com":
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(200, content="á".encode("utf-8") * 100)
+
+    async def run():
+        async with make_client(handler) as client:
+            return await afetch_pages(
+                ["https://example.com", "https://down.example.com"], client=client, max_bytes=11
+            )
+
+    page, failed = asyncio.run(run())
+    assert page.truncated and page.text.startswith("á" * 5)
+    assert failed.status_code == 0 and "ConnectError" in failed.error
+
+
+def test_any_failure_of_one_url_is_returned_not_raised():
+    def failing_extractor(text):
+        raise RuntimeError("parser crashed")
+
+    async def run():
+        async with make_client(lambda request: httpx.Response(200, text="ok")) as client:
+            return await asyncio.gather(
+                afetch_page("https://exa mple.com/\x00", client),
+                afetch_page("https://example.com/page", client, on_text=failing_extractor),
+                afetch_page("https://example.com/page", client),
+            )
+
+    invalid_url, bad_callback, page = asyncio.run(run())
+    assert invalid_url.status_code == 0 and invalid_url.error
+    assert bad_callback.status_code == 0 and "parser crashed" in bad_callback.error
+    assert page.text == "ok"
+
+
+def test_sync_wrapper():
+    client = make_client(lambda request: httpx.Response(200, text="ok"))
+    pages = fetch_pages(["https://example.com/a", "https://example.com/b"], client=client)
+    assert [page.text for page in pages] == ["ok", "ok"]
+
+    # Also callable from code already running inside an event loop
+    async def inside_loop():
+        return fetch_pages(["https://example.com/c"], client=client)
+
+    assert asyncio.run(inside_loop())[0].text == "ok"
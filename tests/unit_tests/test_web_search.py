@@ -0,0 +1,59 @@
+# test_web_search.py
+
+import threading
+import time
+
+from tools.web_search import SearchLayer
+
+
+class StubBackend:
+    """Local search backend that counts calls and can be slowed down."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def search(self, query, max_results=1, include_raw_content=True, topic="general"):
+        with self._lock:
+            self.calls.append((query, max_results, topic))
+        time.sleep(self.delay)
+        return {"query": query, "results": [
+            {"url": f"https://example.com/{query}/{i}", "title": query} for i in range(max_results)
+        ]}
+
+
+def test_results_are_cached_by_query_topic_and_max_results():
+    backend = StubBackend()
+    layer = SearchLayer(backend)
+
+    assert layer.search("euribor") == layer.search(" euribor ")
+    layer.search("euribor", topic="finance")
+    layer.search("euribor", max_results=3)
+    assert len(backend.calls) == 3
+
+
+def test_duplicate_queries_in_flight_are_coalesced():
+    backend = StubBackend(delay=0.05)
+    layer = SearchLayer(backend)
+
+    threads = [threading.Thread(target=layer.search, args=("itp madrid",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(backend.calls) == 1
+
+
+def test_queries_run_concurrently_in_order():
+    backend = StubBackend(delay=0.05)
+    layer = SearchLayer(backend)
+    queries = ["euribor", "itp", "irpf", "euribor"]
+
+    start = time.perf_counter()
+    results = layer.search_many(queries, max_concurrency=4)
+    elapsed = time.perf_counter() - start
+
+    assert [result["query"] for result in results] == queries
+    assert len(backend.calls) == 3
+    assert elapsed < 0.15